@@ -0,0 +1,191 @@
+"""
+Leitura de fontes direto de arquivos compactados (.zip, .tar, .tar.gz)
+Os membros são listados e lidos sem extração para o disco; os caminhos
+usados na análise e no relatório são relativos ao arquivo compactado
+"""
+
+import posixpath
+import tarfile
+import zipfile
+
+from prescan import DEFAULT_MAX_BUFFER_BYTES, prescan_unit
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+def is_archive(path):
+    """Verifica pela extensão se o caminho é um arquivo compactado suportado"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def normalize_member(path):
+    """Caminho de membro no formato do arquivo compactado ('/' e sem './')"""
+    path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    return '' if path == '.' else path
+
+class SourceArchive:
+    """
+    Membros de um arquivo compactado com operações equivalentes às de os.path
+
+    A listagem é lida uma única vez; o conteúdo de cada membro só é
+    descompactado quando pedido (read). Em um .tar.gz, prescan_members lê os
+    membros em sequência, na ordem do arquivo, o que evita voltar no fluxo.
+    """
+
+    # Operações de caminho sobre os nomes dos membros
+    path = posixpath
+
+    def __init__(self, archive_path):
+        """
+        Args:
+            archive_path (str): Arquivo .zip ou .tar(.gz/.bz2/.xz)
+        """
+        self.archive_path = archive_path
+        self._members = {}
+        self._dirs = {''}
+        self._children = {'': set()}
+        if zipfile.is_zipfile(archive_path):
+            self._zip = zipfile.ZipFile(archive_path)
+            self._tar = None
+            members = [(info.filename, info) for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            try:
+                self._tar = tarfile.open(archive_path, 'r:*')
+            except tarfile.TarError as e:
+                raise ValueError(f"Arquivo compactado inválido: {archive_path} ({str(e)})")
+            self._zip = None
+            members = [(info.name, info) for info in self._tar.getmembers() if info.isfile()]
+
+        for name, info in members:
+            name = normalize_member(name)
+            self._members[name] = info
+            # Índice diretório -> entradas, para listdir/walk sem percorrer a listagem
+            child = name
+            parent = posixpath.dirname(child)
+            while True:
+                self._children.setdefault(parent, set()).add(posixpath.basename(child))
+                if parent in self._dirs:
+                    break
+                self._dirs.add(parent)
+                child, parent = parent, posixpath.dirname(parent)
+
+    def __getstate__(self):
+        # Processos de análise reabrem o arquivo a partir do caminho
+        return {'archive_path': self.archive_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['archive_path'])
+
+    def close(self):
+        """Fecha o arquivo compactado"""
+        (self._zip or self._tar).close()
+
+    def names(self):
+        """Membros (arquivos) na ordem do arquivo compactado"""
+        return list(self._members)
+
+    def isfile(self, path):
+        return normalize_member(path) in self._members
+
+    def isdir(self, path):
+        return normalize_member(path) in self._dirs
+
+    def listdir(self, path):
+        """Nomes dos arquivos e subdiretórios imediatos de um diretório"""
+        return sorted(self._children.get(normalize_member(path), ()))
+
+    def walk(self, top):
+        """Equivalente a os.walk sobre os membros"""
+        top = normalize_member(top)
+        dirs = [d for d in self.listdir(top) if self.isdir(posixpath.join(top, d))]
+        files = [f for f in self.listdir(top) if self.isfile(posixpath.join(top, f))]
+        yield top, dirs, files
+        for d in dirs:
+            yield from self.walk(posixpath.join(top, d))
+
+    def read(self, path):
+        """Conteúdo (bytes) de um membro"""
+        info = self._members.get(normalize_member(path))
+        if info is None:
+            raise FileNotFoundError(f"Membro não encontrado em {self.archive_path}: {path}")
+        if self._zip is not None:
+            return self._zip.read(info)
+        return self._tar.extractfile(info).read()
+
+    def size(self, path):
+        """Tamanho descompactado de um membro"""
+        info = self._members[normalize_member(path)]
+        return info.file_size if self._zip is not None else info.size
+
+    def stat_key(self, path):
+        """Identificação de um membro para caches (nome, tamanho e data)"""
+        info = self._members[normalize_member(path)]
+        if self._zip is not None:
+            return (self.archive_path, info.filename, info.file_size, info.CRC)
+        return (self.archive_path, info.name, info.size, info.mtime)
+
+    def prescan_members(self, file_paths, log_callback=None, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES):
+        """
+        Pré-varredura dos membros pedidos, entregues na ordem pedida
+
+        A ordem é a do agendamento (do mais caro para o mais barato), como na
+        leitura do disco. Um .zip lê cada membro diretamente; um .tar(.gz) é lido
+        uma única vez, na ordem do arquivo, e os membros que chegam antes da vez
+        ficam guardados até max_buffer_bytes (acima disso, são entregues como
+        chegaram, para não voltar no fluxo nem acumular o arquivo inteiro).
+
+        Args:
+            file_paths (list): Membros .pas a analisar
+            log_callback (callable, optional): Função para log
+            max_buffer_bytes (int): Limite de memória para membros lidos fora da vez
+
+        Yields:
+            tuple: (membro, metadados) - metadados é None quando o membro não pôde ser lido
+        """
+        wanted = list(dict.fromkeys(normalize_member(p) for p in file_paths))
+        if self._zip is not None:
+            for name in wanted:
+                yield name, self._prescan_member(name, log_callback)
+            return
+
+        pending = set(wanted)
+        ready = {}
+        buffered = 0
+        delivered = set()
+        position = 0
+        for name in self._members:
+            if name not in pending:
+                continue
+            unit = self._prescan_member(name, log_callback)
+            ready[name] = unit
+            buffered += unit['size'] if unit else 0
+            if buffered > max_buffer_bytes:
+                # Memória cheia: entrega o que já foi lido, na ordem do arquivo
+                for ready_name, ready_unit in ready.items():
+                    delivered.add(ready_name)
+                    yield ready_name, ready_unit
+                ready.clear()
+                buffered = 0
+            while position < len(wanted) and (wanted[position] in ready or wanted[position] in delivered
+                                              or wanted[position] not in self._members):
+                name = wanted[position]
+                position += 1
+                if name in delivered:
+                    continue
+                unit = ready.pop(name) if name in ready else self._prescan_member(name, log_callback)
+                buffered -= unit['size'] if unit else 0
+                yield name, unit
+        for name in wanted[position:]:
+            if name not in delivered:
+                yield name, ready.pop(name) if name in ready else self._prescan_member(name, log_callback)
+
+    def _prescan_member(self, name, log_callback=None):
+        """Metadados da pré-varredura de um membro (None se não puder ser lido)"""
+        if name not in self._members:
+            if log_callback:
+                log_callback(f"Erro ao ler {name}: membro não encontrado em {self.archive_path}")
+            return None
+        try:
+            return prescan_unit(name, self.read(name))
+        except Exception as e:
+            if log_callback:
+                log_callback(f"Erro ao ler {name}: {str(e)}")
+            return None
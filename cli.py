@@ -0,0 +1,321 @@
+"""
+Interface de linha de comando do analisador
+
+Uso (também disponível como python main.py <comando>):
+    python cli.py analyze Projeto.dproj [--config Release] [--shard 1/4] [--output fatia1.json] [--resume]
+    python cli.py analyze versao-1.2.zip [--project src/Projeto.dproj] [--report relatorio.html]
+    python cli.py analyze C:/fontes [--exclude vendor --exclude Win32/Debug] [--report relatorio.html]
+    python cli.py analyze Projeto.dproj [--output resultados.json.gz] [--report-compact relatorio.html]
+    python cli.py merge fatia1.json fatia2.json ... [--output resultados.json] [--report-dir relatorio] [--source Projeto.dproj]
+    python cli.py daemon [--port 8765]
+    python cli.py lsp
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from archive_source import SourceArchive, is_archive
+from daemon import DEFAULT_MAX_ENTRIES, DEFAULT_PORT, serve
+from directory_scan import DirectoryScan
+from dproj_parser import resolve_project
+from journal import JOURNAL_FILE_NAME, RunJournal
+from lsp_server import DEFAULT_DEBOUNCE, serve as lsp_serve
+from pas_analyzer import analyze_pas_files
+from report_compact import generate_compact_report
+from report_generator import generate_report
+from report_pages import generate_report_pages
+from results_io import merge_results, save_results, sort_results
+from rules import find_rules_file, load_rules
+from run_cache import RunCache, make_settings_key
+from run_history import HISTORY_FILE_NAME, RunHistory, summarize_run
+from sharding import select_shard
+from source_snippets import DEFAULT_CONTEXT_LINES
+
+def build_parser():
+    """Monta o parser de argumentos com os subcomandos disponíveis"""
+    parser = argparse.ArgumentParser(prog='cli.py', description="Analisador de Memória Delphi")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="Analisa um projeto .dproj ou um arquivo .pas")
+    analyze.add_argument('input', help="Arquivo .dproj, .pas, compactado (.zip, .tar.gz) ou uma pasta")
+    analyze.add_argument('--include', action='append', default=[],
+                         help="Com uma pasta: padrão dos arquivos a analisar (padrão: *.pas; pode repetir)")
+    analyze.add_argument('--exclude', action='append', default=[],
+                         help="Com uma pasta: padrão de pastas ou arquivos a ignorar (ex.: vendor, Win32/Debug; pode repetir)")
+    analyze.add_argument('--project', help="Em um arquivo compactado com vários .dproj, o projeto a analisar")
+    analyze.add_argument('--config', help="Configuração do projeto (ex.: Debug, Release)")
+    analyze.add_argument('--shard', help="Analisa apenas a fatia i/N da lista de arquivos (ex.: 2/4)")
+    analyze.add_argument('--output', help="Grava os resultados (JSON) neste arquivo (.json.gz: compactado)")
+    analyze.add_argument('--format', choices=['json', 'columnar'], default='json', help="Formato dos resultados")
+    analyze.add_argument('--report', help="Gera o relatório HTML neste arquivo")
+    analyze.add_argument('--report-compact',
+                         help="Gera um relatório HTML autocontido com os resultados compactados (gzip) neste arquivo")
+    analyze.add_argument('--report-dir', help="Gera o relatório em várias páginas nesta pasta (index.html e uma página por unidade)")
+    analyze.add_argument('--snippet-lines', type=int, default=DEFAULT_CONTEXT_LINES,
+                         help=f"No relatório, linhas de código antes e depois de cada declaração (padrão: {DEFAULT_CONTEXT_LINES})")
+    analyze.add_argument('--no-snippets', action='store_true', help="Não inclui trechos do código no relatório")
+    analyze.add_argument('--collapse-duplicates', action='store_true',
+                         help="No relatório, mostra uma única vez os arquivos de conteúdo idêntico")
+    analyze.add_argument('--no-dedupe', action='store_true', help="Analisa também as cópias idênticas de uma unidade")
+    analyze.add_argument('--workers', type=int, default=1, help="Processos de análise (padrão: 1)")
+    analyze.add_argument('--split-large', action='store_true',
+                         help="Com --workers, divide arquivos muito grandes entre processos")
+    analyze.add_argument('--cache', help="Arquivo de cache entre execuções (reanalisa só as unidades alteradas)")
+    analyze.add_argument('--journal', help="Diário da execução (padrão: memory_leak_journal.jsonl ao lado do projeto)")
+    analyze.add_argument('--resume', action='store_true',
+                         help="Retoma uma execução interrompida: não reanalisa os arquivos já concluídos no diário")
+    analyze.add_argument('--no-journal', action='store_true', help="Não grava o diário da execução")
+    analyze.add_argument('--history', help="Histórico das execuções (padrão: memory_leak_history.jsonl ao lado do "
+                                           "projeto; com --shard, só quando informado)")
+    analyze.add_argument('--no-history', action='store_true', help="Não grava a execução no histórico")
+    analyze.add_argument('--rules', help="Arquivo JSON de regras (padrão: memory_rules.json ao lado do projeto)")
+    analyze.add_argument('--quiet', action='store_true', help="Não exibe o log de progresso")
+
+    merge = subparsers.add_parser('merge', help="Combina os resultados de várias fatias")
+    merge.add_argument('inputs', nargs='+', help="Arquivos de resultados das fatias")
+    merge.add_argument('--output', help="Grava os resultados combinados neste arquivo (.json.gz: compactado)")
+    merge.add_argument('--format', choices=['json', 'columnar'], default='json', help="Formato dos resultados")
+    merge.add_argument('--report', help="Gera o relatório HTML neste arquivo")
+    merge.add_argument('--report-compact',
+                       help="Gera um relatório HTML autocontido com os resultados compactados (gzip) neste arquivo")
+    merge.add_argument('--report-dir', help="Gera o relatório em várias páginas nesta pasta (index.html e uma página por unidade)")
+    merge.add_argument('--snippet-lines', type=int, default=DEFAULT_CONTEXT_LINES,
+                       help=f"No relatório, linhas de código antes e depois de cada declaração (padrão: {DEFAULT_CONTEXT_LINES})")
+    merge.add_argument('--no-snippets', action='store_true', help="Não inclui trechos do código no relatório")
+    merge.add_argument('--collapse-duplicates', action='store_true',
+                       help="No relatório, mostra uma única vez os arquivos de conteúdo idêntico")
+    merge.add_argument('--title', help="Título do relatório (padrão: o título gravado nas fatias)")
+    merge.add_argument('--source', help="Entrada analisada pelas fatias (.dproj, compactado ou pasta): trechos do "
+                                        "relatório lidos dela e histórico gravado ao lado dela")
+    merge.add_argument('--history', help="Histórico das execuções (padrão: memory_leak_history.jsonl ao lado de "
+                                         "--source; sem --source, só quando informado)")
+    merge.add_argument('--no-history', action='store_true', help="Não grava a execução no histórico")
+
+    daemon = subparsers.add_parser('daemon', help="Inicia o servidor JSON-RPC com caches em memória")
+    daemon.add_argument('--port', type=int, default=DEFAULT_PORT, help="Porta em 127.0.0.1")
+    daemon.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES, help="Limite de entradas de cada cache")
+    daemon.add_argument('--quiet', action='store_true', help="Não exibe o log das requisições")
+
+    lsp = subparsers.add_parser('lsp', help="Inicia o servidor LSP via stdio (diagnósticos no editor)")
+    lsp.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, help="Espera em segundos após a última alteração")
+
+    return parser
+
+def print_summary(results, files, stats):
+    """Exibe o resumo da execução"""
+    files_with_leaks = {r['file'] for r in results}
+    print(f"Arquivos analisados: {len(files)}")
+    print(f"Objetos não liberados: {len(results)} em {len(files_with_leaks)} arquivos")
+    if 'methods_analyzed' in stats:
+        print(f"Métodos analisados: {stats['methods_analyzed']}, ignorados pelo pré-filtro: {stats.get('methods_skipped', 0)}")
+    if stats.get('files_cached'):
+        print(f"Arquivos reaproveitados do cache: {stats['files_cached']}")
+    if stats.get('files_resumed'):
+        print(f"Arquivos retomados do diário: {stats['files_resumed']}")
+    if stats.get('duplicates_skipped'):
+        print(f"Arquivos idênticos reaproveitados: {stats['duplicates_skipped']}")
+
+def run_analyze(args):
+    """Executa o subcomando analyze"""
+    started = time.perf_counter()
+    if os.path.isdir(args.input):
+        project = resolve_directory(args)
+    else:
+        project = resolve_project(args.input, args.config, args.project)
+    source = project['source']
+    phases = {'resolve': time.perf_counter() - started}
+    try:
+        return _run_analyze(args, project, source, phases)
+    finally:
+        if source is not None:
+            source.close()
+
+def _run_analyze(args, project, source, phases):
+    files = project['files']
+    if source is not None and (args.cache or args.resume):
+        # Cache e diário identificam os arquivos pela data no disco
+        raise ValueError("--cache e --resume não estão disponíveis para arquivos compactados")
+    if args.shard:
+        all_files = list(files)
+        if source is not None:
+            files = select_shard(all_files, args.shard, size_of=source.size, read=source.read)
+        else:
+            files = select_shard(all_files, args.shard)
+        if not args.quiet:
+            print(f"Fatia {args.shard}: {len(files)} de {len(all_files)} arquivos")
+
+    rules_path = args.rules or find_rules_file(args.input)
+    rules = load_rules(rules_path)
+    if rules_path and not args.quiet:
+        print(f"Regras: {rules_path}")
+
+    run_cache = None
+    if args.cache:
+        run_cache = RunCache(args.cache, make_settings_key(project['defines'], rules))
+
+    journal = None
+    if not args.no_journal and source is None:
+        journal_path = args.journal or default_journal_path(args.input, args.shard)
+        try:
+            journal = RunJournal(journal_path, make_settings_key(project['defines'], rules), resume=args.resume)
+        except OSError as e:
+            print(f"Aviso: diário não gravado ({str(e)})", file=sys.stderr)
+    elif args.resume:
+        raise ValueError("--resume requer o diário da execução (sem --no-journal)")
+
+    log_callback = None if args.quiet else print
+    stats = {}
+    started = time.perf_counter()
+    try:
+        results = analyze_pas_files(
+            files, log_callback, stats=stats,
+            search_paths=project['search_paths'], defines=project['defines'], rules=rules,
+            dedupe=not args.no_dedupe, run_cache=run_cache,
+            workers=args.workers, split_large=args.split_large, journal=journal, source=source
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+    phases['analysis'] = time.perf_counter() - started
+    if isinstance(files, DirectoryScan):
+        files = files.files
+    results = sort_results(results)
+    title = f"Relatório de Vazamento de Memória: {os.path.basename(args.input)}"
+
+    # Histórico: os relatórios mostram as execuções anteriores e a atual
+    history = None
+    trend = None
+    if not args.no_history and (args.history or not args.shard):
+        history = RunHistory(args.history or default_history_path(args.input))
+        trend = history.load()
+    summary = summarize_run(results, files, stats, phases, title)
+    if trend is not None:
+        trend.append(summary)
+
+    started = time.perf_counter()
+    if args.output:
+        save_results(results, args.output, args.format, files=files, stats=stats, title=title)
+    if args.report:
+        generate_report(results, args.report, title=title, collapse_duplicates=args.collapse_duplicates,
+                        history=trend, snippet_lines=snippet_lines(args), source=source)
+    if args.report_compact:
+        generate_compact_report(results, args.report_compact, title=title, stats=stats)
+    if args.report_dir:
+        generate_report_pages(results, args.report_dir, title=title, collapse_duplicates=args.collapse_duplicates,
+                              workers=args.workers, log_callback=None if args.quiet else print, history=trend,
+                              snippet_lines=snippet_lines(args), source=source)
+    summary['phases']['report'] = round(time.perf_counter() - started, 3)
+    if history is not None:
+        try:
+            history.append(summary)
+        except OSError as e:
+            print(f"Aviso: histórico não gravado ({str(e)})", file=sys.stderr)
+
+    # Execução concluída: não há o que retomar
+    if journal is not None:
+        journal.discard()
+
+    print_summary(results, files, stats)
+    return 0
+
+def resolve_directory(args):
+    """Modo pasta: as unidades são localizadas durante a análise (sem .dproj)"""
+    scan = DirectoryScan(
+        args.input, include=args.include, exclude=args.exclude,
+        log_callback=None if args.quiet else print
+    )
+    return {'files': scan, 'search_paths': [args.input], 'config': None, 'defines': None, 'source': None}
+
+def snippet_lines(args):
+    """Linhas de contexto dos trechos do relatório (None = sem trechos)"""
+    return None if args.no_snippets else max(args.snippet_lines, 0)
+
+def project_dir(input_path):
+    """Pasta onde ficam diário e histórico: a pasta analisada ou a do projeto"""
+    return input_path if os.path.isdir(input_path) else os.path.dirname(os.path.abspath(input_path))
+
+def default_journal_path(input_path, shard=None):
+    """Diário ao lado do projeto (um por fatia, para fatias executadas em paralelo)"""
+    path = os.path.join(project_dir(input_path), JOURNAL_FILE_NAME)
+    if shard:
+        base, ext = os.path.splitext(path)
+        path = f"{base}.{shard.replace('/', 'de')}{ext}"
+    return path
+
+def default_history_path(input_path):
+    """Histórico ao lado do projeto"""
+    return os.path.join(project_dir(input_path), HISTORY_FILE_NAME)
+
+def run_merge(args):
+    """Executa o subcomando merge"""
+    # Fatias de um arquivo compactado: os trechos do relatório vêm dos membros
+    source = SourceArchive(args.source) if args.source and is_archive(args.source) else None
+    try:
+        return _run_merge(args, source)
+    finally:
+        if source is not None:
+            source.close()
+
+def _run_merge(args, source):
+    results, files, stats, title = merge_results(args.inputs)
+    title = args.title or title or "Relatório de Vazamento de Memória"
+
+    # Histórico: como no analyze, a execução combinada entra na tendência dos relatórios
+    history = None
+    trend = None
+    if not args.no_history and (args.history or args.source):
+        history = RunHistory(args.history or default_history_path(args.source))
+        trend = history.load()
+    summary = summarize_run(results, files, stats, title=title)
+    if trend is not None:
+        trend.append(summary)
+
+    started = time.perf_counter()
+    if args.output:
+        save_results(results, args.output, args.format, files=files, stats=stats, title=title)
+    if args.report:
+        generate_report(results, args.report, title=title, collapse_duplicates=args.collapse_duplicates,
+                        history=trend, snippet_lines=snippet_lines(args), source=source)
+    if args.report_compact:
+        generate_compact_report(results, args.report_compact, title=title, stats=stats)
+    if args.report_dir:
+        generate_report_pages(results, args.report_dir, title=title, collapse_duplicates=args.collapse_duplicates,
+                              log_callback=print, history=trend, snippet_lines=snippet_lines(args), source=source)
+    summary['phases']['report'] = round(time.perf_counter() - started, 3)
+    if history is not None:
+        try:
+            history.append(summary)
+        except OSError as e:
+            print(f"Aviso: histórico não gravado ({str(e)})", file=sys.stderr)
+
+    print_summary(results, files, stats)
+    return 0
+
+def run_daemon(args):
+    """Executa o subcomando daemon"""
+    serve(args.port, args.max_entries, None if args.quiet else print)
+    return 0
+
+def run_lsp(args):
+    """Executa o subcomando lsp"""
+    return lsp_serve(args.debounce)
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando"""
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'analyze':
+            return run_analyze(args)
+        if args.command == 'daemon':
+            return run_daemon(args)
+        if args.command == 'lsp':
+            return run_lsp(args)
+        return run_merge(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Erro: {str(e)}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
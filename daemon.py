@@ -0,0 +1,301 @@
+"""
+Modo servidor (daemon) com caches mantidos em memória entre as consultas
+
+Atende requisições JSON-RPC 2.0 via HTTP em localhost, por exemplo:
+
+    POST http://127.0.0.1:8765/
+    {"jsonrpc": "2.0", "id": 1, "method": "analyze_file", "params": {"path": "C:/src/Unit1.pas"}}
+
+Métodos: analyze_file, analyze_project, get_findings, stats, shutdown
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dproj_parser import resolve_project
+from include_resolver import IncludeCache, has_includes, include_dependencies
+from pas_analyzer import analyze_pas_file
+from preprocessor import PreprocessorCache
+from prescan import get_unit_content, prescan_unit
+from results_io import sort_results
+from rules import RulesCache
+from utils import LRUCache
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_ENTRIES = 5000
+
+def _stat_key(path):
+    """Data e tamanho de um arquivo (None se não existir mais)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class JsonRpcError(Exception):
+    """Erro devolvido ao cliente no campo 'error' da resposta JSON-RPC"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class AnalysisDaemon:
+    """
+    Estado mantido entre as consultas: projetos resolvidos, índice de unidades,
+    métodos extraídos e resultados por arquivo, todos com descarte LRU
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, log_callback=None):
+        """
+        Args:
+            max_entries (int): Limite de entradas de cada cache
+            log_callback (callable, optional): Função para log
+        """
+        self.log_callback = log_callback
+        self.projects = LRUCache(max(1, max_entries // 100))
+        self.unit_index = LRUCache(max(1, max_entries // 100))
+        self.methods = LRUCache(max_entries)
+        self.file_results = LRUCache(max_entries)
+        self.latest_key = LRUCache(max_entries)
+        self.include_caches = LRUCache(max(1, max_entries // 100))
+        self.preprocessor_cache = PreprocessorCache(max_entries)
+        self.rules = RulesCache(max(1, max_entries // 100))
+        self._lock = threading.Lock()
+
+    def _include_cache(self, search_paths):
+        key = tuple(search_paths or [])
+        with self._lock:
+            cache = self.include_caches.get(key)
+            if cache is None:
+                cache = IncludeCache(search_paths)
+                self.include_caches.put(key, cache)
+            return cache
+
+    def _project(self, project_path, config=None):
+        """Projeto resolvido (arquivos, caminhos de busca e símbolos), invalidado se o .dproj mudar"""
+        project_path = os.path.abspath(project_path)
+        st = os.stat(project_path)
+        key = (project_path, config)
+        project = self.projects.get(key)
+        if project is None or project['mtime'] != st.st_mtime_ns:
+            project = resolve_project(project_path, config)
+            project['mtime'] = st.st_mtime_ns
+            self.projects.put(key, project)
+            self.unit_index.put(key, {
+                os.path.splitext(os.path.basename(path))[0].lower(): path
+                for path in project['files']
+            })
+        return project
+
+    def analyze_file(self, path, config=None, project=None, defines=None, search_paths=None):
+        """
+        Analisa um arquivo .pas, reaproveitando o resultado se o arquivo não mudou
+
+        Args:
+            path (str): Arquivo .pas
+            config (str, optional): Configuração (com project)
+            project (str, optional): .dproj cujos símbolos e caminhos de busca serão usados
+            defines (list, optional): Símbolos definidos (sem project)
+            search_paths (list, optional): Caminhos de busca (sem project)
+
+        Returns:
+            dict: {'findings': [...], 'cached': bool}
+        """
+        path = os.path.abspath(path)
+        if not os.path.isfile(path):
+            raise JsonRpcError(-32602, f"Arquivo não encontrado: {path}")
+        if project:
+            resolved = self._project(project, config)
+            defines = resolved['defines']
+            search_paths = resolved['search_paths']
+        # memory_rules.json ao lado do projeto (ou do arquivo), como na linha de comando
+        rules = self.rules.rules_for(project or path)
+
+        stat = _stat_key(path)
+        define_key = tuple(sorted(defines)) if defines is not None else None
+        key = (path, define_key, tuple(search_paths or []), rules.signature())
+        cached = self.file_results.get(key)
+        # Arquivos {$I} alterados invalidam o resultado, mesmo com o .pas intacto
+        if cached is not None and any(_stat_key(p) != s for p, s in cached['includes'].items()):
+            cached = None
+        if cached is not None and cached['stat'] == stat:
+            self.latest_key.put(path, key)
+            return {'findings': cached['findings'], 'cached': True}
+
+        unit = prescan_unit(path)
+        if cached is not None and cached['hash'] == unit['hash']:
+            # Arquivo tocado, mas com o mesmo conteúdo
+            cached['stat'] = stat
+            self.latest_key.put(path, key)
+            return {'findings': cached['findings'], 'cached': True}
+
+        include_cache = self._include_cache(search_paths)
+        content = get_unit_content(unit)
+        includes = {}
+        if has_includes(content):
+            includes = {p: _stat_key(p) for p in include_dependencies(content, path, include_cache)}
+        findings = analyze_pas_file(
+            path, self.log_callback, unit=unit, include_cache=include_cache,
+            defines=defines, preprocessor_cache=self.preprocessor_cache, method_cache=self.methods, rules=rules
+        )
+        findings = sort_results(findings)
+        self.file_results.put(key, {
+            'stat': stat,
+            'hash': unit['hash'],
+            'includes': includes,
+            'findings': findings
+        })
+        self.latest_key.put(path, key)
+        return {'findings': findings, 'cached': False}
+
+    def analyze_project(self, path, config=None):
+        """
+        Analisa todos os arquivos de um projeto (.dproj)
+
+        Returns:
+            dict: {'files': quantidade, 'findings': [...], 'reanalyzed': quantidade}
+        """
+        project = self._project(path, config)
+        findings = []
+        reanalyzed = 0
+        for file_path in project['files']:
+            result = self.analyze_file(file_path, config, project=path)
+            findings.extend(result['findings'])
+            reanalyzed += 0 if result['cached'] else 1
+        return {'files': len(project['files']), 'findings': sort_results(findings), 'reanalyzed': reanalyzed}
+
+    def get_findings(self, path, config=None):
+        """
+        Devolve os resultados já em cache de um arquivo ou projeto, sem analisar
+
+        Returns:
+            dict: {'findings': [...]}
+        """
+        path = os.path.abspath(path)
+        if path.lower().endswith('.dproj'):
+            project = self.projects.get((path, config))
+            if project is None:
+                raise JsonRpcError(-32001, f"Projeto ainda não analisado: {path}")
+            findings = []
+            for file_path in project['files']:
+                findings.extend(self._cached_findings(file_path))
+            return {'findings': sort_results(findings)}
+        return {'findings': self._cached_findings(path)}
+
+    def _cached_findings(self, path):
+        """Resultados da última análise do arquivo (com qualquer conjunto de símbolos)"""
+        path = os.path.abspath(path)
+        key = self.latest_key.get(path)
+        cached = self.file_results.get(key) if key is not None else None
+        if cached is None:
+            raise JsonRpcError(-32001, f"Arquivo ainda não analisado: {path}")
+        return cached['findings']
+
+    def find_unit(self, project, unit_name, config=None):
+        """Localiza o arquivo de uma unidade pelo nome, usando o índice do projeto"""
+        self._project(project, config)
+        index = self.unit_index.get((os.path.abspath(project), config)) or {}
+        return {'path': index.get(unit_name.lower())}
+
+    def stats(self):
+        """Tamanho e aproveitamento dos caches"""
+        return {
+            name: {'entries': len(cache), 'hits': cache.hits, 'misses': cache.misses}
+            for name, cache in (
+                ('projects', self.projects), ('methods', self.methods), ('file_results', self.file_results)
+            )
+        }
+
+    def dispatch(self, method, params):
+        """Executa um método JSON-RPC"""
+        handlers = {
+            'analyze_file': self.analyze_file,
+            'analyze_project': self.analyze_project,
+            'get_findings': self.get_findings,
+            'find_unit': self.find_unit,
+            'stats': self.stats
+        }
+        handler = handlers.get(method)
+        if handler is None:
+            raise JsonRpcError(-32601, f"Método desconhecido: {method}")
+        try:
+            if isinstance(params, list):
+                return handler(*params)
+            return handler(**(params or {}))
+        except TypeError as e:
+            raise JsonRpcError(-32602, f"Parâmetros inválidos: {str(e)}")
+
+def handle_request(daemon, request):
+    """
+    Processa uma requisição JSON-RPC já decodificada
+
+    Returns:
+        dict: Resposta JSON-RPC (None para notificações)
+    """
+    request_id = request.get('id') if isinstance(request, dict) else None
+    try:
+        if not isinstance(request, dict) or 'method' not in request:
+            raise JsonRpcError(-32600, "Requisição inválida")
+        result = daemon.dispatch(request['method'], request.get('params'))
+        response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+    except JsonRpcError as e:
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+    except (OSError, ValueError) as e:
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': -32000, 'message': str(e)}}
+    if isinstance(request, dict) and 'id' not in request:
+        return None
+    return response
+
+def make_handler(daemon, server_ref):
+    """Cria a classe de tratamento HTTP ligada ao estado do daemon"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+            except ValueError:
+                request = None
+                response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': "JSON inválido"}}
+            else:
+                if isinstance(request, dict) and request.get('method') == 'shutdown':
+                    response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': True}
+                    threading.Thread(target=server_ref['server'].shutdown, daemon=True).start()
+                else:
+                    response = handle_request(daemon, request)
+
+            body = json.dumps(response, ensure_ascii=False).encode('utf-8') if response else b''
+            self.send_response(200 if response else 204)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if daemon.log_callback:
+                daemon.log_callback(format % args)
+
+    return Handler
+
+def serve(port=DEFAULT_PORT, max_entries=DEFAULT_MAX_ENTRIES, log_callback=None):
+    """
+    Inicia o daemon e atende requisições até receber 'shutdown'
+
+    Args:
+        port (int): Porta em 127.0.0.1
+        max_entries (int): Limite de entradas de cada cache
+        log_callback (callable, optional): Função para log
+    """
+    daemon = AnalysisDaemon(max_entries, log_callback)
+    server_ref = {}
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(daemon, server_ref))
+    server_ref['server'] = server
+    if log_callback:
+        log_callback(f"Daemon ouvindo em http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
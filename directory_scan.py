@@ -0,0 +1,162 @@
+"""
+Modo diretório: localiza as unidades Delphi percorrendo as pastas
+Para bases sem .dproj mantido. As pastas são lidas em paralelo e os arquivos
+encontrados são entregues à análise enquanto a varredura continua
+"""
+
+import fnmatch
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import is_delphi_unit
+
+# Arquivos considerados por padrão
+DEFAULT_INCLUDE = ('*.pas',)
+
+# Pastas de cópias de segurança da IDE, sempre ignoradas
+DEFAULT_EXCLUDE = ('__history', '__recovery')
+
+# Threads de leitura das pastas
+DEFAULT_SCAN_WORKERS = 8
+
+def match_path(rel_path, patterns):
+    """
+    Verifica se um caminho relativo casa com algum padrão glob
+
+    Padrões sem '/' são comparados com cada componente do caminho (ex.:
+    '__history' ignora a pasta em qualquer nível); padrões com '/' são
+    comparados com o final do caminho (ex.: 'Win32/Debug'). A comparação não
+    diferencia maiúsculas de minúsculas.
+
+    Args:
+        rel_path (str): Caminho relativo à raiz da varredura, com '/'
+        patterns (list): Padrões glob já normalizados (minúsculas, com '/')
+
+    Returns:
+        bool: True se algum padrão casar
+    """
+    rel_path = rel_path.lower()
+    parts = rel_path.split('/')
+    for pattern in patterns:
+        if '/' in pattern:
+            if fnmatch.fnmatchcase(rel_path, pattern) or fnmatch.fnmatchcase(rel_path, '*/' + pattern):
+                return True
+        elif any(fnmatch.fnmatchcase(part, pattern) for part in parts):
+            return True
+    return False
+
+def normalize_patterns(patterns):
+    """Padrões em minúsculas, com '/' e sem barras nas pontas"""
+    return [p.replace('\\', '/').strip('/').lower() for p in patterns if p and p.strip('/\\')]
+
+class DirectoryScan:
+    """
+    Unidades Delphi de uma pasta e subpastas, entregues à medida que são encontradas
+
+    Iterar sobre o objeto inicia a varredura: cada pasta é lida com os.scandir
+    em um pool de threads, pastas excluídas não são percorridas, e cada arquivo
+    incluído passa pela verificação do cabeçalho ('unit Nome;'). Ao final,
+    files tem a lista completa, em ordem alfabética.
+    """
+
+    def __init__(self, root, include=None, exclude=None, workers=DEFAULT_SCAN_WORKERS,
+                 check_header=True, log_callback=None):
+        """
+        Args:
+            root (str): Pasta inicial
+            include (list, optional): Padrões dos arquivos a analisar (padrão: *.pas)
+            exclude (list, optional): Padrões de pastas ou arquivos a ignorar, além
+                de __history e __recovery
+            workers (int): Threads de leitura das pastas
+            check_header (bool): Descarta arquivos que não começam com 'unit Nome;'
+            log_callback (callable, optional): Função para log
+        """
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Pasta não encontrada: {root}")
+        self.root = root
+        self.include = normalize_patterns(include or DEFAULT_INCLUDE)
+        self.exclude = normalize_patterns(list(DEFAULT_EXCLUDE) + list(exclude or []))
+        self.workers = max(1, workers)
+        self.check_header = check_header
+        self.log_callback = log_callback
+        self.found = []
+        self.skipped = 0
+
+    @property
+    def files(self):
+        """Unidades encontradas até agora, em ordem alfabética"""
+        return sorted(self.found)
+
+    def _included(self, rel_path):
+        name = rel_path.rsplit('/', 1)[-1].lower()
+        for pattern in self.include:
+            if '/' in pattern:
+                if match_path(rel_path, [pattern]):
+                    return True
+            elif fnmatch.fnmatchcase(name, pattern):
+                return True
+        return False
+
+    def __iter__(self):
+        self.found = []
+        self.skipped = 0
+        found = queue.Queue()
+        done = object()
+        state = {'pending': 1}
+        lock = threading.Lock()
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        def finished_one():
+            with lock:
+                state['pending'] -= 1
+                if state['pending'] == 0:
+                    found.put(done)
+
+        def scan(directory, rel_dir):
+            try:
+                if stop.is_set():
+                    return
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if stop.is_set():
+                            return
+                        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if match_path(rel_path, self.exclude):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                with lock:
+                                    state['pending'] += 1
+                                executor.submit(scan, entry.path, rel_path)
+                            elif entry.is_file() and self._included(rel_path):
+                                if self.check_header and not is_delphi_unit(entry.path):
+                                    with lock:
+                                        self.skipped += 1
+                                    continue
+                                found.put(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                if self.log_callback:
+                    self.log_callback(f"Aviso: pasta ignorada: {directory} ({str(e)})")
+            finally:
+                finished_one()
+
+        executor.submit(scan, self.root, '')
+        try:
+            while True:
+                path = found.get()
+                if path is done:
+                    break
+                self.found.append(path)
+                yield path
+        finally:
+            # Consumidor interrompido: pastas ainda não lidas são descartadas
+            stop.set()
+            executor.shutdown(wait=True)
+        if self.log_callback:
+            self.log_callback(f"Varredura concluída: {len(self.found)} unidades"
+                              + (f", {self.skipped} arquivos sem cabeçalho de unit ignorados" if self.skipped else ""))
@@ -2,26 +2,53 @@ import os
 import re
 import xml.etree.ElementTree as ET
 
-def get_pas_files_from_dproj(dproj_path):
+from archive_source import SourceArchive, is_archive, normalize_member
+from preprocessor import DEFAULT_PLATFORM, platform_defines
+
+def _path(source):
+    """Operações de caminho: os.path no disco, posixpath nos membros de um arquivo compactado"""
+    return source.path if source is not None else os.path
+
+def _isfile(path, source):
+    return source.isfile(path) if source is not None else os.path.isfile(path)
+
+def _isdir(path, source):
+    return source.isdir(path) if source is not None else os.path.isdir(path)
+
+def _resolve(project_dir, path, source):
+    """Caminho relativo ao projeto; nos arquivos compactados, relativo à raiz do arquivo"""
+    if source is not None:
+        return normalize_member(source.path.join(project_dir, path.replace('\\', '/')))
+    if not os.path.isabs(path):
+        path = os.path.normpath(os.path.join(project_dir, path))
+    return path
+
+def _parse_xml(path, source):
+    if source is not None:
+        return ET.fromstring(source.read(path))
+    return ET.parse(path).getroot()
+
+def get_pas_files_from_dproj(dproj_path, source=None):
     """
     Extrai os caminhos de arquivos .pas referenciados em um arquivo .dproj do Delphi.
     
     Args:
         dproj_path (str): Caminho para o arquivo .dproj
+        source (SourceArchive, optional): Arquivo compactado com o projeto; os
+            caminhos são então membros do arquivo
         
     Returns:
         list: Lista de caminhos completos para arquivos .pas
     """
     # Verificar se o arquivo existe
-    if not os.path.isfile(dproj_path):
+    if not _isfile(dproj_path, source):
         raise FileNotFoundError(f"Arquivo .dproj não encontrado: {dproj_path}")
     
-    project_dir = os.path.dirname(dproj_path)
+    project_dir = _path(source).dirname(dproj_path)
     
     try:
         # Analisar o arquivo XML
-        tree = ET.parse(dproj_path)
-        root = tree.getroot()
+        root = _parse_xml(dproj_path, source)
         
         # Namespace usado nos arquivos .dproj (pode variar, mas geralmente é esse)
         ns = {'ns': 'http://schemas.microsoft.com/developer/msbuild/2003'}
@@ -35,18 +62,18 @@ def get_pas_files_from_dproj(dproj_path):
                 pas_path = dcc_ref.attrib['Include']
                 
                 # Converter para caminho absoluto se for relativo
-                if not os.path.isabs(pas_path):
-                    pas_path = os.path.normpath(os.path.join(project_dir, pas_path))
+                pas_path = _resolve(project_dir, pas_path, source)
                 
                 # Verificar se o arquivo existe e tem a extensão .pas
-                if os.path.isfile(pas_path) and pas_path.lower().endswith('.pas'):
+                if _isfile(pas_path, source) and pas_path.lower().endswith('.pas'):
                     pas_files.append(pas_path)
         
         # Buscar também unidades no arquivo .dpr (que pode não estar explicitamente no .dproj)
-        dpr_files = [f for f in os.listdir(project_dir) if f.lower().endswith('.dpr')]
+        listdir = source.listdir if source is not None else os.listdir
+        dpr_files = [f for f in listdir(project_dir or '.') if f.lower().endswith('.dpr')]
         for dpr_file in dpr_files:
-            dpr_path = os.path.join(project_dir, dpr_file)
-            pas_files.extend(get_units_from_dpr(dpr_path, project_dir))
+            dpr_path = _path(source).join(project_dir, dpr_file)
+            pas_files.extend(get_units_from_dpr(dpr_path, project_dir, source))
         
         # Remover duplicatas
         return list(set(pas_files))
@@ -54,13 +81,14 @@ def get_pas_files_from_dproj(dproj_path):
     except ET.ParseError as e:
         raise ValueError(f"Erro ao analisar o arquivo .dproj: {str(e)}")
 
-def get_units_from_dpr(dpr_path, project_dir):
+def get_units_from_dpr(dpr_path, project_dir, source=None):
     """
     Extrai nomes de unidades do bloco 'uses' em um arquivo .dpr
     
     Args:
         dpr_path (str): Caminho para o arquivo .dpr
         project_dir (str): Diretório do projeto
+        source (SourceArchive, optional): Arquivo compactado com o projeto
         
     Returns:
         list: Lista de caminhos completos para arquivos .pas
@@ -68,8 +96,11 @@ def get_units_from_dpr(dpr_path, project_dir):
     pas_files = []
     
     try:
-        with open(dpr_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        if source is not None:
+            content = source.read(dpr_path).decode('utf-8', errors='ignore')
+        else:
+            with open(dpr_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
         
         # Procurar o bloco uses
         uses_match = re.search(r'uses\s+(.*?);', content, re.DOTALL)
@@ -90,19 +121,213 @@ def get_units_from_dpr(dpr_path, project_dir):
                     continue
                 
                 # Primeiro, verificar no mesmo diretório
-                pas_path = os.path.join(project_dir, f"{unit}.pas")
-                if os.path.isfile(pas_path):
+                pas_path = _path(source).join(project_dir, f"{unit}.pas")
+                if _isfile(pas_path, source):
                     pas_files.append(pas_path)
                     continue
                 
                 # Depois, procurar em subdiretórios
-                for root, _, files in os.walk(project_dir):
+                walk = source.walk if source is not None else os.walk
+                for root, _, files in walk(project_dir):
                     for file in files:
                         if file.lower() == f"{unit.lower()}.pas":
-                            pas_files.append(os.path.join(root, file))
+                            pas_files.append(_path(source).join(root, file))
                             break
     
     except Exception as e:
         print(f"Aviso: Erro ao processar o arquivo .dpr {dpr_path}: {str(e)}")
     
-    return pas_files 
\ No newline at end of file
+    return pas_files 
+
+def get_search_paths_from_dproj(dproj_path, source=None):
+    """
+    Extrai os diretórios de busca (DCC_UnitSearchPath) de um arquivo .dproj
+    
+    Args:
+        dproj_path (str): Caminho para o arquivo .dproj
+        source (SourceArchive, optional): Arquivo compactado com o projeto
+        
+    Returns:
+        list: Lista de caminhos absolutos de diretórios existentes
+    """
+    project_dir = _path(source).dirname(dproj_path)
+    search_paths = []
+    
+    try:
+        root = _parse_xml(dproj_path, source)
+    except ET.ParseError:
+        return []
+    
+    ns = {'ns': 'http://schemas.microsoft.com/developer/msbuild/2003'}
+    for element in root.findall('.//ns:DCC_UnitSearchPath', ns):
+        for entry in (element.text or '').split(';'):
+            entry = entry.strip()
+            # Ignorar variáveis do MSBuild como $(DCC_UnitSearchPath) ou $(BDS)
+            if not entry or '$(' in entry:
+                continue
+            entry = _resolve(project_dir, entry, source)
+            if _isdir(entry, source) and entry not in search_paths:
+                search_paths.append(entry)
+    
+    return search_paths
+
+
+def get_project_platform(root):
+    """Plataforma padrão do projeto: <Platform Condition="'$(Platform)'==''">Win64</Platform>"""
+    ns = {'ns': 'http://schemas.microsoft.com/developer/msbuild/2003'}
+    platform = root.find('.//ns:PropertyGroup/ns:Platform', ns)
+    if platform is not None and platform.text and platform.text.strip():
+        return platform.text.strip()
+    return DEFAULT_PLATFORM
+
+def get_project_defines(dproj_path, config=None, source=None):
+    """
+    Extrai os símbolos de compilação condicional (DCC_Define) da configuração ativa
+    
+    Os símbolos predefinidos da plataforma do projeto (WIN64, CPUX64, ... para Win64)
+    são incluídos, de modo que um projeto Win64 não avalie os ramos de Win32.
+    
+    Args:
+        dproj_path (str): Caminho para o arquivo .dproj
+        config (str, optional): Nome da configuração (ex.: 'Debug', 'Release');
+            se omitido, usa a configuração padrão do projeto
+        source (SourceArchive, optional): Arquivo compactado com o projeto
+        
+    Returns:
+        tuple: (nome da configuração, conjunto de símbolos definidos)
+    """
+    ns = {'ns': 'http://schemas.microsoft.com/developer/msbuild/2003'}
+    
+    try:
+        root = _parse_xml(dproj_path, source)
+    except ET.ParseError as e:
+        raise ValueError(f"Erro ao analisar o arquivo .dproj: {str(e)}")
+    
+    # Configuração padrão: <Config Condition="'$(Config)'==''">Debug</Config>
+    if not config:
+        default_config = root.find('.//ns:PropertyGroup/ns:Config', ns)
+        config = default_config.text.strip() if default_config is not None and default_config.text else 'Debug'
+    
+    # Chaves ativas (Base, Cfg_1, ...) a partir das BuildConfiguration e da hierarquia CfgParent
+    parents = {}
+    active_keys = {'Base'}
+    for build_config in root.findall('.//ns:BuildConfiguration', ns):
+        key = build_config.find('ns:Key', ns)
+        parent = build_config.find('ns:CfgParent', ns)
+        if key is None or not key.text:
+            continue
+        parents[key.text] = parent.text if parent is not None else None
+        if build_config.attrib.get('Include', '').lower() == config.lower():
+            active_keys.add(key.text)
+    
+    # Grupos condicionados por '$(Config)'=='Nome' declaram a chave da configuração
+    config_re = re.compile(r"'\$\(Config\)'\s*==\s*'([^']*)'", re.IGNORECASE)
+    for group in root.findall('ns:PropertyGroup', ns):
+        config_match = config_re.search(group.attrib.get('Condition', ''))
+        if config_match and config_match.group(1).lower() == config.lower():
+            for child in group:
+                tag = child.tag.split('}')[-1]
+                if (child.text or '').strip().lower() == 'true':
+                    active_keys.add(tag)
+    
+    for key in list(active_keys):
+        parent = parents.get(key)
+        while parent and parent not in active_keys:
+            active_keys.add(parent)
+            parent = parents.get(parent)
+    
+    key_re = re.compile(r"'\$\((\w+)\)'\s*!=\s*''")
+    defines = []
+    for group in root.findall('ns:PropertyGroup', ns):
+        condition = group.attrib.get('Condition', '')
+        if condition:
+            config_match = config_re.search(condition)
+            keys = key_re.findall(condition)
+            # Grupos por plataforma (ex.: Cfg_1_Win64) são ignorados
+            if not (config_match and config_match.group(1).lower() == config.lower()) \
+                    and not any(k in active_keys for k in keys):
+                continue
+        
+        for element in group.findall('ns:DCC_Define', ns):
+            # "DEBUG;$(DCC_Define)" acrescenta símbolos aos já definidos
+            value = (element.text or '').replace('$(DCC_Define)', ';'.join(defines))
+            defines = [d.strip() for d in value.split(';') if d.strip() and '$(' not in d]
+    
+    return config, set(defines) | platform_defines(get_project_platform(root))
+
+
+def resolve_project(input_path, config=None, project=None):
+    """
+    Resolve a entrada da análise (.dproj, .pas ou arquivo compactado) em arquivos, caminhos de busca e símbolos
+    
+    Args:
+        input_path (str): Arquivo .dproj, .pas, .zip ou .tar(.gz)
+        config (str, optional): Configuração do projeto (padrão do .dproj se omitida)
+        project (str, optional): Em um arquivo compactado com vários .dproj, o membro a usar
+        
+    Returns:
+        dict: {'files', 'search_paths', 'config', 'defines', 'source'} - os arquivos em
+            ordem estável; para um .pas isolado, config e defines são None; source é o
+            SourceArchive de onde os arquivos são lidos (None para arquivos no disco)
+    """
+    if is_archive(input_path):
+        return resolve_archive_project(input_path, config, project)
+    
+    if input_path.lower().endswith('.pas'):
+        if not os.path.isfile(input_path):
+            raise FileNotFoundError(f"Arquivo .pas não encontrado: {input_path}")
+        return {'files': [input_path], 'search_paths': [], 'config': None, 'defines': None, 'source': None}
+    
+    files = sorted(get_pas_files_from_dproj(input_path))
+    config, defines = get_project_defines(input_path, config)
+    return {
+        'files': files,
+        'search_paths': get_search_paths_from_dproj(input_path),
+        'config': config,
+        'defines': defines,
+        'source': None
+    }
+
+def resolve_archive_project(archive_path, config=None, project=None):
+    """
+    Resolve um projeto dentro de um arquivo compactado, sem extraí-lo
+    
+    O .dproj é procurado na listagem dos membros (ou informado em project); sem
+    nenhum .dproj, todos os membros .pas são analisados. Os caminhos retornados
+    são relativos ao arquivo compactado.
+    
+    Returns:
+        dict: Mesmo formato de resolve_project, com source aberto
+    """
+    if not os.path.isfile(archive_path):
+        raise FileNotFoundError(f"Arquivo compactado não encontrado: {archive_path}")
+    source = SourceArchive(archive_path)
+    
+    if project:
+        dproj_path = normalize_member(project)
+        if not source.isfile(dproj_path):
+            raise FileNotFoundError(f"Projeto {project} não encontrado em {archive_path}")
+    else:
+        projects = sorted(name for name in source.names() if name.lower().endswith('.dproj'))
+        if len(projects) > 1:
+            raise ValueError(f"Vários projetos em {archive_path}; escolha um: {', '.join(projects)}")
+        dproj_path = projects[0] if projects else None
+    
+    if dproj_path is None:
+        return {
+            'files': sorted(name for name in source.names() if name.lower().endswith('.pas')),
+            'search_paths': [],
+            'config': None,
+            'defines': None,
+            'source': source
+        }
+    
+    files = sorted(get_pas_files_from_dproj(dproj_path, source))
+    config, defines = get_project_defines(dproj_path, config, source)
+    return {
+        'files': files,
+        'search_paths': get_search_paths_from_dproj(dproj_path, source),
+        'config': config,
+        'defines': defines,
+        'source': source
+    }
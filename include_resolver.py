@@ -0,0 +1,282 @@
+"""
+Expansão de arquivos de inclusão ({$I arquivo.inc} / {$INCLUDE arquivo.inc})
+Cada arquivo incluído é lido e varrido uma única vez por execução, em um cache
+compartilhado indexado pelo hash do conteúdo
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from preprocessor import LEX_RE
+from source_reader import decode_source, detect_encoding
+from utils import atomic_write
+
+# Argumento de uma diretiva {$...} já separada pelo LEX_RE do pré-processador;
+# {$I+} / {$I-} são diretivas de verificação de E/S, não inclusões
+INCLUDE_RE = re.compile(r"^\s*(?:I|INCLUDE)\s+('[^']*'|[^}\s]+)\s*$", re.IGNORECASE)
+
+# Profundidade máxima de inclusões aninhadas (proteção contra ciclos)
+MAX_INCLUDE_DEPTH = 16
+
+class IncludeCache:
+    """
+    Cache de arquivos de inclusão compartilhado entre as unidades de uma execução
+
+    O conteúdo já varrido é indexado pelo hash SHA-1 do arquivo. Com cache_dir,
+    as entradas também são gravadas em disco e reaproveitadas por outros processos.
+    """
+
+    def __init__(self, search_paths=None, cache_dir=None, source=None):
+        """
+        Args:
+            search_paths (list, optional): Diretórios de busca adicionais
+            cache_dir (str, optional): Diretório para o cache em disco
+            source (SourceArchive, optional): Arquivo compactado de onde as
+                inclusões são lidas (caminhos relativos ao arquivo)
+        """
+        self.search_paths = list(search_paths or [])
+        self.cache_dir = cache_dir
+        self.source = source
+        self._hash_by_stat = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def resolve(self, name, including_dir, unit_dir):
+        """
+        Localiza o arquivo de inclusão
+
+        Procura relativo ao arquivo que inclui, depois à unidade e por fim nos
+        diretórios de busca. Sem extensão, tenta também .inc e .pas.
+
+        Returns:
+            str: Caminho absoluto ou None se não encontrado
+        """
+        path_module = self.source.path if self.source is not None else os.path
+        name = name.strip("'").replace('\\', path_module.sep)
+        candidates = [name]
+        if not path_module.splitext(name)[1]:
+            candidates += [name + '.inc', name + '.pas']
+
+        if path_module.isabs(name):
+            directories = ['']
+        else:
+            directories = [including_dir, unit_dir] + self.search_paths
+        for directory in directories:
+            for candidate in candidates:
+                path = path_module.normpath(path_module.join(directory, candidate))
+                if self.source is not None:
+                    if self.source.isfile(path):
+                        return path
+                elif os.path.isfile(path):
+                    return path
+        return None
+
+    def get(self, path):
+        """
+        Retorna o conteúdo varrido de um arquivo de inclusão
+
+        Returns:
+            dict: {'hash', 'text', 'directives': [(início, fim, nome), ...]}
+        """
+        if self.source is not None:
+            stat_key = self.source.stat_key(path)
+        else:
+            st = os.stat(path)
+            stat_key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            content_hash = self._hash_by_stat.get(stat_key)
+            if content_hash is not None and content_hash in self._entries:
+                return self._entries[content_hash]
+
+        if content_hash is None:
+            content_hash = self._load_ref(stat_key)
+        entry = self._load_entry(content_hash) if content_hash else None
+
+        if entry is None:
+            if self.source is not None:
+                raw = self.source.read(path)
+            else:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+            content_hash = hashlib.sha1(raw).hexdigest()
+            with self._lock:
+                entry = self._entries.get(content_hash)
+            if entry is None:
+                entry = self._load_entry(content_hash)
+            if entry is None:
+                text = decode_source(raw, detect_encoding(raw))
+                entry = {
+                    'hash': content_hash,
+                    'text': text,
+                    'directives': find_includes(text)
+                }
+                self._store_entry(entry)
+            self._store_ref(stat_key, content_hash)
+
+        with self._lock:
+            self._hash_by_stat[stat_key] = content_hash
+            self._entries[content_hash] = entry
+        return entry
+
+    def _disk_path(self, name):
+        return os.path.join(self.cache_dir, name) if self.cache_dir else None
+
+    def _ref_name(self, stat_key):
+        return hashlib.sha1(repr(stat_key).encode('utf-8')).hexdigest() + '.ref'
+
+    def _load_ref(self, stat_key):
+        ref_path = self._disk_path(self._ref_name(stat_key))
+        if ref_path and os.path.isfile(ref_path):
+            with open(ref_path, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        return None
+
+    def _store_ref(self, stat_key, content_hash):
+        ref_path = self._disk_path(self._ref_name(stat_key))
+        if ref_path:
+            atomic_write(ref_path, content_hash)
+
+    def _load_entry(self, content_hash):
+        entry_path = self._disk_path(content_hash + '.json')
+        if entry_path and os.path.isfile(entry_path):
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                entry['directives'] = [tuple(d) for d in entry['directives']]
+                return entry
+            except (OSError, ValueError, KeyError):
+                return None
+        return None
+
+    def _store_entry(self, entry):
+        entry_path = self._disk_path(entry['hash'] + '.json')
+        if entry_path:
+            atomic_write(entry_path, json.dumps(entry))
+
+def find_includes(content):
+    """
+    Diretivas de inclusão do conteúdo, ignorando as que estão em comentários
+    (//, (* *), { }) ou em literais de string
+
+    Returns:
+        list: Tuplas (início, fim, nome do arquivo)
+    """
+    directives = []
+    for match in LEX_RE.finditer(content):
+        if match.group(1) is None:
+            continue
+        include_match = INCLUDE_RE.match(match.group(1))
+        if include_match:
+            directives.append((match.start(), match.end(), include_match.group(1)))
+    return directives
+
+def has_includes(content):
+    """Verifica se o conteúdo tem diretivas de inclusão (sem varrer os que não têm '{$I')"""
+    return '{$i' in content.lower() and bool(find_includes(content))
+
+def include_dependencies(content, file_path, cache):
+    """
+    Arquivos de inclusão de uma unidade, inclusive os aninhados
+
+    Considera todas as diretivas, mesmo as de ramos condicionais inativos (a
+    lista pode ter arquivos a mais, nunca a menos).
+
+    Args:
+        content (str): Conteúdo da unidade
+        file_path (str): Caminho da unidade
+        cache (IncludeCache): Cache compartilhado de arquivos de inclusão
+
+    Returns:
+        list: Caminhos dos arquivos incluídos encontrados
+    """
+    unit_dir = os.path.dirname(file_path)
+    found = []
+    pending = [(file_path, [directive[2] for directive in find_includes(content)])]
+    while pending:
+        source, names = pending.pop()
+        for name in names:
+            include_path = cache.resolve(name, os.path.dirname(source), unit_dir)
+            if include_path is None or include_path in found:
+                continue
+            found.append(include_path)
+            pending.append((include_path, [directive[2] for directive in cache.get(include_path)['directives']]))
+    return found
+
+def expand_includes(content, file_path, cache, log_callback=None):
+    """
+    Expande as diretivas {$I}/{$INCLUDE} de uma unidade
+
+    Args:
+        content (str): Conteúdo da unidade
+        file_path (str): Caminho da unidade
+        cache (IncludeCache): Cache compartilhado de arquivos de inclusão
+        log_callback (callable, optional): Função para log
+
+    Returns:
+        tuple: (conteúdo expandido, mapa de linhas) - o mapa tem, para cada linha
+            do conteúdo expandido (base 0), a tupla (arquivo de origem, linha base 1)
+    """
+    unit_dir = os.path.dirname(file_path)
+    directives = find_includes(content)
+
+    out = []
+    line_map = []
+    state = {'at_line_start': True}
+
+    def emit(text, source, first_line):
+        if not text:
+            return
+        if state['at_line_start']:
+            line_map.append((source, first_line))
+        line = first_line
+        pos = text.find('\n')
+        while pos != -1:
+            line += 1
+            if pos + 1 < len(text):
+                line_map.append((source, line))
+                state['at_line_start'] = False
+            else:
+                state['at_line_start'] = True
+                break
+            pos = text.find('\n', pos + 1)
+        else:
+            state['at_line_start'] = False
+        out.append(text)
+
+    def expand(text, source, directives, stack):
+        pos = 0
+        line = 1
+        for start, end, name in directives:
+            emit(text[pos:start], source, line)
+            line += text.count('\n', pos, end)
+            include_path = cache.resolve(name, os.path.dirname(source), unit_dir)
+            if include_path is None:
+                if log_callback:
+                    log_callback(f"Aviso: arquivo de inclusão não encontrado: {name} ({os.path.basename(source)})")
+            elif include_path in stack or len(stack) >= MAX_INCLUDE_DEPTH:
+                if log_callback:
+                    log_callback(f"Aviso: inclusão recursiva ignorada: {include_path}")
+            else:
+                entry = cache.get(include_path)
+                expand(entry['text'], include_path, entry['directives'], stack + [include_path])
+            pos = end
+        emit(text[pos:], source, line)
+
+    expand(content, file_path, directives, [file_path])
+    return ''.join(out), line_map
+
+def map_line(line_map, line):
+    """
+    Converte uma linha (base 1) do conteúdo expandido na origem real
+
+    Returns:
+        tuple: (arquivo de origem, linha base 1)
+    """
+    if 1 <= line <= len(line_map):
+        return line_map[line - 1]
+    return line_map[-1] if line_map else (None, line)
@@ -0,0 +1,169 @@
+"""
+Diário de execução para retomar análises interrompidas
+Cada arquivo concluído é acrescentado (uma linha JSON) assim que termina, de
+forma que uma execução interrompida possa continuar de onde parou
+"""
+
+import json
+import os
+
+from prescan import prescan_unit
+from utils import atomic_write
+
+# Versão do formato gravado; versões diferentes descartam o diário
+JOURNAL_VERSION = 1
+
+# Nome do diário gravado ao lado do projeto
+JOURNAL_FILE_NAME = 'memory_leak_journal.jsonl'
+
+# Metadados da unidade guardados no diário (os mesmos usados pelo cache entre execuções)
+UNIT_KEYS = ('hash', 'interface_hash', 'unit_name', 'uses_interface', 'uses_implementation', 'uses_includes')
+
+class RunJournal:
+    """
+    Arquivos concluídos da execução atual, gravados à medida que terminam
+
+    O arquivo começa com um cabeçalho (versão e configuração) seguido de uma
+    linha por arquivo: metadados da unidade, data, tamanho e resultados. Cada
+    linha é gravada no disco (fsync) antes de seguir para o próximo arquivo;
+    uma última linha incompleta (queda durante a escrita) é ignorada.
+    """
+
+    def __init__(self, path, settings_key=None, resume=False):
+        """
+        Args:
+            path (str): Arquivo do diário
+            settings_key (str, optional): Identifica símbolos e regras da execução
+                (make_settings_key); um diário de outra configuração é descartado
+            resume (bool): Carrega os arquivos concluídos do diário existente;
+                sem resume, o diário é reiniciado
+        """
+        self.path = path
+        self.settings_key = settings_key
+        self.entries = {}
+        if resume:
+            self._load()
+
+        # Reescreve o diário só com as entradas válidas e continua acrescentando
+        lines = [json.dumps({'version': JOURNAL_VERSION, 'settings': settings_key})]
+        lines.extend(json.dumps(entry, ensure_ascii=False) for entry in self.entries.values())
+        atomic_write(path, '\n'.join(lines) + '\n')
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except OSError:
+            return
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return
+        if header.get('version') != JOURNAL_VERSION or header.get('settings') != self.settings_key:
+            return
+        for line in lines[1:]:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Linha truncada por uma interrupção durante a escrita
+                break
+            self.entries[entry['path']] = entry
+
+    def record(self, file_path, unit, results, seconds=None, duplicate_of=None):
+        """
+        Acrescenta um arquivo concluído
+
+        Args:
+            file_path (str): Caminho da unidade
+            unit (dict): Metadados da pré-varredura
+            results (list): Objetos não liberados encontrados
+            seconds (float, optional): Tempo gasto na análise
+            duplicate_of (str, optional): Cópia idêntica da qual os resultados foram repetidos
+        """
+        # Data e tamanho do arquivo lido na pré-varredura: uma alteração durante a
+        # análise não pode ser confundida com o conteúdo analisado
+        mtime_ns, size = unit.get('mtime_ns'), unit.get('size')
+        if mtime_ns is None:
+            st = os.stat(file_path)
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+        entry = {
+            'path': file_path,
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'unit': {key: unit.get(key) for key in UNIT_KEYS},
+            'seconds': seconds,
+            'duplicate_of': duplicate_of,
+            'results': results
+        }
+        self.entries[file_path] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def resumable(self, path, scan=None):
+        """
+        Entrada do diário se o arquivo já foi concluído com o mesmo conteúdo
+
+        Um arquivo cuja data ou tamanho mudou é relido e só é aproveitado se o
+        hash do conteúdo for o mesmo. Unidades com {$I} são sempre reanalisadas,
+        porque os arquivos incluídos podem ter mudado.
+
+        Args:
+            path (str): Caminho da unidade
+            scan (callable, optional): Pré-varredura (padrão: prescan_unit)
+
+        Returns:
+            dict: Entrada do diário, ou None se o arquivo precisa ser analisado
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry['unit'].get('uses_includes'):
+            return None
+        try:
+            st = os.stat(path)
+            if (st.st_mtime_ns, st.st_size) != (entry['mtime_ns'], entry['size']) \
+                    and (scan or prescan_unit)(path)['hash'] != entry['unit']['hash']:
+                return None
+        except Exception:
+            return None
+        return entry
+
+    def plan(self, file_paths, scan=None, log_callback=None):
+        """
+        Separa os arquivos já concluídos (com o mesmo conteúdo) dos que faltam
+
+        Args:
+            file_paths (list): Arquivos da execução
+            scan (callable, optional): Pré-varredura (padrão: prescan_unit)
+            log_callback (callable, optional): Função para log
+
+        Returns:
+            tuple: (arquivos a analisar, {caminho: entrada do diário})
+        """
+        to_analyze = []
+        resumed = {}
+        for path in file_paths:
+            entry = self.resumable(path, scan)
+            if entry is None:
+                to_analyze.append(path)
+            else:
+                resumed[path] = entry
+
+        if log_callback and self.entries:
+            log_callback(f"Retomando análise: {len(resumed)} arquivos já concluídos, {len(to_analyze)} a analisar")
+        return to_analyze, resumed
+
+    def close(self):
+        """Fecha o diário, mantendo-o para uma próxima retomada"""
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Fecha e remove o diário (execução concluída)"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
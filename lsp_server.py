@@ -0,0 +1,324 @@
+"""
+Servidor LSP (Language Server Protocol) via stdio
+Publica diagnósticos de vazamento de memória para documentos .pas abertos no editor
+
+Uso: python cli.py lsp (configurar o editor para iniciar este comando)
+"""
+
+import hashlib
+import json
+import sys
+import threading
+import urllib.parse
+import urllib.request
+
+from object_tracker import ClassFieldAnalyzer, DelphiMemoryAnalyzer
+from pas_analyzer import iter_methods
+from rules import RulesCache, get_default_rules
+
+# Tempo de espera após a última alteração antes de reanalisar (segundos)
+DEFAULT_DEBOUNCE = 0.3
+
+# Severidade "Warning" do LSP
+SEVERITY_WARNING = 2
+
+class MessageParseError(Exception):
+    """Mensagem recebida que não pôde ser interpretada (erro JSON-RPC -32700)"""
+
+def uri_to_path(uri):
+    """Caminho local de uma URI file:// (None para outros esquemas, ex.: untitled:)"""
+    parsed = urllib.parse.urlparse(uri)
+    if parsed.scheme != 'file':
+        return None
+    return urllib.request.url2pathname(parsed.path)
+
+class Document:
+    """Texto de um documento aberto e resultados por método já calculados"""
+
+    def __init__(self, uri, text, version=None):
+        self.uri = uri
+        self.text = text
+        self.version = version
+        self.method_results = {}
+        self.timer = None
+
+    def apply_change(self, change):
+        """
+        Aplica uma alteração incremental (com 'range') ou completa (sem 'range')
+
+        Args:
+            change (dict): TextDocumentContentChangeEvent
+        """
+        if 'range' not in change:
+            self.text = change['text']
+            return
+        start = self.offset_at(change['range']['start'])
+        end = self.offset_at(change['range']['end'])
+        self.text = self.text[:start] + change['text'] + self.text[end:]
+
+    def offset_at(self, position):
+        """
+        Converte uma posição LSP (linha, caractere em UTF-16) em índice do texto
+
+        Args:
+            position (dict): {'line': int, 'character': int}
+
+        Returns:
+            int: Índice no texto
+        """
+        offset = 0
+        for _ in range(position['line']):
+            nl = self.text.find('\n', offset)
+            if nl == -1:
+                return len(self.text)
+            offset = nl + 1
+        line_end = self.text.find('\n', offset)
+        if line_end == -1:
+            line_end = len(self.text)
+        # Caracteres fora do BMP ocupam duas unidades UTF-16
+        units = 0
+        index = offset
+        while index < line_end and units < position['character']:
+            units += 2 if ord(self.text[index]) > 0xFFFF else 1
+            index += 1
+        return index
+
+class LanguageServer:
+    """Servidor LSP mínimo: sincronização incremental e diagnósticos com atraso (debounce)"""
+
+    def __init__(self, reader=None, writer=None, debounce=DEFAULT_DEBOUNCE):
+        """
+        Args:
+            reader: Fluxo binário de entrada (padrão: stdin)
+            writer: Fluxo binário de saída (padrão: stdout)
+            debounce (float): Espera após a última alteração antes de reanalisar
+        """
+        self.reader = reader or sys.stdin.buffer
+        self.writer = writer or sys.stdout.buffer
+        self.debounce = debounce
+        self.documents = {}
+        self.rules = RulesCache()
+        self.shutdown_requested = False
+        self._write_lock = threading.Lock()
+        self._doc_lock = threading.Lock()
+        self._analysis_lock = threading.Lock()
+
+    def read_message(self):
+        """
+        Lê uma mensagem com cabeçalho Content-Length; None no fim da entrada
+
+        Raises:
+            MessageParseError: Corpo que não é JSON válido (a mensagem é descartada)
+        """
+        length = None
+        while True:
+            line = self.reader.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.decode('ascii', errors='replace').partition(':')
+            if name.lower() == 'content-length':
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    raise MessageParseError(f"Content-Length inválido: {value.strip()}")
+        if length is None:
+            return None
+        body = self.reader.read(length)
+        try:
+            return json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            raise MessageParseError(f"Mensagem inválida: {str(e)}")
+
+    def send(self, message):
+        """Envia uma mensagem JSON-RPC ao editor"""
+        body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+        with self._write_lock:
+            self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+            self.writer.flush()
+
+    def serve(self):
+        """Laço principal: atende mensagens até 'exit'"""
+        while True:
+            try:
+                message = self.read_message()
+            except MessageParseError as e:
+                # Uma mensagem malformada ou truncada não encerra o servidor
+                self.send({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': str(e)}})
+                continue
+            if message is None:
+                return 1
+            if not isinstance(message, dict):
+                self.send({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': "Requisição inválida"}})
+                continue
+            method = message.get('method')
+            if method == 'exit':
+                return 0 if self.shutdown_requested else 1
+            try:
+                result = self.handle(method, message.get('params') or {})
+            except Exception as e:
+                if 'id' in message:
+                    self.send({'jsonrpc': '2.0', 'id': message['id'], 'error': {'code': -32603, 'message': str(e)}})
+                continue
+            if 'id' in message:
+                self.send({'jsonrpc': '2.0', 'id': message['id'], 'result': result})
+
+    def handle(self, method, params):
+        """Trata uma requisição ou notificação do editor"""
+        if method == 'initialize':
+            return {
+                'capabilities': {
+                    # 2 = sincronização incremental
+                    'textDocumentSync': {'openClose': True, 'change': 2}
+                },
+                'serverInfo': {'name': 'delphi-memory-analyzer'}
+            }
+        if method == 'shutdown':
+            self.shutdown_requested = True
+            return None
+        if method == 'textDocument/didOpen':
+            item = params['textDocument']
+            with self._doc_lock:
+                self.documents[item['uri']] = Document(item['uri'], item['text'], item.get('version'))
+            self.schedule(item['uri'], delay=0)
+        elif method == 'textDocument/didChange':
+            uri = params['textDocument']['uri']
+            with self._doc_lock:
+                document = self.documents.get(uri)
+                if document is None:
+                    return None
+                for change in params['contentChanges']:
+                    document.apply_change(change)
+                document.version = params['textDocument'].get('version')
+            self.schedule(uri)
+        elif method == 'textDocument/didClose':
+            uri = params['textDocument']['uri']
+            with self._doc_lock:
+                document = self.documents.pop(uri, None)
+                if document and document.timer:
+                    document.timer.cancel()
+            self.send_notification('textDocument/publishDiagnostics', {'uri': uri, 'diagnostics': []})
+        return None
+
+    def rules_for(self, uri):
+        """Regras do memory_rules.json da pasta do documento (padrão se inválido ou ausente)"""
+        path = uri_to_path(uri)
+        if path is None:
+            return get_default_rules()
+        try:
+            return self.rules.rules_for(path)
+        except (OSError, ValueError) as e:
+            print(f"Regras inválidas para {path}: {str(e)}", file=sys.stderr)
+            return get_default_rules()
+
+    def send_notification(self, method, params):
+        """Envia uma notificação ao editor"""
+        self.send({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+    def schedule(self, uri, delay=None):
+        """Agenda a análise do documento, cancelando a anterior (debounce)"""
+        with self._doc_lock:
+            document = self.documents.get(uri)
+            if document is None:
+                return
+            if document.timer:
+                document.timer.cancel()
+            document.timer = threading.Timer(self.debounce if delay is None else delay, self.publish, args=(uri,))
+            document.timer.daemon = True
+            document.timer.start()
+
+    def publish(self, uri):
+        """Analisa o documento e publica os diagnósticos"""
+        with self._doc_lock:
+            document = self.documents.get(uri)
+            if document is None:
+                return
+            text = document.text
+            version = document.version
+        with self._analysis_lock:
+            diagnostics = analyze_document(text, document.method_results, self.rules_for(uri))
+        params = {'uri': uri, 'diagnostics': diagnostics}
+        if version is not None:
+            params['version'] = version
+        self.send_notification('textDocument/publishDiagnostics', params)
+
+def analyze_document(text, method_results, rules=None):
+    """
+    Gera os diagnósticos de um documento, reanalisando só os métodos alterados
+
+    Args:
+        text (str): Conteúdo atual do documento
+        method_results (dict): Resultados por hash das regras e do texto do método;
+            atualizado para conter apenas os métodos atuais
+        rules (MemoryRules, optional): Regras de liberação e posse (padrão: regras internas)
+
+    Returns:
+        list: Diagnósticos LSP
+    """
+    rules = rules or get_default_rules()
+    rules_key = rules.signature().encode('ascii')
+    methods = list(iter_methods(text))
+    analyzer = DelphiMemoryAnalyzer(rules=rules)
+    current = {}
+    diagnostics = []
+    lines = None
+
+    for method in methods:
+        body = text[method['start']:method['end']]
+        key = hashlib.sha1(rules_key + body.encode('utf-8', errors='replace')).hexdigest()
+        results = method_results.get(key)
+        if results is None:
+            results = analyzer.find_unreleased_objects(body, method['name'])
+        current[key] = results
+        for obj in results:
+            if lines is None:
+                lines = text.split('\n')
+            line = method['line'] + obj['line'] - 1
+            diagnostics.append(make_diagnostic(
+                lines, line, obj['name'],
+                f"Objeto '{obj['name']}' ({obj['type']}) não é liberado em {method['name']}"
+            ))
+
+    # Campos de classe (rápido: usa o texto e a lista de métodos já prontos)
+    for field in ClassFieldAnalyzer(rules=rules).find_unreleased_fields(text, methods):
+        if lines is None:
+            lines = text.split('\n')
+        diagnostics.append(make_diagnostic(
+            lines, field['line'] - 1, field['name'],
+            f"Campo '{field['class']}.{field['name']}' ({field['type']}) criado em "
+            f"{field['method']['name']} não é liberado no destrutor"
+        ))
+
+    method_results.clear()
+    method_results.update(current)
+    return diagnostics
+
+def make_diagnostic(lines, line, name, message):
+    """Diagnóstico LSP sobre o nome do objeto na linha da declaração"""
+    line_text = lines[line] if 0 <= line < len(lines) else ''
+    start = line_text.find(name)
+    if start == -1:
+        start, end = 0, len(line_text.rstrip('\r'))
+    else:
+        end = start + len(name)
+    # Posições em unidades UTF-16
+    start_units = _utf16_len(line_text[:start])
+    end_units = start_units + _utf16_len(line_text[start:end])
+    return {
+        'range': {
+            'start': {'line': line, 'character': start_units},
+            'end': {'line': line, 'character': end_units}
+        },
+        'severity': SEVERITY_WARNING,
+        'source': 'delphi-memory-analyzer',
+        'message': message
+    }
+
+def _utf16_len(text):
+    return len(text.encode('utf-16-le')) // 2
+
+def serve(debounce=DEFAULT_DEBOUNCE):
+    """Inicia o servidor LSP em stdio"""
+    return LanguageServer(debounce=debounce).serve()
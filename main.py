@@ -1,18 +1,33 @@
 import os
+import pathlib
+import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
+import time
+import webbrowser
 
-from dproj_parser import get_pas_files_from_dproj
+from archive_source import is_archive
+from directory_scan import DirectoryScan
+from dproj_parser import get_pas_files_from_dproj, get_project_defines, get_search_paths_from_dproj, resolve_project
+from journal import JOURNAL_FILE_NAME, RunJournal
 from pas_analyzer import analyze_pas_files
+from preprocessor import PreprocessorCache
 from report_generator import generate_report
+from results_view import ResultsView
+from rules import find_rules_file, load_rules
+from run_cache import CACHE_FILE_NAME, RunCache, make_settings_key
+from run_history import HISTORY_FILE_NAME, RunHistory, summarize_run
 
 class Application(tk.Tk):
     def __init__(self):
         super().__init__()
         
         self.title("Analisador de Memória Delphi")
-        self.geometry("700x500")
+        self.geometry("900x600")
+        self.report_path = None
+        # Pré-processamento reaproveitado entre análises (ex.: Debug e depois Release)
+        self.preprocessor_cache = PreprocessorCache()
         
         self.create_widgets()
     
@@ -35,6 +50,9 @@ class Application(tk.Tk):
         single_file_btn = tk.Button(top_frame, text="Selecionar Arquivo", command=self.select_dproj)
         single_file_btn.pack(side=tk.LEFT, padx=5)
         
+        folder_btn = tk.Button(top_frame, text="Selecionar Pasta", command=self.select_folder)
+        folder_btn.pack(side=tk.LEFT, padx=5)
+        
         # Checkbox para relatório detalhado
         options_frame = tk.Frame(main_frame)
         options_frame.pack(fill=tk.X, pady=5)
@@ -45,14 +63,26 @@ class Application(tk.Tk):
         analyze_btn = tk.Button(options_frame, text="Iniciar Análise", command=self.start_analysis)
         analyze_btn.pack(side=tk.LEFT, padx=10)
         
+        # Botão para abrir o relatório HTML da última análise
+        self.report_btn = tk.Button(options_frame, text="Abrir Relatório", command=self.open_report, state=tk.DISABLED)
+        self.report_btn.pack(side=tk.LEFT, padx=5)
+        
         # Barra de progresso
         self.progress_var = tk.DoubleVar()
         self.progress = ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100)
         self.progress.pack(fill=tk.X, pady=5)
         
-        # Frame inferior para log
-        log_frame = tk.LabelFrame(main_frame, text="Log")
-        log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        # Abas de resultados e log
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # Resultados, preenchidos durante a análise (duplo clique abre o código)
+        self.results_view = ResultsView(notebook)
+        notebook.add(self.results_view, text="Resultados")
+        
+        # Frame para log
+        log_frame = tk.Frame(notebook)
+        notebook.add(log_frame, text="Log")
         
         # Área de texto para log
         self.log_text = tk.Text(log_frame, height=10, wrap=tk.WORD)
@@ -64,18 +94,28 @@ class Application(tk.Tk):
         self.log_text.config(yscrollcommand=scrollbar.set)
         
         # Status inicial
-        self.log("Pronto para análise. Selecione um arquivo .dproj ou .pas para começar.")
+        self.log("Pronto para análise. Selecione um arquivo .dproj, .pas ou compactado (.zip, .tar.gz) para começar.")
     
     def select_dproj(self):
         """Abre diálogo para selecionar arquivo .dproj"""
         file_path = filedialog.askopenfilename(
             title="Selecionar arquivo .dproj",
-            filetypes=[("Arquivos de projeto Delphi", "*.dproj"), ("Arquivos Delphi", "*.pas")]
+            filetypes=[
+                ("Arquivos de projeto Delphi", "*.dproj"), ("Arquivos Delphi", "*.pas"),
+                ("Arquivos compactados", "*.zip *.tar *.tar.gz *.tgz")
+            ]
         )
         if file_path:
             self.dproj_path_var.set(file_path)
             self.log(f"Selecionado: {file_path}")
     
+    def select_folder(self):
+        """Abre diálogo para selecionar uma pasta (projetos sem .dproj)"""
+        folder = filedialog.askdirectory(title="Selecionar pasta com os fontes")
+        if folder:
+            self.dproj_path_var.set(folder)
+            self.log(f"Selecionada a pasta: {folder}")
+    
     def start_analysis(self):
         """Inicia a análise em um thread separado"""
         file_path = self.dproj_path_var.get()
@@ -84,8 +124,11 @@ class Application(tk.Tk):
             messagebox.showerror("Erro", "Selecione um arquivo .dproj ou .pas.")
             return
         
-        # Limpar log anterior
+        # Limpar log e resultados anteriores
         self.log_text.delete(1.0, tk.END)
+        self.results_view.clear()
+        self.report_path = None
+        self.report_btn.config(state=tk.DISABLED)
         self.log(f"Iniciando análise de {file_path}")
         
         # Resetar progresso
@@ -106,18 +149,69 @@ class Application(tk.Tk):
         """Executa a análise em um thread separado"""
         try:
             self.log(f"{'Analisando arquivo único' if single_file else 'Analisando projeto'}")
+            started = time.perf_counter()
             
             # Lista de arquivos a analisar
             pas_files = []
+            search_paths = []
+            defines = None
+            source = None
             
-            if single_file:
+            if is_archive(dproj_path):
+                # Fontes lidos direto do arquivo compactado, sem extração
+                self.log(f"Lendo arquivo compactado: {os.path.basename(dproj_path)}")
+                project = resolve_project(dproj_path)
+                pas_files, search_paths, defines, source = (
+                    project['files'], project['search_paths'], project['defines'], project['source']
+                )
+                self.log(f"Encontrados {len(pas_files)} arquivos .pas no arquivo compactado")
+            elif os.path.isdir(dproj_path):
+                # Unidades localizadas percorrendo a pasta (__history e __recovery ignoradas) e
+                # entregues à análise enquanto a varredura continua, também com o cache
+                self.log(f"Procurando unidades em: {dproj_path}")
+                pas_files = DirectoryScan(dproj_path, log_callback=lambda message: self.after(0, lambda: self.log(message)))
+                search_paths = [dproj_path]
+            elif single_file:
                 pas_files = [dproj_path]
                 self.log(f"Analisando arquivo: {os.path.basename(dproj_path)}")
             else:
                 self.log(f"Lendo projeto: {os.path.basename(dproj_path)}")
                 pas_files = get_pas_files_from_dproj(dproj_path)
+                search_paths = get_search_paths_from_dproj(dproj_path)
+                config, defines = get_project_defines(dproj_path)
+                self.log(f"Configuração {config}: símbolos {', '.join(sorted(defines)) or '(nenhum)'}")
                 self.log(f"Encontrados {len(pas_files)} arquivos .pas no projeto")
             
+            # Regras de liberação do projeto (memory_rules.json ao lado do projeto)
+            rules_path = find_rules_file(dproj_path)
+            if rules_path:
+                self.log(f"Regras: {rules_path}")
+            rules = load_rules(rules_path)
+            
+            # Cache, diário e relatório ficam na pasta do projeto (ou na pasta analisada)
+            output_dir = dproj_path if os.path.isdir(dproj_path) else os.path.dirname(dproj_path)
+            
+            # Cache e diário dependem das datas dos arquivos no disco
+            run_cache = None
+            journal = None
+            if source is None:
+                if not single_file:
+                    # Resultados da execução anterior (só as unidades alteradas são reanalisadas);
+                    # um arquivo avulso não grava cache na pasta dele
+                    run_cache = RunCache(
+                        os.path.join(output_dir, CACHE_FILE_NAME),
+                        make_settings_key(defines, rules)
+                    )
+                
+                # Diário da execução: uma análise interrompida continua de onde parou
+                journal = RunJournal(
+                    os.path.join(output_dir, JOURNAL_FILE_NAME),
+                    make_settings_key(defines, rules),
+                    resume=True
+                )
+            
+            phases = {'resolve': time.perf_counter() - started}
+            
             # Definir callbacks para progresso e log
             def log_callback(message):
                 self.after(0, lambda: self.log(message))
@@ -125,24 +219,57 @@ class Application(tk.Tk):
             def progress_callback(percent):
                 self.after(0, lambda: self.progress_var.set(percent))
             
-            # Executar análise
-            results = analyze_pas_files(pas_files, log_callback, progress_callback)
+            # Executar análise (os resultados aparecem na tabela conforme cada arquivo termina)
+            started = time.perf_counter()
+            try:
+                results = analyze_pas_files(
+                    pas_files, log_callback, progress_callback, search_paths=search_paths, defines=defines,
+                    rules=rules, run_cache=run_cache, results_callback=self.results_view.add_results,
+                    journal=journal, source=source, preprocessor_cache=self.preprocessor_cache
+                )
+            finally:
+                if journal is not None:
+                    journal.close()
+                if source is not None:
+                    source.close()
+            if journal is not None:
+                journal.discard()
+            phases['analysis'] = time.perf_counter() - started
+            if isinstance(pas_files, DirectoryScan):
+                pas_files = pas_files.files
+            
+            # Histórico das execuções (gráficos de tendência no relatório)
+            title = f"Relatório de Vazamento de Memória: {os.path.basename(dproj_path)}"
+            history = RunHistory(os.path.join(output_dir, HISTORY_FILE_NAME))
+            trend = history.load()
+            summary = summarize_run(results, pas_files, phases=phases, title=title)
+            trend.append(summary)
             
+            started = time.perf_counter()
             if results:
                 self.log(f"Análise completa. Encontrados {len(results)} objetos não liberados.")
                 
                 # Gerar relatório
-                report_path = os.path.join(os.path.dirname(dproj_path), "memory_leak_report.html")
+                report_path = os.path.join(output_dir, "memory_leak_report.html")
                 
                 generate_report(
                     results, 
                     report_path, 
-                    title=f"Relatório de Vazamento de Memória: {os.path.basename(dproj_path)}",
-                    detailed=detailed
+                    title=title,
+                    detailed=detailed,
+                    history=trend
                 )
                 
-                os.startfile(report_path)
-            else:
+                self.log(f"Relatório gerado: {report_path}")
+                self.after(0, lambda: self.set_report(report_path))
+            summary['phases']['report'] = round(time.perf_counter() - started, 3)
+            try:
+                history.append(summary)
+            except OSError as e:
+                # Pasta sem permissão de escrita: o relatório já foi gerado
+                self.log(f"Aviso: histórico não gravado ({str(e)})")
+            
+            if not results:
                 self.log("Análise completa. Nenhum vazamento de memória encontrado!")
                 messagebox.showinfo("Análise Concluída", "Nenhum vazamento de memória encontrado!")
             
@@ -150,11 +277,25 @@ class Application(tk.Tk):
             self.log(f"Erro durante a análise: {str(e)}")
             messagebox.showerror("Erro", f"Ocorreu um erro durante a análise:\n{str(e)}")
     
+    def set_report(self, report_path):
+        """Habilita a abertura do relatório gerado"""
+        self.report_path = report_path
+        self.report_btn.config(state=tk.NORMAL)
+    
+    def open_report(self):
+        """Abre o relatório HTML no navegador"""
+        if self.report_path:
+            webbrowser.open(pathlib.Path(self.report_path).resolve().as_uri())
+    
     def log(self, message):
         """Adiciona mensagem ao log"""
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)  # Rolar para o final
         
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Com argumentos, roda a linha de comando (ex.: python main.py analyze Projeto.dproj)
+        from cli import main
+        sys.exit(main())
     app = Application()
     app.mainloop() 
\ No newline at end of file
@@ -5,20 +5,62 @@ Usa pyparsing para análise de texto avançada
 
 import re
 import pyparsing as pp
+from bisect import bisect_right
 from collections import defaultdict
 
+from rules import get_default_rules
+
+# Pré-filtro: um método só pode vazar se tiver seção 'var' com algum tipo não primitivo
+PREFILTER_VAR_RE = re.compile(r'\bvar\b', re.IGNORECASE)
+PREFILTER_TYPE_RE = re.compile(r':\s*([TI][A-Z]\w*)')
+
+def method_may_leak(code, start=0, end=None, rules=None):
+    """
+    Pré-filtro barato que descarta métodos que não podem conter vazamentos
+
+    Procura apenas por 'var' e, depois dele, por um tipo no estilo de classe
+    ou interface (TFoo/IFoo) que não esteja entre os tipos ignorados das
+    regras (TDateTime, ...), sem extrair blocos nem analisar declarações.
+
+    Args:
+        code (str): Código do método ou do arquivo inteiro
+        start (int): Início do método em code
+        end (int, optional): Fim do método em code
+        rules (MemoryRules, optional): Regras com os tipos ignorados (padrão: regras internas)
+
+    Returns:
+        bool: True se o método precisa de análise detalhada
+    """
+    if end is None:
+        end = len(code)
+    var_match = PREFILTER_VAR_RE.search(code, start, end)
+    if not var_match:
+        return False
+    rules = rules or get_default_rules()
+    pos = var_match.end()
+    while True:
+        type_match = PREFILTER_TYPE_RE.search(code, pos, end)
+        if type_match is None:
+            return False
+        if not rules.is_ignored_type(type_match.group(1)):
+            return True
+        pos = type_match.end()
+
 class DelphiMemoryAnalyzer:
     """Analisador de código Delphi para detectar objetos não liberados"""
     
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, rules=None):
         """
         Inicializar o analisador
         Args:
             debug (bool): Ativar mensagens de depuração
+            rules (MemoryRules, optional): Regras de liberação (padrão: regras internas)
         """
         self.debug = debug
+        self.rules = rules or get_default_rules()
         self.objects = {}
         self.unreleased = []
+        self.stats = {'methods_analyzed': 0, 'methods_skipped': 0}
     
     def find_unreleased_objects(self, method_code, method_name):
         """
@@ -35,6 +77,13 @@ class DelphiMemoryAnalyzer:
         self.objects = {}
         self.unreleased = []
         
+        # 0. Pré-filtro: métodos sem variáveis de tipo objeto não podem vazar
+        if not method_may_leak(method_code, rules=self.rules):
+            self.stats['methods_skipped'] += 1
+            self._debug_print(f"Método ignorado pelo pré-filtro: {method_name}")
+            return []
+        self.stats['methods_analyzed'] += 1
+        
         # 1. Extrair todos os blocos 'finally' se existirem
         finally_blocks = self._extract_all_finally_blocks(method_code)
         
@@ -102,12 +151,6 @@ class DelphiMemoryAnalyzer:
         obj1, obj2: TClassName;
         obj3: TOutraClasse;
         """
-        # Lista de tipos primitivos/comuns do Delphi
-        COMMON_TYPES = {
-            'integer', 'string', 'double', 'real', 'boolean', 'byte', 'word', 'char', 'currency',
-            'smallint', 'longint', 'int64', 'single', 'extended', 'pchar', 'ansistring', 'widestring',
-            'shortstring', 'cardinal', 'variant', 'pointer', 'dword', 'qword', 'tdate', 'tdatetime'
-        }
         # Encontrar seção 'var'
         var_match = re.search(r'\bvar\b(.*?)\bbegin\b', code, re.IGNORECASE | re.DOTALL)
         if not var_match:
@@ -116,7 +159,16 @@ class DelphiMemoryAnalyzer:
 
         var_section = var_match.group(1)
         line_offset = code[:var_match.start()].count('\n') + 1
+        self._parse_var_section(var_section, line_offset)
 
+    def _parse_var_section(self, var_section, line_offset):
+        """
+        Registra em self.objects as variáveis de tipo objeto de uma seção 'var'
+
+        Args:
+            var_section (str): Texto entre 'var' e 'begin'
+            line_offset (int): Linha (relativa ao método) onde a seção começa
+        """
         # Analisar declarações de variáveis
         for line_num, line in enumerate(var_section.split('\n')):
             line = line.strip()
@@ -127,7 +179,7 @@ class DelphiMemoryAnalyzer:
             try:
                 vars_part, type_part = line.split(':', 1)
                 type_name = type_part.strip().rstrip(';').strip().lower()
-                if type_name in COMMON_TYPES:
+                if self.rules.is_ignored_type(type_name):
                     continue  # Ignora tipos comuns do Delphi
                 if not (type_name.startswith('t') or type_name.startswith('i')):
                     continue  # Mantém checagem para classes customizadas
@@ -166,23 +218,12 @@ class DelphiMemoryAnalyzer:
         if not code:
             return
         context = "bloco finally" if is_finally else "código geral"
+        # Uma única varredura com o padrão combinado das regras
+        released = {name.lower() for _, name in self.rules.released_names(code)}
         for obj_name, obj_info in self.objects.items():
-            if obj_info['freed']:
-                continue
-            # Padrões de liberação (mais robusto)
-            patterns = [
-                fr'FreeAndNil\s*\(\s*{re.escape(obj_name)}\s*\)',
-                fr'{re.escape(obj_name)}\s*\.\s*Free\b',
-                fr'{re.escape(obj_name)}\s*\.\s*DisposeOf\b',
-                fr'{re.escape(obj_name)}\s*\.\s*Release\b',
-                fr'{re.escape(obj_name)}\s*\.\s*Destroy\b',
-                fr'Free\s*\(\s*{re.escape(obj_name)}\s*\)'
-            ]
-            for pat in patterns:
-                if re.search(pat, code, re.IGNORECASE):
-                    self.objects[obj_name]['freed'] = True
-                    self._debug_print(f"Objeto liberado: {obj_name} ({context})")
-                    break
+            if not obj_info['freed'] and obj_name.lower() in released:
+                obj_info['freed'] = True
+                self._debug_print(f"Objeto liberado: {obj_name} ({context})")
     
     def _get_unreleased_objects(self):
         """Retorna lista de objetos usados mas não liberados"""
@@ -200,6 +241,277 @@ class DelphiMemoryAnalyzer:
         
         return unreleased
 
+# Padrões combinados usados na análise em lote de um arquivo inteiro
+VAR_SECTION_RE = re.compile(r'\bvar\b(.*?)\bbegin\b', re.IGNORECASE | re.DOTALL)
+USAGE_RE = re.compile(r'(\w+)\s*(?::=|\.)|\(\s*(\w+)|,\s*(\w+)(?=\s*[,)])')
+
+class FileMemoryAnalyzer(DelphiMemoryAnalyzer):
+    """
+    Analisa todos os métodos de um arquivo de uma só vez
+
+    Em vez de executar cada padrão uma vez por método, executa os padrões
+    combinados de declaração, uso e liberação sobre toda a seção de métodos
+    e atribui cada ocorrência ao método que a contém (busca binária nos
+    intervalos de iter_methods).
+    """
+
+    def find_unreleased_objects_in_file(self, file_content, methods):
+        """
+        Encontra objetos não liberados em todos os métodos do arquivo
+
+        Args:
+            file_content (str): Conteúdo do arquivo
+            methods (list): Métodos extraídos por iter_methods
+
+        Returns:
+            list: Tuplas (método, objeto não liberado)
+        """
+        if not methods:
+            return []
+
+        starts = [m['start'] for m in methods]
+        region_start = methods[0]['start']
+        region_end = methods[-1]['end']
+
+        def method_index(pos):
+            idx = bisect_right(starts, pos) - 1
+            if idx >= 0 and pos < methods[idx]['end']:
+                return idx
+            return None
+
+        # 0. Pré-filtro: só os métodos que podem vazar seguem para a análise detalhada
+        candidates = {
+            idx for idx, method in enumerate(methods)
+            if method_may_leak(file_content, method['start'], method['end'], self.rules)
+        }
+        self.stats['methods_analyzed'] += len(candidates)
+        self.stats['methods_skipped'] += len(methods) - len(candidates)
+        if not candidates:
+            return []
+
+        # 1. Declarações: primeira seção 'var' de cada método
+        declarations = {}
+        pos = region_start
+        while pos < region_end:
+            var_match = VAR_SECTION_RE.search(file_content, pos, region_end)
+            if not var_match:
+                break
+            idx = method_index(var_match.start())
+            if idx is None:
+                # Seção 'var' fora de método: continuar no próximo método
+                next_idx = bisect_right(starts, var_match.start())
+                if next_idx >= len(methods):
+                    break
+                pos = starts[next_idx]
+                continue
+            method = methods[idx]
+            if idx in candidates and var_match.end() <= method['end']:
+                self.objects = {}
+                line_offset = file_content.count('\n', method['start'], var_match.start()) + 1
+                self._parse_var_section(var_match.group(1), line_offset)
+                if self.objects:
+                    declarations[idx] = self.objects
+            pos = method['end']
+
+        if not declarations:
+            return []
+
+        # 2. Uso: uma única varredura com o padrão combinado
+        used = defaultdict(set)
+        for match in USAGE_RE.finditer(file_content, region_start, region_end):
+            idx = method_index(match.start())
+            if idx in declarations:
+                used[idx].add(match.group(1) or match.group(2) or match.group(3))
+
+        # 3. Liberações: uma única varredura com o padrão combinado das regras
+        released = defaultdict(set)
+        for pos, name in self.rules.released_names(file_content, region_start, region_end):
+            idx = method_index(pos)
+            if idx in declarations:
+                released[idx].add(name.lower())
+
+        # 4. Objetos usados e não liberados, método a método
+        unreleased = []
+        for idx in sorted(declarations):
+            self.objects = declarations[idx]
+            for obj_name, obj_info in self.objects.items():
+                obj_info['used'] = obj_name in used[idx]
+                obj_info['freed'] = obj_name.lower() in released[idx]
+            for obj in self._get_unreleased_objects():
+                unreleased.append((methods[idx], obj))
+
+        return unreleased
+
+# Padrões usados na análise de campos de classe
+CLASS_DECL_RE = re.compile(r'^[ \t]*(\w+)\s*=\s*class\b(?!\s*(?:of|helper)\b)(\s*\([^)]*\))?', re.IGNORECASE | re.MULTILINE)
+FIELD_DECL_RE = re.compile(r'^\s*(\w+(?:\s*,\s*\w+)*)\s*:\s*([\w.]+(?:<[\w.,\s]+>)?)\s*;', re.IGNORECASE)
+MEMBER_DECL_RE = re.compile(r'^\s*(?:class\s+)?(?:procedure|function|constructor|destructor|property|operator)\b', re.IGNORECASE)
+FIELD_CREATE_RE = re.compile(r'\b(\w+)\s*:=\s*[\w.]+(?:<[^>;]*>)?\s*\.\s*Create\b', re.IGNORECASE)
+
+class ClassFieldAnalyzer(DelphiMemoryAnalyzer):
+    """
+    Analisa campos de classe: objetos criados nos construtores e não liberados
+    no destrutor (Destroy) ou em BeforeDestruction
+    """
+
+    def find_unreleased_fields(self, file_content, methods):
+        """
+        Encontra campos de classe criados e não liberados
+
+        Reaproveita o buffer e a lista de métodos de iter_methods,
+        sem reler o arquivo.
+
+        Args:
+            file_content (str): Conteúdo do arquivo
+            methods (list): Métodos extraídos por iter_methods
+
+        Returns:
+            list: Campos não liberados, com a classe e o construtor que os cria
+        """
+        if not methods:
+            return []
+
+        # As declarações de classe ficam antes do primeiro método
+        classes = self._find_class_fields(file_content, methods[0]['start'])
+        if not classes:
+            return []
+
+        return self.resolve_fields(classes, self.collect_field_events(file_content, methods))
+
+    def collect_field_events(self, file_content, methods, events=None):
+        """
+        Coleta, por classe, os campos criados nos construtores e os nomes liberados
+        (ou com posse transferida) nos construtores e destrutores
+
+        Pode ser chamado sobre partes da lista de métodos, acumulando em events.
+
+        Args:
+            file_content (str): Conteúdo do arquivo
+            methods (list): Métodos extraídos por iter_methods
+            events (dict, optional): Eventos já coletados em outras partes
+
+        Returns:
+            dict: {classe_em_minúsculas: {'created': [(campo, construtor)], 'released': set}}
+        """
+        if events is None:
+            events = {}
+        for method in methods:
+            if '.' not in method['name']:
+                continue
+            class_name, method_name = method['name'].rsplit('.', 1)
+            is_constructor = method['type'] == 'constructor'
+            is_destructor = method['type'] == 'destructor' or method_name.lower() == 'beforedestruction'
+            if not (is_constructor or is_destructor):
+                continue
+
+            entry = events.setdefault(class_name.lower(), {'created': [], 'released': set()})
+            if is_constructor:
+                for create_match in FIELD_CREATE_RE.finditer(file_content, method['start'], method['end']):
+                    entry['created'].append((create_match.group(1).lower(), method))
+            # Posse transferida no construtor (ex.: Create(Self), Lista.Add) e liberações nos destrutores
+            entry['released'].update(
+                name.lower() for _, name in self.rules.released_names(file_content, method['start'], method['end'])
+            )
+        return events
+
+    def resolve_fields(self, classes, events):
+        """
+        Cruza os campos declarados com as criações e liberações coletadas
+
+        Args:
+            classes (dict): Resultado de _find_class_fields
+            events (dict): Resultado de collect_field_events
+
+        Returns:
+            list: Campos não liberados, com a classe e o construtor que os cria
+        """
+        unreleased = []
+        for class_name, fields in classes.items():
+            entry = events.get(class_name.lower())
+            if not entry:
+                continue
+
+            # Campos criados nos construtores (vale o primeiro construtor que cria)
+            self.objects = {}
+            for field_key, constructor in entry['created']:
+                field = fields.get(field_key)
+                if field and field['name'] not in self.objects:
+                    self.objects[field['name']] = {
+                        'type': field['type'],
+                        'line': field['line'],
+                        'used': True,
+                        'freed': field['name'].lower() in entry['released'],
+                        'method': constructor
+                    }
+                    self._debug_print(f"Campo criado: {class_name}.{field['name']} em {constructor['name']}")
+
+            for obj in self._get_unreleased_objects():
+                obj['class'] = class_name
+                obj['method'] = self.objects[obj['name']]['method']
+                unreleased.append(obj)
+
+        return unreleased
+
+    def _find_class_fields(self, code, end):
+        """
+        Coleta os campos do tipo objeto das declarações de classe
+
+        Args:
+            code (str): Conteúdo do arquivo
+            end (int): Posição limite da busca
+
+        Returns:
+            dict: {classe: {campo_em_minúsculas: {'name', 'type', 'line'}}}
+        """
+        classes = {}
+        for class_match in CLASS_DECL_RE.finditer(code, 0, end):
+            # "TFoo = class;" e "TFoo = class(TBase);" não têm corpo
+            if code[class_match.end():class_match.end() + 64].lstrip().startswith(';'):
+                continue
+
+            fields = {}
+            line_num = code.count('\n', 0, class_match.end()) + 1
+            pos = code.find('\n', class_match.end())
+            depth = 0
+            paren_depth = 0
+            while 0 <= pos < end:
+                next_pos = code.find('\n', pos + 1)
+                line = code[pos + 1:next_pos if next_pos != -1 else end]
+                pos = next_pos
+                line_num += 1
+
+                line = re.sub(r'//.*', '', line)
+                line = re.sub(r'{[^}]*}', '', line)
+                if paren_depth == 0 and not MEMBER_DECL_RE.match(line):
+                    field_match = FIELD_DECL_RE.match(line)
+                    if field_match and depth == 0:
+                        type_name = field_match.group(2)
+                        type_lower = type_name.lower()
+                        # Interfaces (IFoo) usam contagem de referência
+                        is_interface = re.match(r'^I[A-Z]', type_name) is not None
+                        if not self.rules.is_ignored_type(type_lower) and type_lower.startswith('t') and not is_interface:
+                            for field_name in [f.strip() for f in field_match.group(1).split(',')]:
+                                fields[field_name.lower()] = {'name': field_name, 'type': type_name, 'line': line_num}
+                paren_depth += line.count('(') - line.count(')')
+
+                # Fim da declaração: 'end' fora de registros aninhados
+                closed = False
+                for token in re.findall(r'\b(record|end)\b', line, re.IGNORECASE):
+                    if token.lower() == 'record':
+                        depth += 1
+                    elif depth == 0:
+                        closed = True
+                        break
+                    else:
+                        depth -= 1
+                if closed:
+                    break
+
+            if fields:
+                classes[class_match.group(1)] = fields
+                self._debug_print(f"Classe {class_match.group(1)}: campos {', '.join(f['name'] for f in fields.values())}")
+        return classes
+
 # Função de compatibilidade para o código existente
 def find_unreleased_objects(method_code, method_name, debug=False):
     """
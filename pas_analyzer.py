@@ -1,55 +1,115 @@
+import hashlib
 import os
 import re
-from object_tracker import DelphiMemoryAnalyzer
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from object_tracker import ClassFieldAnalyzer, FileMemoryAnalyzer
+from include_resolver import IncludeCache, expand_includes, has_includes, map_line
+from prefetch import DEFAULT_IO_WORKERS, DEFAULT_MAX_BUFFER_BYTES
+from preprocessor import DEFAULT_MAX_ENTRIES, PreprocessorCache, has_conditionals, predefined_defines
+from prescan import IMPLEMENTATION_RE, get_unit_content, prescan_files, prescan_unit
+from scheduler import estimate_makespan, plan_tasks
 import pyparsing as pp
 from typing import List, Dict, Any
 
-def extract_methods_from_file(file_content):
-    lines = file_content.splitlines(True)
-    impl_index = None
-    # Encontra a linha "implementation"
-    for idx, line in enumerate(lines):
-        if re.match(r'^\s*implementation\b', line, flags=re.IGNORECASE):
-            impl_index = idx
-            break
-    if impl_index is None:
-        return []
-    
-    results = []
+# Cabeçalho de método na coluna 0 (fronteira segura para dividir arquivos grandes)
+METHOD_HEADER_RE = re.compile(r'^(?:procedure|function|constructor|destructor)\b', re.IGNORECASE | re.MULTILINE)
+
+def extract_methods_from_file(file_content, implementation_offset=None):
+    """
+    Extrai todos os métodos da seção implementation, incluindo o corpo de cada um
+
+    Mantida por compatibilidade; a análise usa iter_methods, que não copia os corpos.
+    """
+    return [
+        dict(method, body=file_content[method['start']:method['end']])
+        for method in iter_methods(file_content, implementation_offset)
+    ]
+
+def iter_methods(file_content, implementation_offset=None, start_offset=None, stop_offset=None):
+    """
+    Percorre os métodos da seção implementation um de cada vez (modo streaming)
+
+    As linhas são lidas diretamente do buffer, sem lista de linhas nem cópia do
+    corpo de cada método: cada método é entregue como um intervalo
+    [start, end) de file_content.
+
+    Args:
+        file_content (str): Conteúdo do arquivo
+        implementation_offset (int, optional): Posição de 'implementation' já
+            conhecida pela pré-varredura
+        start_offset (int, optional): Início de linha a partir do qual procurar
+            métodos (em vez da linha seguinte a 'implementation')
+        stop_offset (int, optional): Não inicia métodos a partir desta posição
+
+    Yields:
+        dict: type, name, args, has_finally, line (base 0), start e end
+    """
+    if start_offset is not None:
+        i = file_content.count('\n', 0, start_offset)
+        pos = start_offset
+    else:
+        if implementation_offset is None:
+            # Encontra a linha "implementation"
+            impl_match = IMPLEMENTATION_RE.search(file_content)
+            if not impl_match:
+                return
+            implementation_offset = impl_match.start()
+        
+        # Começa na linha seguinte à de "implementation"
+        i = file_content.count('\n', 0, implementation_offset) + 1
+        pos = file_content.find('\n', implementation_offset)
+        if pos == -1:
+            return
+        pos += 1
+    size = len(file_content)
+    if stop_offset is None:
+        stop_offset = size
+    
+    def line_end(start):
+        nl = file_content.find('\n', start)
+        return size if nl == -1 else nl + 1
+    
     in_method = False
     method = None
-    body_lines = []
     depth = 0
     in_curly = False
     in_paren_star = False
     
-    i = impl_index + 1
-    while i < len(lines):
-        line = lines[i]
+    while pos < size:
+        end = line_end(pos)
+        line = file_content[pos:end]
         
         if not in_method:
-            # Detecta novo cabeçalho de procedure/function
-            if re.match(r'^\s*(procedure|function)\b', line, flags=re.IGNORECASE):
-                header_lines = [line]
+            if pos >= stop_offset:
+                return
+            # Detecta novo cabeçalho de procedure/function/constructor/destructor
+            if re.match(r'^\s*(procedure|function|constructor|destructor)\b', line, flags=re.IGNORECASE):
+                header_end = end
+                last = line
                 j = i
                 # Acumula linhas até encontrar ';' que fecha o cabeçalho
                 while True:
-                    last = header_lines[-1]
                     # Remove comentários para verificar ';'
                     no_comments = re.sub(r'{[^}]*}', '', last)
                     no_comments = re.sub(r'\(\*.*?\*\)', '', no_comments)
                     no_comments = re.sub(r'//.*', '', no_comments)
                     if ';' in no_comments:
                         break
-                    j += 1
-                    if j >= len(lines):
+                    if header_end >= size:
                         break
-                    header_lines.append(lines[j])
+                    j += 1
+                    next_end = line_end(header_end)
+                    last = file_content[header_end:next_end]
+                    header_end = next_end
                 
-                header_text = ''.join(header_lines).strip()
-                m2 = re.match(r'^\s*(procedure|function)\s+([\w.]+)', header_text, flags=re.IGNORECASE)
+                header_text = file_content[pos:header_end].strip()
+                m2 = re.match(r'^\s*(procedure|function|constructor|destructor)\s+([\w.]+)', header_text, flags=re.IGNORECASE)
                 if not m2:
                     i = j + 1
+                    pos = header_end
                     continue
                 m_type = m2.group(1).lower()
                 name = m2.group(2)
@@ -77,18 +137,17 @@ def extract_methods_from_file(file_content):
                     'type': m_type,
                     'name': name,
                     'args': args,
-                    'body': '',
                     'has_finally': False,
-                    'line': i
+                    'line': i,
+                    'start': pos,
+                    'end': None
                 }
                 in_method = True
-                body_lines = header_lines.copy()
                 depth = 0
                 i = j
+                end = header_end
         
         else:
-            # Adiciona linha ao corpo do método
-            body_lines.append(line)
             code_line = ''
             p = 0
             # Remove comentários e literais para contagem de blocos
@@ -134,6 +193,10 @@ def extract_methods_from_file(file_content):
                 code_line += line[p]
                 p += 1
             
+            # Detecta bloco finally (fora de comentários e literais)
+            if not method['has_finally'] and re.search(r'\bfinally\b', code_line, flags=re.IGNORECASE):
+                method['has_finally'] = True
+            
             # Atualiza profundidade de blocos conforme tokens
             tokens = re.findall(r'\b(begin|case|record|try|end)\b', code_line, flags=re.IGNORECASE)
             closed_method = False
@@ -153,27 +216,93 @@ def extract_methods_from_file(file_content):
                 if closed_method:
                     break
             
-            # Se atingiu o fim do método, finaliza
+            # Se atingiu o fim do método, entrega-o
             if closed_method:
-                method['body'] = ''.join(body_lines)
-                # Detecta bloco finally (fora de comentários)
-                body_text = ''.join(body_lines)
-                stripped = re.sub(r'{[^}]*}', '', body_text)
-                stripped = re.sub(r'\(\*.*?\*\)', '', stripped)
-                stripped = re.sub(r'//.*', '', stripped)
-                if re.search(r'\bfinally\b', stripped, flags=re.IGNORECASE):
-                    method['has_finally'] = True
-                results.append(method)
+                method['end'] = end
+                yield method
                 in_method = False
                 method = None
-                body_lines = []
                 depth = 0
         
+        pos = end
         i += 1
+
+def prepare_content(file_path, unit, include_cache=None, defines=None, preprocessor_cache=None, log_callback=None):
+    """
+    Conteúdo final de uma unidade: inclusões expandidas e ramos inativos descartados
+
+    Args:
+        file_path (str): Caminho do arquivo .pas
+        unit (dict): Metadados da pré-varredura
+        include_cache (IncludeCache, optional): Cache de arquivos {$I} compartilhado
+        defines (iterable, optional): Símbolos definidos
+        preprocessor_cache (PreprocessorCache, optional): Cache por (hash, símbolos)
+        log_callback (callable, optional): Função para log
+
+    Returns:
+        tuple: (conteúdo, posição de 'implementation' ou None, mapa de linhas ou None)
+    """
+    file_content = get_unit_content(unit)
+    implementation_offset = unit['implementation_offset']
     
-    return results
+    # Expandir {$I}/{$INCLUDE}, mantendo o mapa de linhas para o arquivo original
+    line_map = None
+    if has_includes(file_content):
+        if include_cache is None:
+            include_cache = IncludeCache()
+        file_content, line_map = expand_includes(file_content, file_path, include_cache, log_callback)
+        content_hash = None
+        implementation_offset = None
+    else:
+        content_hash = unit.get('hash')
+    
+    # Compilação condicional: mantém só os ramos ativos (posições e linhas preservadas)
+    if defines is not None and has_conditionals(file_content):
+        if preprocessor_cache is None:
+            preprocessor_cache = PreprocessorCache()
+        file_content = preprocessor_cache.preprocess(file_content, predefined_defines(defines), content_hash)
+        implementation_offset = None
+    
+    return file_content, implementation_offset, line_map
+
+def _local_finding(file_path, method, obj):
+    """Objeto local não liberado no formato dos resultados"""
+    # A linha absoluta é a linha do início do método + a linha relativa do objeto
+    # Subtraímos 1 pois a linha relativa já conta o início do método
+    absolute_line = method['line'] + obj['line'] - 1
+    return {
+        'file': file_path,
+        'file_name': os.path.basename(file_path),
+        'method_type': method['type'],
+        'method_name': method['name'],
+        'method_line': method['line'] + 1,
+        'object_name': obj['name'],
+        'object_type': obj['type'],
+        'line': absolute_line + 1,  # Linha absoluta no arquivo
+        'relative_line': obj['line'],  # Mantemos a linha relativa também
+        'initialization': obj['initialization'],
+        'scope': 'local'
+    }
 
-def analyze_pas_file(file_path, log_callback=None, debug=False):
+def _field_finding(file_path, field):
+    """Campo de classe não liberado no formato dos resultados"""
+    constructor = field['method']
+    return {
+        'file': file_path,
+        'file_name': os.path.basename(file_path),
+        'method_type': constructor['type'],
+        'method_name': constructor['name'],
+        'method_line': constructor['line'] + 1,
+        'object_name': field['name'],
+        'object_type': field['type'],
+        'line': field['line'],  # Linha da declaração do campo na classe
+        'relative_line': None,
+        'initialization': f"{field['class']}.{field['name']} ({field['type']})",
+        'scope': 'field'
+    }
+
+def analyze_pas_file(file_path, log_callback=None, debug=False, unit=None, stats=None, include_cache=None,
+                     defines=None, preprocessor_cache=None, method_cache=None, rules=None):
     """
     Analisa um arquivo .pas para encontrar objetos não liberados
     
@@ -181,6 +310,15 @@ def analyze_pas_file(file_path, log_callback=None, debug=False):
         file_path (str): Caminho do arquivo .pas
         log_callback (callable, optional): Função para log
         debug (bool): Modo de depuração
+        unit (dict, optional): Metadados da pré-varredura (evita reabrir o arquivo)
+        stats (dict, optional): Estatísticas da execução, atualizadas com os métodos
+            analisados e ignorados pelo pré-filtro
+        include_cache (IncludeCache, optional): Cache de arquivos {$I} compartilhado
+        defines (iterable, optional): Símbolos definidos; quando informado, os ramos
+            inativos de {$IFDEF}/{$IF} são descartados antes da análise
+        preprocessor_cache (PreprocessorCache, optional): Cache por (hash, símbolos)
+        method_cache (LRUCache, optional): Métodos já extraídos, por hash do conteúdo final
+        rules (MemoryRules, optional): Regras de liberação e posse (padrão: regras internas)
         
     Returns:
         list: Lista de objetos não liberados
@@ -188,16 +326,27 @@ def analyze_pas_file(file_path, log_callback=None, debug=False):
     if log_callback:
         log_callback(f"Analisando: {os.path.basename(file_path)}")
     
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            file_content = f.read()
-    except Exception as e:
-        if log_callback:
-            log_callback(f"Erro ao ler {file_path}: {str(e)}")
-        return []
+    if unit is None:
+        try:
+            unit = prescan_unit(file_path)
+        except Exception as e:
+            if log_callback:
+                log_callback(f"Erro ao ler {file_path}: {str(e)}")
+            return []
+    
+    file_content, implementation_offset, line_map = prepare_content(
+        file_path, unit, include_cache, defines, preprocessor_cache, log_callback
+    )
     
-    # Extrair métodos
-    methods = extract_methods_from_file(file_content)
+    # Extrair métodos (reaproveitados do cache quando o conteúdo não mudou)
+    methods = None
+    if method_cache is not None:
+        methods_key = hashlib.sha1(file_content.encode('utf-8', errors='replace')).hexdigest()
+        methods = method_cache.get(methods_key)
+    if methods is None:
+        methods = list(iter_methods(file_content, implementation_offset))
+        if method_cache is not None:
+            method_cache.put(methods_key, methods)
     
     if debug and log_callback:
         log_callback(f"Encontrados {len(methods)} métodos em {os.path.basename(file_path)}")
@@ -206,39 +355,40 @@ def analyze_pas_file(file_path, log_callback=None, debug=False):
         if methods_with_finally:
             log_callback(f"Métodos com finally: {', '.join(methods_with_finally)}")
     
-    # Criar analisador
-    analyzer = DelphiMemoryAnalyzer(debug)
+    # Criar analisador (padrões executados uma vez sobre todo o arquivo)
+    analyzer = FileMemoryAnalyzer(debug, rules)
     unreleased_objects = []
     
-    # Analisar cada método
-    for method in methods:
-        results = analyzer.find_unreleased_objects(method['body'], method['name'])
+    # Analisar todos os métodos de uma só vez
+    for method, obj in analyzer.find_unreleased_objects_in_file(file_content, methods):
+        item = _local_finding(file_path, method, obj)
+        unreleased_objects.append(item)
         
-        if results:
-            for obj in results:
-                # Calcular a linha absoluta do objeto no arquivo
-                method_start_line = method['line']
-                object_relative_line = obj['line']
-                
-                # A linha absoluta é a linha do início do método + a linha relativa do objeto
-                # Subtraímos 1 pois a linha relativa já conta o início do método
-                absolute_line = method_start_line + object_relative_line - 1
-                
-                unreleased_objects.append({
-                    'file': file_path,
-                    'file_name': os.path.basename(file_path),
-                    'method_type': method['type'],
-                    'method_name': method['name'],
-                    'method_line': method['line'] + 1,
-                    'object_name': obj['name'],
-                    'object_type': obj['type'],
-                    'line': absolute_line + 1,  # Linha absoluta no arquivo
-                    'relative_line': object_relative_line,  # Mantemos a linha relativa também
-                    'initialization': obj['initialization']
-                })
-                
-                if debug and log_callback:
-                    log_callback(f"Objeto {obj['name']} não liberado em {method['name']} (linha {absolute_line})")
+        if debug and log_callback:
+            log_callback(f"Objeto {obj['name']} não liberado em {method['name']} (linha {item['line'] - 1})")
+    
+    # Campos de classe criados no construtor e não liberados no destrutor
+    field_analyzer = ClassFieldAnalyzer(debug, rules)
+    for field in field_analyzer.find_unreleased_fields(file_content, methods):
+        unreleased_objects.append(_field_finding(file_path, field))
+        
+        if debug and log_callback:
+            log_callback(f"Campo {field['class']}.{field['name']} não liberado no destrutor (linha {field['line']})")
+    
+    # Linhas do conteúdo expandido -> arquivo e linha de origem
+    if line_map:
+        for item in unreleased_objects:
+            source_file, item['line'] = map_line(line_map, item['line'])
+            _, item['method_line'] = map_line(line_map, item['method_line'])
+            if source_file != file_path:
+                item['source_file'] = source_file
+    
+    if stats is not None:
+        for key, value in analyzer.stats.items():
+            stats[key] = stats.get(key, 0) + value
+    
+    if debug and log_callback:
+        log_callback(f"Métodos analisados: {analyzer.stats['methods_analyzed']}, ignorados pelo pré-filtro: {analyzer.stats['methods_skipped']}")
     
     # Resumo
     if log_callback:
@@ -249,37 +399,478 @@ def analyze_pas_file(file_path, log_callback=None, debug=False):
     
     return unreleased_objects
 
-def analyze_pas_files(pas_files, log_callback=None, progress_callback=None):
+def method_part_bounds(file_content, implementation_offset, count):
+    """
+    Divide a seção implementation em partes com tamanho parecido
+
+    Cada fronteira é o início de uma linha de cabeçalho de método na coluna 0
+    (procedure/function/constructor/destructor), de modo que nenhum método
+    fica dividido entre duas partes.
+
+    Returns:
+        list: count + 1 posições (a primeira é o início da seção, a última o fim do arquivo);
+            partes podem ficar vazias quando não há cabeçalhos suficientes
+    """
+    if implementation_offset is None:
+        impl_match = IMPLEMENTATION_RE.search(file_content)
+        implementation_offset = impl_match.start() if impl_match else 0
+    first_header = METHOD_HEADER_RE.search(file_content, implementation_offset)
+    bounds = [implementation_offset]
+    size = len(file_content)
+    for k in range(1, count):
+        target = max(implementation_offset + (size - implementation_offset) * k // count, bounds[-1])
+        header = METHOD_HEADER_RE.search(file_content, target)
+        if header and first_header and header.start() > first_header.start():
+            bounds.append(header.start())
+        else:
+            bounds.append(size)
+    bounds.append(size)
+    return bounds
+
+def analyze_pas_file_part(file_path, unit, part, include_cache=None, defines=None, preprocessor_cache=None,
+                          rules=None, stats=None):
+    """
+    Analisa uma parte dos métodos de um arquivo grande (executada em paralelo)
+
+    Os objetos locais são resolvidos na própria parte; os campos de classe
+    dependem de construtores e destrutores de outras partes, então cada parte
+    devolve os eventos coletados e merge_file_parts combina tudo. Arquivos com
+    {$I} não são divididos: a parte 0 analisa o arquivo inteiro.
+
+    Args:
+        file_path (str): Caminho do arquivo .pas
+        unit (dict): Metadados da pré-varredura, com o conteúdo
+        part (tuple): (índice, total de partes)
+
+    Returns:
+        dict: {'results', 'complete', 'classes', 'field_events'}
+    """
+    index, count = part
+    if has_includes(get_unit_content(unit)):
+        results = []
+        if index == 0:
+            results = analyze_pas_file(
+                file_path, unit=unit, stats=stats, include_cache=include_cache, defines=defines,
+                preprocessor_cache=preprocessor_cache, rules=rules
+            )
+        return {'results': results, 'complete': True, 'classes': None, 'field_events': {}}
+    
+    file_content, implementation_offset, _ = prepare_content(
+        file_path, unit, include_cache, defines, preprocessor_cache
+    )
+    bounds = method_part_bounds(file_content, implementation_offset, count)
+    if index == 0:
+        methods = list(iter_methods(file_content, implementation_offset, stop_offset=bounds[1]))
+    else:
+        methods = list(iter_methods(file_content, start_offset=bounds[index], stop_offset=bounds[index + 1]))
+    
+    analyzer = FileMemoryAnalyzer(rules=rules)
+    results = [
+        _local_finding(file_path, method, obj)
+        for method, obj in analyzer.find_unreleased_objects_in_file(file_content, methods)
+    ]
+    if stats is not None:
+        for key, value in analyzer.stats.items():
+            stats[key] = stats.get(key, 0) + value
+    
+    field_analyzer = ClassFieldAnalyzer(rules=rules)
+    classes = None
+    if index == 0 and methods:
+        # As declarações de classe ficam antes do primeiro método
+        classes = field_analyzer._find_class_fields(file_content, methods[0]['start'])
+    return {
+        'results': results,
+        'complete': False,
+        'classes': classes,
+        'field_events': field_analyzer.collect_field_events(file_content, methods)
+    }
+
+def merge_file_parts(file_path, parts, rules=None):
+    """
+    Combina as partes de analyze_pas_file_part no mesmo resultado de analyze_pas_file
+
+    Args:
+        file_path (str): Caminho do arquivo .pas
+        parts (list): Resultados das partes, em ordem
+        rules (MemoryRules, optional): Regras de liberação e posse
+
+    Returns:
+        list: Objetos não liberados (locais e depois campos de classe)
+    """
+    for part in parts:
+        if part['complete']:
+            return part['results']
+    
+    results = [item for part in parts for item in part['results']]
+    classes = parts[0]['classes']
+    if classes:
+        events = {}
+        for part in parts:
+            for class_key, entry in part['field_events'].items():
+                merged = events.setdefault(class_key, {'created': [], 'released': set()})
+                merged['created'].extend(entry['created'])
+                merged['released'].update(entry['released'])
+        for field in ClassFieldAnalyzer(rules=rules).resolve_fields(classes, events):
+            results.append(_field_finding(file_path, field))
+    return results
+
+def analyze_pas_files(pas_files, log_callback=None, progress_callback=None, stats=None, search_paths=None,
+                      defines=None, io_workers=DEFAULT_IO_WORKERS, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES,
+                      rules=None, dedupe=True, run_cache=None, workers=1, split_large=False,
+                      results_callback=None, journal=None, source=None, preprocessor_cache=None):
     """
     Analisa múltiplos arquivos .pas
     
     Args:
-        pas_files (list): Lista de caminhos para arquivos .pas
+        pas_files (list | iterable): Lista de caminhos para arquivos .pas; um iterável
+            (ex.: DirectoryScan) é analisado à medida que entrega os caminhos
         log_callback (callable, optional): Função para log
         progress_callback (callable, optional): Função para atualizar progresso
-        
+        stats (dict, optional): Recebe as estatísticas da execução
+        search_paths (list, optional): Diretórios de busca para arquivos {$I}
+        defines (iterable, optional): Símbolos da configuração ativa (DCC_Define)
+        io_workers (int): Threads de leitura antecipada dos arquivos (0 = sequencial)
+        max_buffer_bytes (int): Limite de memória para arquivos lidos antecipadamente
+        rules (MemoryRules, optional): Regras de liberação e posse (padrão: regras internas)
+        dedupe (bool): Analisa uma única vez as unidades com conteúdo idêntico; as
+            cópias recebem os mesmos resultados, marcados com 'duplicate_of'
+        run_cache (RunCache, optional): Resultados da execução anterior; só as
+            unidades alteradas e as que dependem de interfaces alteradas são reanalisadas
+            (com entrada em fluxo, as alteradas são analisadas durante a varredura e as
+            demais são decididas no fim dela)
+        workers (int): Processos de análise; com mais de um, os arquivos são
+            agendados do mais caro para o mais barato (tamanho e tempos anteriores)
+        split_large (bool): Divide arquivos muito grandes entre processos, nas
+            fronteiras dos métodos
+        results_callback (callable, optional): Recebe (arquivo, resultados) assim que
+            cada arquivo termina (inclusive os reaproveitados do cache), para exibir
+            os resultados durante a análise
+        journal (RunJournal, optional): Diário da execução; cada arquivo concluído é
+            gravado ao terminar, e os já concluídos em uma execução interrompida
+            (com o mesmo conteúdo) não são reanalisados
+        source (SourceArchive, optional): Arquivo compactado de onde os arquivos
+            (membros) são lidos, em sequência e sem extração
+        preprocessor_cache (PreprocessorCache, optional): Cache do pré-processamento
+            mantido entre chamadas (ex.: várias configurações do mesmo projeto); com
+            mais de um processo, cada processo usa um cache próprio com o mesmo limite
+
     Returns:
         list: Lista de objetos não liberados
     """
-    all_results = []
+    # Entrada em fluxo: agendamento em processos e arquivos compactados
+    # precisam da lista completa
+    streaming = not isinstance(pas_files, (list, tuple))
+    if streaming and (workers > 1 or source is not None):
+        pas_files = list(pas_files)
+        streaming = False
+    if stats is None:
+        stats = {}
+    if preprocessor_cache is None:
+        preprocessor_cache = PreprocessorCache()
+    stats.setdefault('methods_analyzed', 0)
+    stats.setdefault('methods_skipped', 0)
+    stats.setdefault('duplicates_skipped', 0)
+    run = _AnalysisRun(stats, dedupe, run_cache, journal, log_callback, progress_callback, results_callback)
+    
+    files_to_analyze = pas_files
+    discovered = []
+    if streaming:
+        def record_discovered(paths):
+            for path in paths:
+                discovered.append(path)
+                yield path
+        files_to_analyze = record_discovered(pas_files)
+
+    # Cache entre execuções: as unidades inalteradas reaproveitam os resultados
+    timings = {}
+    if run_cache is not None and streaming:
+        # Alteradas são analisadas enquanto a varredura continua; as demais no fim
+        stats['files_cached'] = 0
+
+        def reuse_cached(file_path, results):
+            stats['files_cached'] += 1
+            run.results_by_file[file_path] = results
+            if results_callback:
+                results_callback(file_path, results)
+        files_to_analyze = run_cache.plan_stream(files_to_analyze, reuse_cached, log_callback=log_callback)
+    elif run_cache is not None:
+        files_to_analyze, run.results_by_file = run_cache.plan(pas_files, log_callback=log_callback)
+        stats['files_cached'] = len(run.results_by_file)
+        timings = run_cache.timings()
+        if results_callback:
+            for file_path, results in run.results_by_file.items():
+                results_callback(file_path, results)
+    run.total = None if streaming else len(files_to_analyze)
+
+    def read_units(file_paths):
+        """Pré-varredura dos arquivos no disco ou dos membros do arquivo compactado"""
+        if source is not None:
+            return source.prescan_members(file_paths, log_callback, max_buffer_bytes)
+        return prescan_files(file_paths, log_callback, io_workers, max_buffer_bytes)
+
+    def skip_resumed(paths):
+        stats['files_resumed'] = 0
+        for path in paths:
+            entry = journal.resumable(path)
+            if entry is None:
+                yield path
+            else:
+                stats['files_resumed'] += 1
+                run.register(path, dict(entry['unit']), entry['results'], entry['seconds'], entry['duplicate_of'])
+
+    # Arquivos concluídos em uma execução interrompida
+    if journal is not None and streaming:
+        files_to_analyze = skip_resumed(files_to_analyze)
+    elif journal is not None:
+        files_to_analyze, resumed = journal.plan(files_to_analyze, log_callback=log_callback)
+        stats['files_resumed'] = len(resumed)
+        run.total = len(files_to_analyze)
+        for file_path, entry in resumed.items():
+            run.register(file_path, dict(entry['unit']), entry['results'], entry['seconds'], entry['duplicate_of'])
+    
+    if workers <= 1:
+        # Arquivos de inclusão são lidos uma única vez para todas as unidades
+        _analyze_sequential(
+            run, read_units(files_to_analyze), IncludeCache(search_paths, source=source),
+            defines, preprocessor_cache, rules
+        )
+    else:
+        # Arquivos de inclusão varridos por um processo ficam em disco para os demais
+        with tempfile.TemporaryDirectory(prefix='delphi_includes_') as include_cache_dir:
+            _analyze_in_processes(
+                run, files_to_analyze, read_units, workers, timings, split_large,
+                size_of=source.size if source is not None else os.path.getsize,
+                worker_args=(search_paths, defines, rules, source, preprocessor_cache.max_entries,
+                             include_cache_dir),
+                rules=rules
+            )
+    
+    if streaming:
+        pas_files = sorted(discovered)
     total_files = len(pas_files)
+    all_results = [item for file_path in pas_files for item in run.results_by_file.get(file_path, [])]
+    if run_cache is not None:
+        run_cache.prune(pas_files)
+        run_cache.save()
+    
+    # Resumo final
+    if log_callback:
+        log_callback(f"Análise concluída. Encontrados {len(all_results)} objetos não liberados em {total_files} arquivos.")
+        log_callback(f"Métodos analisados: {stats['methods_analyzed']}, ignorados pelo pré-filtro: {stats['methods_skipped']}")
+        if stats['duplicates_skipped']:
+            log_callback(f"Arquivos idênticos reaproveitados: {stats['duplicates_skipped']}")
     
-    # Analisar cada arquivo
-    for i, file_path in enumerate(pas_files):
+    return all_results
+
+class _AnalysisRun:
+    """
+    Estado de uma execução de analyze_pas_files
+
+    Guarda os resultados por arquivo e por hash do conteúdo (para as cópias
+    idênticas) e repassa cada arquivo concluído ao cache, ao diário, à
+    exibição e ao progresso, tanto na análise sequencial quanto em processos.
+    """
+
+    def __init__(self, stats, dedupe=True, run_cache=None, journal=None, log_callback=None,
+                 progress_callback=None, results_callback=None):
+        self.stats = stats
+        self.dedupe = dedupe
+        self.run_cache = run_cache
+        self.journal = journal
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.results_callback = results_callback
+        self.results_by_file = {}
+        # Resultados por hash do conteúdo: {hash: {'path', 'results', 'uses_includes'}}
+        self.analyzed = {}
+        self.total = None
+        self.done = 0
+
+    def advance(self):
+        self.done += 1
+        if self.progress_callback and self.total:
+            self.progress_callback(self.done / self.total * 100)
+
+    def find_original(self, file_path, unit):
+        """Cópia já analisada com o mesmo conteúdo (None se não houver)"""
+        original = self.analyzed.get(unit['hash']) if self.dedupe else None
+        if original is not None and original['uses_includes'] \
+                and os.path.dirname(original['path']) != os.path.dirname(file_path):
+            # {$I} relativos podem resolver para outros arquivos em outra pasta
+            return None
+        return original
+
+    def register(self, file_path, unit, results, seconds=None, duplicate_of=None):
+        self.results_by_file[file_path] = results
+        if self.dedupe and duplicate_of is None and unit['hash'] not in self.analyzed:
+            self.analyzed[unit['hash']] = {'path': file_path, 'results': results, 'uses_includes': unit['uses_includes']}
+        if self.run_cache is not None:
+            self.run_cache.update(file_path, unit, results, seconds)
+        if self.results_callback:
+            self.results_callback(file_path, results)
+
+    def finish(self, file_path, unit, results, seconds=None, duplicate_of=None):
+        self.register(file_path, unit, results, seconds, duplicate_of)
+        if self.journal is not None:
+            self.journal.record(file_path, unit, results, seconds, duplicate_of)
+        self.advance()
+
+    def reuse(self, file_path, unit, original):
+        """Repete os resultados da cópia já analisada para este caminho"""
+        self.stats['duplicates_skipped'] += 1
+        if self.log_callback:
+            self.log_callback(f"Conteúdo idêntico a {original['path']}: resultados reaproveitados")
+        unit['uses_includes'] = original['uses_includes']
+        self.finish(file_path, unit, [
+            dict(item, file=file_path, file_name=os.path.basename(file_path), duplicate_of=original['path'])
+            for item in original['results']
+        ], duplicate_of=original['path'])
+
+def _analyze_sequential(run, units, include_cache, defines, preprocessor_cache, rules):
+    """Analisa os arquivos no próprio processo, na ordem da pré-varredura"""
+    for file_path, unit in units:
         # Log de progresso
-        if log_callback:
-            log_callback(f"Analisando arquivo {i+1}/{total_files}: {os.path.basename(file_path)}")
+        if run.log_callback:
+            total = f"/{run.total}" if run.total is not None else ''
+            run.log_callback(f"Analisando arquivo {run.done+1}{total}: {os.path.basename(file_path)}")
         
-        # Analisar arquivo
-        results = analyze_pas_file(file_path, log_callback)
-        all_results.extend(results)
+        if unit is None:
+            run.advance()
+            continue
         
-        # Atualizar progresso
-        if progress_callback:
-            progress_callback((i + 1) / total_files * 100)
+        # Cópias idênticas reaproveitam os resultados da primeira
+        original = run.find_original(file_path, unit)
+        if original is not None:
+            run.reuse(file_path, unit, original)
+            continue
+        
+        started = time.perf_counter()
+        results = analyze_pas_file(
+            file_path, run.log_callback, unit=unit, stats=run.stats, include_cache=include_cache,
+            defines=defines, preprocessor_cache=preprocessor_cache, rules=rules
+        )
+        unit['uses_includes'] = has_includes(get_unit_content(unit))
+        run.finish(file_path, unit, results, time.perf_counter() - started)
+
+def _analyze_in_processes(run, file_paths, read_units, workers, timings, split_large, size_of, worker_args, rules):
+    """
+    Analisa os arquivos em vários processos, das tarefas mais caras para as mais baratas
+
+    Args:
+        run (_AnalysisRun): Estado da execução
+        file_paths (list): Arquivos a analisar
+        read_units (callable): Pré-varredura de uma lista de arquivos
+        workers (int): Processos de análise
+        timings (dict): Tempos de execuções anteriores
+        split_large (bool): Divide arquivos muito grandes nas fronteiras dos métodos
+        size_of (callable): Função que retorna o tamanho de um arquivo
+        worker_args (tuple): Argumentos de _init_worker
+        rules (MemoryRules, optional): Regras usadas para combinar as partes
+    """
+    tasks = plan_tasks(file_paths, workers, timings, split_large, size_of)
+    makespan, ideal = estimate_makespan(tasks, workers)
+    if run.log_callback:
+        run.log_callback(f"Agendamento: {len(tasks)} tarefas em {workers} processos, "
+                         f"estimativa {makespan:.1f}s (ideal {ideal:.1f}s)")
+    tasks_by_file = defaultdict(list)
+    for task in tasks:
+        tasks_by_file[task['path']].append(task)
     
-    # Resumo final
-    if log_callback:
-        log_callback(f"Análise concluída. Encontrados {len(all_results)} objetos não liberados em {total_files} arquivos.")
+    running = {}                 # future -> arquivo
+    partial = {}                 # arquivo -> partes já concluídas
+    waiting = defaultdict(list)  # hash -> cópias aguardando a análise do original
+    in_flight = set()            # hashes em análise
+    
+    def submit(executor, file_path, unit):
+        content = get_unit_content(unit)
+        unit['uses_includes'] = has_includes(content)
+        worker_unit = dict(unit, raw=None)
+        # O processo principal guarda só os metadados
+        metadata = {key: value for key, value in unit.items() if key not in ('content', 'raw')}
+        partial[file_path] = {'unit': metadata, 'results': {}, 'remaining': len(tasks_by_file[file_path]), 'seconds': 0.0}
+        for task in tasks_by_file[file_path]:
+            future = executor.submit(_analyze_task, file_path, worker_unit, (task['part'], task['parts']))
+            running[future] = file_path
     
-    return all_results 
\ No newline at end of file
+    def collect(executor, future):
+        file_path = running.pop(future)
+        part_index, result, part_stats, seconds = future.result()
+        for key, value in part_stats.items():
+            run.stats[key] = run.stats.get(key, 0) + value
+        entry = partial[file_path]
+        entry['results'][part_index] = result
+        entry['seconds'] += seconds
+        entry['remaining'] -= 1
+        if entry['remaining']:
+            return
+        del partial[file_path]
+        if len(entry['results']) > 1:
+            results = merge_file_parts(file_path, [entry['results'][i] for i in sorted(entry['results'])], rules)
+        else:
+            results = entry['results'][0]
+        unit = entry['unit']
+        run.finish(file_path, unit, results, entry['seconds'])
+        in_flight.discard(unit['hash'])
+        for duplicate_path, duplicate_unit in waiting.pop(unit['hash'], []):
+            original = run.find_original(duplicate_path, duplicate_unit)
+            if original is not None:
+                run.reuse(duplicate_path, duplicate_unit, original)
+            else:
+                submit(executor, duplicate_path, duplicate_unit)
+    
+    ordered_files = list(tasks_by_file)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=worker_args) as executor:
+        for file_path, unit in read_units(ordered_files):
+            if run.log_callback:
+                run.log_callback(f"Analisando arquivo: {os.path.basename(file_path)}")
+            if unit is None:
+                run.advance()
+                continue
+            original = run.find_original(file_path, unit)
+            if original is not None:
+                run.reuse(file_path, unit, original)
+            elif run.dedupe and unit['hash'] in in_flight:
+                waiting[unit['hash']].append((file_path, unit))
+            else:
+                in_flight.add(unit['hash'])
+                submit(executor, file_path, unit)
+            
+            # Limita as tarefas pendentes (e os textos em memória)
+            while len(running) >= workers * 2:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(executor, future)
+        
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(executor, future)
+
+# Estado de cada processo de análise (caches próprios, criados uma vez por processo)
+_worker_state = {}
+
+def _init_worker(search_paths, defines, rules, source=None, max_preprocessed=DEFAULT_MAX_ENTRIES,
+                 include_cache_dir=None):
+    _worker_state.update({
+        'include_cache': IncludeCache(search_paths, cache_dir=include_cache_dir, source=source),
+        'preprocessor_cache': PreprocessorCache(max_preprocessed),
+        'defines': defines,
+        'rules': rules
+    })
+
+def _analyze_task(file_path, unit, part):
+    """Analisa um arquivo (ou uma parte dos seus métodos) em um processo de análise"""
+    stats = {}
+    started = time.perf_counter()
+    if part[1] > 1:
+        result = analyze_pas_file_part(
+            file_path, unit, part, include_cache=_worker_state['include_cache'], defines=_worker_state['defines'],
+            preprocessor_cache=_worker_state['preprocessor_cache'], rules=_worker_state['rules'], stats=stats
+        )
+    else:
+        result = analyze_pas_file(
+            file_path, unit=unit, stats=stats,
+            include_cache=_worker_state['include_cache'], defines=_worker_state['defines'],
+            preprocessor_cache=_worker_state['preprocessor_cache'], rules=_worker_state['rules']
+        )
+    return part[0], result, stats, time.perf_counter() - started
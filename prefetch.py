@@ -0,0 +1,74 @@
+"""
+Leitura antecipada de arquivos em um pool de threads
+Sobrepõe a E/S (por exemplo em compartilhamentos de rede) com a análise
+"""
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+# Valores padrão da leitura antecipada
+DEFAULT_IO_WORKERS = 4
+DEFAULT_MAX_BUFFER_BYTES = 64 * 1024 * 1024
+
+def prefetch(items, load, workers=DEFAULT_IO_WORKERS, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES, size_of=None):
+    """
+    Carrega os próximos itens em paralelo enquanto os anteriores são consumidos
+
+    A ordem de entrega é a mesma de items. Novas leituras só são disparadas
+    enquanto os buffers em andamento e ainda não consumidos somarem menos que
+    max_buffer_bytes; leituras ainda não concluídas são estimadas pelo tamanho
+    médio dos itens já carregados.
+
+    Args:
+        items (iterable): Itens a carregar (ex.: caminhos de arquivos)
+        load (callable): Função que carrega um item
+        workers (int): Número de threads de leitura
+        max_buffer_bytes (int): Limite de memória para buffers em espera
+        size_of (callable, optional): Tamanho em bytes de um resultado de load
+
+    Yields:
+        tuple: (item, resultado, exceção) - exceção é None quando a leitura deu certo
+    """
+    items = iter(items)
+    pending = collections.deque()
+    totals = {'bytes': 0, 'count': 0}
+
+    def loaded(future):
+        if size_of is not None and future.exception() is None:
+            future.size = size_of(future.result())
+        else:
+            future.size = 0
+
+    def pending_allowed():
+        # Antes da primeira leitura concluída não há estimativa de tamanho
+        return len(pending) < (workers * 2 if totals['count'] else workers)
+
+    def buffered_bytes():
+        average = totals['bytes'] / totals['count'] if totals['count'] else 0
+        return sum(getattr(f, 'size', average) for _, f in pending)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        def fill():
+            while pending_allowed() and (not pending or buffered_bytes() < max_buffer_bytes):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                future = executor.submit(load, item)
+                future.add_done_callback(loaded)
+                pending.append((item, future))
+
+        fill()
+        while pending:
+            item, future = pending.popleft()
+            try:
+                result = future.result()
+                error = None
+                totals['bytes'] += getattr(future, 'size', 0)
+                totals['count'] += 1
+            except Exception as e:
+                result = None
+                error = e
+            fill()
+            yield item, result, error
+            result = None
@@ -0,0 +1,316 @@
+"""
+Pré-processamento de compilação condicional ({$IFDEF}, {$IFNDEF}, {$IF}, ...)
+Mantém apenas os ramos ativos para um conjunto de símbolos definidos
+"""
+
+import hashlib
+import re
+
+from utils import LRUCache
+
+# Símbolos predefinidos pelo compilador Delphi em qualquer plataforma
+DEFAULT_DEFINES = frozenset({'CONDITIONALEXPRESSIONS', 'UNICODE'})
+
+# Símbolos predefinidos por plataforma de destino (<Platform> do .dproj)
+PLATFORM_DEFINES = {
+    'win32': frozenset({'MSWINDOWS', 'WIN32', 'CPUX86', 'CPU32BITS'}),
+    'win64': frozenset({'MSWINDOWS', 'WIN64', 'CPUX64', 'CPU64BITS'}),
+    'osx64': frozenset({'MACOS', 'MACOS64', 'POSIX', 'POSIX64', 'CPUX64', 'CPU64BITS'}),
+    'osxarm64': frozenset({'MACOS', 'MACOS64', 'POSIX', 'POSIX64', 'CPUARM', 'CPUARM64', 'CPU64BITS'}),
+    'iosdevice64': frozenset({'IOS', 'IOS64', 'MACOS', 'MACOS64', 'POSIX', 'POSIX64', 'CPUARM', 'CPUARM64', 'CPU64BITS'}),
+    'android': frozenset({'ANDROID', 'ANDROID32', 'LINUX', 'POSIX', 'POSIX32', 'CPUARM', 'CPUARM32', 'CPU32BITS'}),
+    'android64': frozenset({'ANDROID', 'ANDROID64', 'LINUX', 'LINUX64', 'POSIX', 'POSIX64', 'CPUARM', 'CPUARM64', 'CPU64BITS'}),
+    'linux64': frozenset({'LINUX', 'LINUX64', 'POSIX', 'POSIX64', 'CPUX64', 'CPU64BITS'}),
+}
+
+# Plataforma padrão do compilador quando o .dproj não informa (ou não há projeto)
+DEFAULT_PLATFORM = 'Win32'
+
+# Qualquer um destes indica que os símbolos já trazem a plataforma de destino
+PLATFORM_SYMBOLS = frozenset().union(*PLATFORM_DEFINES.values())
+
+# Constantes usadas em expressões {$IF} (Delphi 12 Athens)
+COMPILER_CONSTANTS = {'COMPILERVERSION': 36.0, 'RTLVERSION': 36.0}
+
+# Comentários, literais de string e diretivas; só as diretivas interessam,
+# os demais tokens existem para que diretivas dentro deles sejam ignoradas
+LEX_RE = re.compile(r"//[^\n]*|\(\*.*?\*\)|'[^'\n]*'|\{\$([^}]*)\}|\{[^}]*\}", re.DOTALL)
+DIRECTIVE_RE = re.compile(r'^\s*(\w+)\s*(.*?)\s*$', re.DOTALL)
+EXPR_TOKEN_RE = re.compile(r"\s*(?:(defined|declared)\s*\(\s*(\w+)\s*\)|(<>|<=|>=|=|<|>|\(|\))|(\d+(?:\.\d+)?)|(\w+))", re.IGNORECASE)
+
+# Entradas mantidas pelo cache (arquivos varridos e resultados por conjunto de símbolos)
+DEFAULT_MAX_ENTRIES = 2000
+
+CONDITIONAL_DIRECTIVES = {'IFDEF', 'IFNDEF', 'IF', 'IFOPT', 'ELSE', 'ELSEIF', 'ENDIF', 'IFEND', 'DEFINE', 'UNDEF'}
+
+def platform_defines(platform):
+    """Símbolos predefinidos para a plataforma (vazio para uma plataforma desconhecida)"""
+    return PLATFORM_DEFINES.get((platform or DEFAULT_PLATFORM).lower(), frozenset())
+
+def predefined_defines(defines):
+    """
+    Símbolos ativos na compilação: os informados mais os predefinidos pelo compilador
+
+    Os símbolos de um .dproj já trazem os da sua plataforma (get_project_defines); só
+    quando nenhum símbolo de plataforma foi informado vale o destino padrão, Win32.
+    """
+    symbols = DEFAULT_DEFINES | {d.upper() for d in defines}
+    if not symbols & PLATFORM_SYMBOLS:
+        symbols |= platform_defines(DEFAULT_PLATFORM)
+    return symbols
+
+def has_conditionals(content):
+    """Verifica rapidamente se o conteúdo tem diretivas condicionais"""
+    lowered = content.lower()
+    return '{$if' in lowered or '{$define' in lowered or '{$undef' in lowered
+
+def lex_directives(content):
+    """
+    Varre o conteúdo uma vez e devolve as diretivas condicionais (independe dos símbolos)
+
+    Args:
+        content (str): Código fonte
+
+    Returns:
+        list: Tuplas (início, fim, diretiva em maiúsculas, argumento)
+    """
+    directives = []
+    for match in LEX_RE.finditer(content):
+        if match.group(1) is None:
+            continue
+        directive_match = DIRECTIVE_RE.match(match.group(1))
+        if not directive_match:
+            continue
+        name = directive_match.group(1).upper()
+        if name in CONDITIONAL_DIRECTIVES:
+            directives.append((match.start(), match.end(), name, directive_match.group(2)))
+    return directives
+
+COMPARISONS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b
+}
+
+def _tokenize_expression(expression, defines):
+    """Tokens da expressão: ('value', valor), ('op', operador) ou ('word', and/or/not)"""
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        token = EXPR_TOKEN_RE.match(expression, pos)
+        if not token or token.end() == pos:
+            raise ValueError(f"Expressão não reconhecida: {expression}")
+        pos = token.end()
+        function, symbol, operator, number, word = token.groups()
+        if function:
+            tokens.append(('value', function.lower() == 'declared' or symbol.upper() in defines))
+        elif operator:
+            tokens.append(('op', operator))
+        elif number:
+            tokens.append(('value', float(number)))
+        elif word.lower() in ('and', 'or', 'not'):
+            tokens.append(('word', word.lower()))
+        elif word.lower() in ('true', 'false'):
+            tokens.append(('value', word.lower() == 'true'))
+        else:
+            tokens.append(('value', COMPILER_CONSTANTS.get(word.upper(), 0)))
+    return tokens
+
+def evaluate_expression(expression, defines):
+    """
+    Avalia a expressão de uma diretiva {$IF}/{$ELSEIF}
+
+    Suporta Defined(), Declared(), not/and/or, parênteses, comparações e as
+    constantes de COMPILER_CONSTANTS, com um avaliador próprio (o texto do
+    fonte nunca é executado). Expressões não reconhecidas são consideradas
+    verdadeiras, para que o código não deixe de ser analisado.
+    """
+    try:
+        tokens = _tokenize_expression(expression, defines)
+    except ValueError:
+        return True
+    state = {'pos': 0}
+
+    def peek():
+        return tokens[state['pos']] if state['pos'] < len(tokens) else (None, None)
+
+    def take():
+        token = peek()
+        state['pos'] += 1
+        return token
+
+    def parse_or():
+        value = parse_and()
+        while peek() == ('word', 'or'):
+            take()
+            right = parse_and()
+            value = bool(value) or bool(right)
+        return value
+
+    def parse_and():
+        value = parse_not()
+        while peek() == ('word', 'and'):
+            take()
+            right = parse_not()
+            value = bool(value) and bool(right)
+        return value
+
+    def parse_not():
+        if peek() == ('word', 'not'):
+            take()
+            return not parse_not()
+        return parse_comparison()
+
+    def parse_comparison():
+        value = parse_primary()
+        kind, operator = peek()
+        if kind == 'op' and operator in COMPARISONS:
+            take()
+            value = COMPARISONS[operator](value, parse_primary())
+        return value
+
+    def parse_primary():
+        kind, value = take()
+        if kind == 'value':
+            return value
+        if (kind, value) == ('op', '('):
+            result = parse_or()
+            if take() != ('op', ')'):
+                raise ValueError("')' esperado")
+            return result
+        raise ValueError(f"Token inesperado: {value}")
+
+    try:
+        result = parse_or()
+        if state['pos'] != len(tokens):
+            return True
+        return bool(result)
+    except (ValueError, TypeError):
+        return True
+
+def apply_directives(content, directives, defines):
+    """
+    Apaga os ramos inativos, preservando quebras de linha e posições
+
+    Args:
+        content (str): Código fonte
+        directives (list): Resultado de lex_directives
+        defines (iterable): Símbolos definidos
+
+    Returns:
+        str: Código com os ramos inativos substituídos por espaços
+    """
+    defines = {d.upper() for d in defines}
+    # Pilha de (ramo atual ativo, algum ramo já foi ativo, bloco externo ativo)
+    stack = []
+    active = True
+    inactive_start = None
+    out = []
+    pos = 0
+
+    for start, end, name, argument in directives:
+        was_active = active
+        if name in ('IFDEF', 'IFNDEF', 'IF', 'IFOPT'):
+            if name == 'IFDEF':
+                condition = argument.split()[0].upper() in defines if argument else False
+            elif name == 'IFNDEF':
+                condition = argument.split()[0].upper() not in defines if argument else True
+            elif name == 'IF':
+                condition = evaluate_expression(argument, defines)
+            else:
+                condition = True  # {$IFOPT} depende de opções do compilador
+            stack.append((active and condition, condition, active))
+            active = active and condition
+        elif name in ('ELSEIF', 'ELSE'):
+            if not stack:
+                continue
+            _, taken, outer = stack[-1]
+            if name == 'ELSEIF':
+                condition = not taken and evaluate_expression(argument, defines)
+            else:
+                condition = not taken
+            stack[-1] = (outer and condition, taken or condition, outer)
+            active = outer and condition
+        elif name in ('ENDIF', 'IFEND'):
+            if not stack:
+                continue
+            _, _, outer = stack.pop()
+            active = outer
+        elif active and argument:
+            symbol = argument.split()[0].upper()
+            if name == 'DEFINE':
+                defines.add(symbol)
+            else:
+                defines.discard(symbol)
+
+        # A própria diretiva é mantida (é tratada como comentário pelas etapas seguintes)
+        if was_active and not active:
+            out.append(content[pos:end])
+            pos = end
+            inactive_start = end
+        elif not was_active and active:
+            out.append(_blank(content[inactive_start:start]))
+            out.append(content[start:end])
+            pos = end
+            inactive_start = None
+
+    if inactive_start is not None:
+        out.append(_blank(content[inactive_start:]))
+    else:
+        out.append(content[pos:])
+    return ''.join(out)
+
+def _blank(text):
+    """Substitui o texto por espaços, mantendo as quebras de linha"""
+    return re.sub(r'[^\n]', ' ', text)
+
+class PreprocessorCache:
+    """
+    Cache do pré-processamento por (hash do arquivo, conjunto de símbolos)
+
+    A varredura das diretivas é feita uma única vez por hash; cada conjunto de
+    símbolos (por exemplo Debug e Release) só reavalia as diretivas já varridas.
+    As entradas usadas há mais tempo são descartadas (LRU), para que o cache
+    possa ser mantido entre execuções e em processos de longa duração.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Limite de entradas de cada tabela do cache
+        """
+        self.max_entries = max_entries
+        self._directives = LRUCache(max_entries)
+        self._results = LRUCache(max_entries)
+
+    def preprocess(self, content, defines, content_hash=None):
+        """
+        Retorna o conteúdo com apenas os ramos ativos
+
+        Args:
+            content (str): Código fonte
+            defines (iterable): Símbolos definidos
+            content_hash (str, optional): Hash do conteúdo (calculado se omitido)
+
+        Returns:
+            str: Código pré-processado, com as mesmas posições e linhas do original
+        """
+        if content_hash is None:
+            content_hash = hashlib.sha1(content.encode('utf-8', errors='replace')).hexdigest()
+        define_key = frozenset(d.upper() for d in defines)
+
+        result = self._results.get((content_hash, define_key))
+        if result is not None:
+            return result
+
+        directives = self._directives.get(content_hash)
+        if directives is None:
+            directives = lex_directives(content)
+            self._directives.put(content_hash, directives)
+        result = apply_directives(content, directives, define_key)
+        self._results.put((content_hash, define_key), result)
+        return result
@@ -0,0 +1,206 @@
+"""
+Pré-varredura de unidades Delphi
+Lê cada arquivo uma única vez e extrai os metadados usados pelas etapas seguintes
+"""
+
+import hashlib
+import re
+
+from prefetch import DEFAULT_IO_WORKERS, DEFAULT_MAX_BUFFER_BYTES, prefetch
+from source_reader import char_offset, decode_source, detect_encoding, map_source
+from utils import HEADER_WINDOW, LEADING_COMMENTS_RE, extract_unit_name, is_delphi_unit
+
+INTERFACE_RE = re.compile(r'^\s*interface\b', re.IGNORECASE | re.MULTILINE)
+IMPLEMENTATION_RE = re.compile(r'^\s*implementation\b', re.IGNORECASE | re.MULTILINE)
+USES_RE = re.compile(r'\buses\b(.*?);', re.IGNORECASE | re.DOTALL)
+
+# Mesmos padrões sobre bytes, usados direto no arquivo mapeado (sem decodificar)
+INTERFACE_BYTES_RE = re.compile(rb'^\s*interface\b', re.IGNORECASE | re.MULTILINE)
+IMPLEMENTATION_BYTES_RE = re.compile(rb'^\s*implementation\b', re.IGNORECASE | re.MULTILINE)
+USES_BYTES_RE = re.compile(rb'\buses\b(.*?);', re.IGNORECASE | re.DOTALL)
+
+LEADING_COMMENTS_BYTES_RE = re.compile(LEADING_COMMENTS_RE.pattern.encode('ascii'), re.DOTALL)
+
+# Trecho decodificado depois dos comentários iniciais para identificar a unidade
+HEADER_SIZE = HEADER_WINDOW
+
+def parse_uses_clause(content, start, end=None, encoding='utf-8'):
+    """
+    Extrai os nomes das unidades da primeira cláusula 'uses' no intervalo informado
+
+    Args:
+        content (str | bytes): Conteúdo do arquivo (texto ou bytes do arquivo mapeado)
+        start (int): Posição inicial da seção
+        end (int, optional): Posição final da seção
+        encoding (str): Codificação usada para decodificar a cláusula quando content é bytes
+
+    Returns:
+        list: Nomes das unidades listadas
+    """
+    if start is None:
+        return []
+    if end is None:
+        end = len(content)
+
+    if isinstance(content, str):
+        uses_match = USES_RE.search(content, start, end)
+        uses_block = uses_match.group(1) if uses_match else None
+    else:
+        # Só a cláusula encontrada é decodificada
+        uses_match = USES_BYTES_RE.search(content, start, end)
+        uses_block = uses_match.group(1).decode(encoding, errors='replace') if uses_match else None
+    if uses_block is None:
+        return []
+
+    # Remover comentários e cláusulas "in 'arquivo.pas'"
+    uses_block = re.sub(r'{.*?}', '', uses_block, flags=re.DOTALL)
+    uses_block = re.sub(r'\(\*.*?\*\)', '', uses_block, flags=re.DOTALL)
+    uses_block = re.sub(r'//.*?$', '', uses_block, flags=re.MULTILINE)
+    uses_block = re.sub(r"\bin\s+'[^']*'", '', uses_block, flags=re.IGNORECASE)
+
+    return [u.strip() for u in uses_block.split(',') if u.strip()]
+
+def prescan_unit(file_path, raw=None):
+    """
+    Lê um arquivo .pas uma única vez e coleta seus metadados
+
+    O arquivo é mapeado em memória; codificação, nome da unidade, seções e
+    cláusulas uses são obtidos direto dos bytes, decodificando apenas os
+    identificadores. O texto completo só é decodificado quando pedido por
+    get_unit_content.
+
+    Args:
+        file_path (str): Caminho do arquivo
+        raw (bytes, optional): Conteúdo já lido (por exemplo, de um arquivo
+            compactado); se omitido, o arquivo é mapeado do disco
+
+    Returns:
+        dict: Metadados da unidade e o conteúdo bruto ('raw'); lidos do disco,
+            também a data do arquivo no momento da leitura ('mtime_ns')
+    """
+    if raw is not None:
+        return _prescan_buffer(file_path, raw)
+    with map_source(file_path) as (raw, st):
+        unit = _prescan_buffer(file_path, raw)
+    # Data do arquivo lido, gravada pelo diário e pelo cache (não a data ao fim da análise)
+    unit['mtime_ns'] = st.st_mtime_ns
+    return unit
+
+def _prescan_buffer(file_path, raw):
+    """Metadados a partir do buffer do arquivo (mapeado ou em memória)"""
+    size = len(raw)
+    content_hash = hashlib.sha1(raw).hexdigest()
+    encoding = detect_encoding(raw)
+
+    if encoding == 'utf-16':
+        # Sem varredura por bytes: decodifica e usa os padrões de texto
+        text = decode_source(raw, encoding)
+        unit = _scan_text(file_path, text)
+        unit['content'] = text
+        interface_text = text[:unit['implementation_offset']] if unit['implementation_offset'] is not None else text
+        interface_hash = hashlib.sha1(interface_text.encode('utf-8', errors='replace')).hexdigest()
+        data = None
+    else:
+        interface_match = INTERFACE_BYTES_RE.search(raw)
+        implementation_match = IMPLEMENTATION_BYTES_RE.search(raw, interface_match.end() if interface_match else 0)
+        interface_byte = interface_match.start() if interface_match else None
+        implementation_byte = implementation_match.start() if implementation_match else None
+
+        header_end = LEADING_COMMENTS_BYTES_RE.match(raw).end() + HEADER_SIZE
+        header = raw[:header_end].decode(encoding, errors='replace')
+        unit = {
+            'content': None,
+            'is_unit': is_delphi_unit(file_path, header),
+            'unit_name': extract_unit_name(file_path, header),
+            'interface_offset': char_offset(raw, interface_byte, encoding),
+            'implementation_offset': char_offset(raw, implementation_byte, encoding),
+            'uses_interface': parse_uses_clause(raw, interface_byte, implementation_byte, encoding),
+            'uses_implementation': parse_uses_clause(raw, implementation_byte, None, encoding)
+        }
+        # Hash da parte pública (tudo antes de 'implementation')
+        if implementation_byte is None:
+            interface_hash = content_hash
+        else:
+            interface_hash = hashlib.sha1(raw[:implementation_byte]).hexdigest()
+        # Cópia dos bytes: a leitura de fato acontece aqui (na thread de leitura antecipada)
+        data = raw[:]
+
+    unit.update({
+        'path': file_path,
+        'size': size,
+        'hash': content_hash,
+        'interface_hash': interface_hash,
+        'encoding': encoding,
+        'raw': data
+    })
+    return unit
+
+def _scan_text(file_path, content):
+    """Metadados da unidade a partir do texto já decodificado"""
+    interface_match = INTERFACE_RE.search(content)
+    interface_offset = interface_match.start() if interface_match else None
+
+    implementation_match = IMPLEMENTATION_RE.search(content, interface_match.end() if interface_match else 0)
+    implementation_offset = implementation_match.start() if implementation_match else None
+
+    return {
+        'is_unit': is_delphi_unit(file_path, content),
+        'unit_name': extract_unit_name(file_path, content),
+        'interface_offset': interface_offset,
+        'implementation_offset': implementation_offset,
+        'uses_interface': parse_uses_clause(content, interface_offset, implementation_offset),
+        'uses_implementation': parse_uses_clause(content, implementation_offset)
+    }
+
+def get_unit_content(unit):
+    """
+    Texto decodificado da unidade (decodificado uma única vez, sob demanda)
+
+    Args:
+        unit (dict): Metadados de prescan_unit
+
+    Returns:
+        str: Conteúdo da unidade
+    """
+    if unit.get('content') is None:
+        unit['content'] = decode_source(unit['raw'], unit['encoding'])
+        # O texto substitui os bytes: apenas uma cópia do arquivo fica em memória
+        unit['raw'] = None
+    return unit['content']
+
+def prescan_files(file_paths, log_callback=None, io_workers=DEFAULT_IO_WORKERS,
+                  max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES):
+    """
+    Pré-varredura em lote: abre cada arquivo uma única vez e entrega os metadados em sequência
+
+    Os próximos arquivos são lidos antecipadamente em um pool de threads enquanto
+    os anteriores são analisados.
+
+    Args:
+        file_paths (list): Lista de caminhos de arquivos .pas
+        log_callback (callable, optional): Função para log
+        io_workers (int): Threads de leitura antecipada (0 = leitura sequencial)
+        max_buffer_bytes (int): Limite de memória para arquivos lidos e ainda não analisados
+
+    Yields:
+        tuple: (caminho, metadados) - metadados é None quando o arquivo não pôde ser lido
+    """
+    if io_workers <= 0:
+        loaded = ((path, *_load(path)) for path in file_paths)
+    else:
+        loaded = prefetch(file_paths, prescan_unit, io_workers, max_buffer_bytes, size_of=lambda unit: unit['size'])
+
+    for file_path, unit, error in loaded:
+        if error is not None:
+            if log_callback:
+                log_callback(f"Erro ao ler {file_path}: {str(error)}")
+            yield file_path, None
+        else:
+            yield file_path, unit
+
+def _load(file_path):
+    """Pré-varredura sequencial no mesmo formato de prefetch: (resultado, exceção)"""
+    try:
+        return prescan_unit(file_path), None
+    except Exception as e:
+        return None, e
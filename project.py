@@ -0,0 +1,234 @@
+"""
+API programática do analisador
+Cada etapa (arquivos, índice de unidades, métodos, resultados, estatísticas) é
+calculada sob demanda e memorizada até ser invalidada
+
+Exemplo:
+    project = Project('C:/src/Projeto.dproj', config='Release')
+    for item in project.findings:
+        print(item['file_name'], item['line'], item['object_name'])
+    project.invalidate('C:/src/Unit1.pas')  # após editar a unidade
+    print(project.stats['findings'])
+"""
+
+import collections
+import hashlib
+import os
+
+from dproj_parser import resolve_project
+from include_resolver import IncludeCache, has_includes, include_dependencies
+from pas_analyzer import analyze_pas_file, iter_methods, prepare_content
+from preprocessor import PreprocessorCache
+from prescan import get_unit_content, prescan_files, prescan_unit
+from rules import find_rules_file, load_rules
+from utils import LRUCache
+
+# Limite de listas de métodos mantidas em memória
+DEFAULT_MAX_METHODS = 1000
+
+class Project:
+    """Projeto .dproj (ou arquivo .pas) com as etapas da análise memorizadas"""
+
+    def __init__(self, input_path, config=None, rules=None, log_callback=None, max_methods=DEFAULT_MAX_METHODS):
+        """
+        Args:
+            input_path (str): Arquivo .dproj ou .pas
+            config (str, optional): Configuração do projeto (padrão do .dproj se omitida)
+            rules (MemoryRules, optional): Regras de liberação (padrão: memory_rules.json
+                ao lado do projeto, se existir)
+            log_callback (callable, optional): Função para log
+            max_methods (int): Limite de listas de métodos mantidas em memória
+        """
+        self.input_path = os.path.abspath(input_path)
+        self.config = config
+        self.rules = rules or load_rules(find_rules_file(self.input_path))
+        self.log_callback = log_callback
+        self._resolved = None
+        self._units = {}
+        self._methods = LRUCache(max_methods)
+        self._findings = {}
+        self._file_stats = {}
+        self._includes = {}
+        self._stats = None
+        self._include_cache = None
+        self._preprocessor_cache = PreprocessorCache()
+
+    @property
+    def resolved(self):
+        """Projeto resolvido: {'files', 'search_paths', 'config', 'defines'}"""
+        if self._resolved is None:
+            resolved = resolve_project(self.input_path, self.config)
+            if resolved['source'] is not None:
+                resolved['source'].close()
+                raise ValueError("Project analisa fontes no disco; para arquivos compactados use analyze_pas_files")
+            self._resolved = resolved
+            self._include_cache = IncludeCache(self._resolved['search_paths'])
+        return self._resolved
+
+    @property
+    def files(self):
+        """Arquivos .pas do projeto, em ordem estável"""
+        return self.resolved['files']
+
+    @property
+    def units(self):
+        """
+        Índice de unidades: metadados da pré-varredura de cada arquivo (sem o conteúdo)
+
+        Returns:
+            dict: {caminho: metadados}
+        """
+        missing = [path for path in self.files if path not in self._units]
+        for path, unit in prescan_files(missing, self.log_callback):
+            self._store_unit(path, unit)
+        return {path: self._units[path] for path in self.files}
+
+    def find_unit(self, unit_name):
+        """
+        Localiza uma unidade pelo nome
+
+        Returns:
+            str: Caminho da unidade ou None
+        """
+        unit_name = unit_name.lower()
+        for path, unit in self.units.items():
+            if unit and (unit['unit_name'] or '').lower() == unit_name:
+                return path
+        return None
+
+    def methods(self, path):
+        """
+        Métodos da unidade (iter_methods sobre o conteúdo já expandido e pré-processado)
+
+        Args:
+            path (str): Caminho da unidade
+
+        Returns:
+            list: Métodos com type, name, args, has_finally, line, start e end
+        """
+        path = self._normalize(path)
+        methods = self._methods.get(path)
+        if methods is None:
+            defines = self.resolved['defines']
+            unit = prescan_unit(path)
+            self._store_unit(path, unit)
+            self._track_includes(path, unit)
+            file_content, implementation_offset, _ = prepare_content(
+                path, unit, self._include_cache, defines, self._preprocessor_cache, self.log_callback
+            )
+            methods = list(iter_methods(file_content, implementation_offset))
+            self._methods.put(path, methods)
+            # A análise reaproveita a lista pelo hash do conteúdo final
+            self._methods.put(self._content_key(file_content), methods)
+        return methods
+
+    def findings_for(self, path):
+        """Objetos não liberados de uma unidade"""
+        path = self._normalize(path)
+        if path not in self._findings:
+            try:
+                unit = prescan_unit(path)
+            except OSError as e:
+                if self.log_callback:
+                    self.log_callback(f"Erro ao ler {path}: {str(e)}")
+                unit = None
+            self._analyze(path, unit)
+        return self._findings[path]
+
+    @property
+    def findings(self):
+        """Objetos não liberados de todo o projeto, na ordem dos arquivos"""
+        missing = [path for path in self.files if path not in self._findings]
+        for path, unit in prescan_files(missing, self.log_callback):
+            self._analyze(path, unit)
+        return [item for path in self.files for item in self._findings[path]]
+
+    @property
+    def stats(self):
+        """
+        Resumo da análise
+
+        Returns:
+            dict: files, findings, files_with_findings, by_type, by_file,
+                methods_analyzed e methods_skipped
+        """
+        if self._stats is None:
+            findings = self.findings
+            self._stats = {
+                'files': len(self.files),
+                'findings': len(findings),
+                'files_with_findings': len({item['file'] for item in findings}),
+                'by_type': dict(collections.Counter(item['object_type'] for item in findings)),
+                'by_file': {path: len(self._findings[path]) for path in self.files if self._findings[path]},
+                'methods_analyzed': sum(s.get('methods_analyzed', 0) for s in self._file_stats.values()),
+                'methods_skipped': sum(s.get('methods_skipped', 0) for s in self._file_stats.values())
+            }
+        return self._stats
+
+    def invalidate(self, path=None):
+        """
+        Descarta as etapas memorizadas
+
+        Args:
+            path (str, optional): Unidade alterada; sem caminho, ou com o próprio
+                arquivo do projeto, tudo é recalculado. Um arquivo de inclusão
+                invalida as unidades que o incluem
+        """
+        self._stats = None
+        if path is None or os.path.abspath(path) == self.input_path:
+            self._resolved = None
+            self._units.clear()
+            self._methods.clear()
+            self._findings.clear()
+            self._file_stats.clear()
+            self._includes.clear()
+            self._preprocessor_cache = PreprocessorCache()
+            return
+        absolute = os.path.abspath(path)
+        dependents = [unit_path for unit_path, includes in self._includes.items() if absolute in includes]
+        path = self._normalize(path)
+        self._units.pop(path, None)
+        for unit_path in [path] + dependents:
+            self._methods.pop(unit_path)
+            self._findings.pop(unit_path, None)
+            self._file_stats.pop(unit_path, None)
+            self._includes.pop(unit_path, None)
+
+    def _analyze(self, path, unit):
+        if unit is None:
+            self._findings[path] = []
+            return
+        defines = self.resolved['defines']
+        self._store_unit(path, unit)
+        self._track_includes(path, unit)
+        self._file_stats[path] = {}
+        self._findings[path] = analyze_pas_file(
+            path, unit=unit, stats=self._file_stats[path], include_cache=self._include_cache,
+            defines=defines, preprocessor_cache=self._preprocessor_cache,
+            method_cache=self._methods, rules=self.rules
+        )
+        self._stats = None
+
+    def _store_unit(self, path, unit):
+        # O índice guarda só os metadados; o texto fica com quem analisa
+        self._units[path] = None if unit is None else {
+            key: value for key, value in unit.items() if key not in ('content', 'raw')
+        }
+
+    def _track_includes(self, path, unit):
+        # Arquivos {$I} da unidade, para que invalidate(.inc) alcance quem os inclui
+        content = get_unit_content(unit)
+        includes = include_dependencies(content, path, self._include_cache) if has_includes(content) else []
+        self._includes[path] = {os.path.abspath(p) for p in includes}
+
+    def _normalize(self, path):
+        """Caminho como aparece em files (os .dproj usam caminhos relativos ao projeto)"""
+        absolute = os.path.abspath(path)
+        for candidate in self.files:
+            if os.path.abspath(candidate) == absolute:
+                return candidate
+        return path
+
+    @staticmethod
+    def _content_key(file_content):
+        return hashlib.sha1(file_content.encode('utf-8', errors='replace')).hexdigest()
@@ -0,0 +1,143 @@
+"""
+Relatório HTML compacto e autocontido
+Os resultados são embutidos na página como JSON compactado (gzip, em base64)
+e descompactados pelo navegador com DecompressionStream
+"""
+
+import base64
+import html
+
+from report_pages import STYLE
+from results_io import build_payload, compress_payload
+from utils import atomic_write
+
+RENDER_SCRIPT = """<script>
+(function() {
+    var status = document.getElementById('status');
+    if (typeof DecompressionStream === 'undefined') {
+        status.textContent = 'Este navegador não suporta DecompressionStream; abra o relatório em um navegador atualizado.';
+        return;
+    }
+    var raw = atob(document.getElementById('payload').textContent.trim());
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    new Response(stream).text().then(function(text) {
+        render(JSON.parse(text));
+    }).catch(function(e) {
+        status.textContent = 'Erro ao ler os resultados: ' + e;
+    });
+
+    function el(tag, text, cls) {
+        var node = document.createElement(tag);
+        if (text !== undefined && text !== null) node.textContent = text;
+        if (cls) node.className = cls;
+        return node;
+    }
+
+    function row(cells, header) {
+        var tr = el('tr');
+        cells.forEach(function(c) { tr.appendChild(el(header ? 'th' : 'td', c)); });
+        return tr;
+    }
+
+    function basename(path) {
+        return path.split(/[\\\\/]/).pop();
+    }
+
+    function render(payload) {
+        var columns = payload.columns;
+        var names = Object.keys(columns);
+        var count = columns.file.length;
+        var byFile = new Map();
+        var byType = new Map();
+        for (var i = 0; i < count; i++) {
+            var item = {};
+            names.forEach(function(name) { item[name] = columns[name][i]; });
+            if (!byFile.has(item.file)) byFile.set(item.file, []);
+            byFile.get(item.file).push(item);
+            byType.set(item.object_type, (byType.get(item.object_type) || 0) + 1);
+        }
+
+        status.remove();
+        var summary = document.getElementById('summary');
+        summary.appendChild(el('p', 'Total de objetos não liberados: ' + count));
+        summary.appendChild(el('p', 'Total de arquivos com problemas: ' + byFile.size));
+
+        var types = document.getElementById('types');
+        types.appendChild(row(['Tipo', 'Contagem'], true));
+        Array.from(byType.entries()).sort(function(a, b) { return b[1] - a[1]; }).slice(0, 10)
+            .forEach(function(t) { types.appendChild(row([t[0], t[1]])); });
+
+        // Os objetos de cada arquivo só são montados quando o arquivo é aberto
+        var files = document.getElementById('files');
+        Array.from(byFile.entries()).sort(function(a, b) { return b[1].length - a[1].length; })
+            .forEach(function(entry) {
+                var details = el('details', null, 'box');
+                details.appendChild(el('summary', basename(entry[0]) + ' (' + entry[1].length + ' objetos) - ' + entry[0]));
+                details.addEventListener('toggle', function() {
+                    if (!details.open || details.dataset.rendered) return;
+                    details.dataset.rendered = '1';
+                    var table = el('table');
+                    table.appendChild(row(['Método', 'Linha do Método', 'Objeto', 'Tipo', 'Linha', 'Declaração'], true));
+                    entry[1].forEach(function(item) {
+                        var line = item.source_file ? basename(item.source_file) + ':' + item.line : item.line;
+                        var tr = row([item.method_name + ' (' + item.method_type + ')', item.method_line,
+                                      item.object_name, item.object_type, line, '']);
+                        tr.lastChild.appendChild(el('code', item.initialization));
+                        table.appendChild(tr);
+                    });
+                    details.appendChild(table);
+                });
+                files.appendChild(details);
+            });
+    }
+})();
+</script>"""
+
+def generate_compact_report(results, output_path, title="Relatório de Vazamento de Memória", stats=None):
+    """
+    Gera um relatório HTML único com os resultados compactados embutidos
+
+    A página não depende de outros arquivos e fica muito menor que a do
+    generate_report: os resultados vão no formato colunar, compactados com
+    gzip, e são montados no navegador.
+
+    Args:
+        results (list): Lista de resultados da análise
+        output_path (str): Caminho do arquivo HTML
+        title (str): Título do relatório
+        stats (dict, optional): Estatísticas da execução, embutidas junto aos resultados
+
+    Returns:
+        int: Tamanho em bytes do conteúdo compactado embutido
+    """
+    data = compress_payload(build_payload(results, 'columnar', stats=stats, title=title))
+    encoded = base64.b64encode(data).decode('ascii')
+    atomic_write(output_path, f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <title>{html.escape(title)}</title>
+    <style>
+{STYLE}    </style>
+</head>
+<body>
+    <h1>{html.escape(title)}</h1>
+    <div class="box" id="summary">
+        <h2>Resumo da Análise</h2>
+        <p id="status">Carregando resultados...</p>
+    </div>
+    <div class="box">
+        <h3>Objetos ordenados por quantidade de possíveis vazamentos</h3>
+        <table id="types"></table>
+    </div>
+    <div id="files"></div>
+    <script type="application/octet-stream" id="payload">
+{encoded}
+    </script>
+    {RENDER_SCRIPT}
+</body>
+</html>
+""")
+    return len(data)
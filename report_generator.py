@@ -3,7 +3,11 @@ from datetime import datetime
 import collections
 import webbrowser
 
-def generate_report(results, output_path, title="Relatório de Vazamento de Memória", detailed=True):
+from run_history import render_trend_section
+from source_snippets import DEFAULT_CONTEXT_LINES, SNIPPET_STYLE, SnippetCache, render_snippet
+
+def generate_report(results, output_path, title="Relatório de Vazamento de Memória", detailed=True,
+                    collapse_duplicates=False, history=None, snippet_lines=DEFAULT_CONTEXT_LINES, source=None):
     """
     Gera um relatório HTML de objetos não liberados
 
@@ -13,6 +17,13 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
         dproj_dir (str): Caminho da pasta do arquivo .dproj (base para exibir caminho relativo)
         title (str): Título do relatório
         detailed (bool): Se deve incluir detalhes completos
+        collapse_duplicates (bool): Mostra uma única vez os arquivos de conteúdo idêntico,
+            listando as cópias junto ao original
+        history (list, optional): Resumos das execuções anteriores (RunHistory.load),
+            exibidos nos gráficos de tendência
+        snippet_lines (int, optional): Linhas de código exibidas antes e depois de cada
+            declaração e cabeçalho de método (None = sem trechos)
+        source (SourceArchive, optional): Arquivo compactado de onde os trechos são lidos
     """
     import os
     import collections
@@ -20,9 +31,17 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
 
     if not results:
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(generate_empty_report())
+            f.write(generate_empty_report(history))
         return
 
+    # Cópias idênticas: manter só o original, com a lista de cópias
+    copies_by_file = collections.defaultdict(set)
+    if collapse_duplicates:
+        for item in results:
+            if item.get('duplicate_of'):
+                copies_by_file[item['duplicate_of']].add(item['file'])
+        results = [item for item in results if not item.get('duplicate_of')]
+
     # Agrupar resultados por arquivo
     results_by_file = {}
     for item in results:
@@ -221,6 +240,7 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
             border-radius: 3px;
             border: 1px solid #eee;
         }}
+        {SNIPPET_STYLE}
     </style>
 </head>
 <body>
@@ -230,6 +250,7 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
         <h2>Resumo da Análise</h2>
         <p>Total de objetos não liberados: <strong>{len(results)}</strong></p>
         <p>Total de arquivos com problemas: <strong>{len(results_by_file)}</strong></p>
+        {f"<p>Cópias idênticas omitidas: <strong>{sum(len(c) for c in copies_by_file.values())}</strong></p>" if copies_by_file else ""}
     </div>
     <div class="stats">
         <div class="stat-box">
@@ -258,6 +279,8 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
 
     # Adicionar detalhes para cada arquivo (ordem alfabética pelo caminho relativo)
     if detailed:
+        # Cada arquivo é lido uma única vez para todos os trechos
+        snippets = SnippetCache(snippet_lines, source)
         html_content += "<h2>Detalhes por Arquivo</h2>\n"
         for idx, (file_path, items) in enumerate(sorted(results_by_file.items(), key=lambda x: os.path.basename(x[0]).lower())):
             file_name = os.path.basename(file_path)
@@ -265,6 +288,10 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
     <div class="file-box" id="file-box-{idx}">
         <h3><span class="arrow"></span>{file_name} <span class="badge">{len(items)}</span></h3>
         <p>Caminho: {file_path}</p>
+"""
+            if copies_by_file.get(file_path):
+                html_content += f"""
+        <p>Cópias idênticas: {", ".join(sorted(copies_by_file[file_path]))}</p>
 """
             # Agrupar por método
             methods = collections.defaultdict(list)
@@ -276,6 +303,7 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
                 html_content += f"""
         <div class="method-box">
             <h4>{method_name} ({method_info['method_type']}) - Linha {method_line}</h4>
+            {render_snippet(snippets.method_header(method_info))}
             <table class="objects-table" width="100%">
                 <tr>
                     <th>Nome do Objeto</th>
@@ -285,12 +313,16 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
                 </tr>
 """
                 for item in method_items:
+                    # Objetos vindos de arquivos {$I} mostram o arquivo de origem
+                    line_label = item['line']
+                    if item.get('source_file'):
+                        line_label = f"{os.path.basename(item['source_file'])}:{item['line']}"
                     html_content += f"""
                 <tr class="object-item">
                     <td><strong>{item['object_name']}</strong></td>
                     <td>{item['object_type']}</td>
-                    <td>{item['line']}</td>
-                    <td><code>{item['initialization']}</code></td>
+                    <td>{line_label}</td>
+                    <td><code>{item['initialization']}</code>{render_snippet(snippets.declaration(item))}</td>
                 </tr>
 """
                 html_content += """
@@ -299,6 +331,9 @@ def generate_report(results, output_path, title="Relatório de Vazamento de Mem
 """
             html_content += "</div>\n"
 
+    # Tendência das execuções anteriores
+    html_content += render_trend_section(history or [])
+
     # Adicionar recomendações
     html_content += """
     <div class="recommendations">
@@ -341,7 +376,7 @@ end;
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
 
-def generate_empty_report():
+def generate_empty_report(history=None):
     """Gera um relatório HTML quando nenhum problema é encontrado"""
     return """<!DOCTYPE html>
 <html lang="pt-BR">
@@ -394,6 +429,7 @@ def generate_empty_report():
         <h2>Nenhum vazamento de memória encontrado!</h2>
         <p>Todos os objetos estão sendo liberados corretamente nos arquivos analisados.</p>
     </div>
+    """+render_trend_section(history or [])+"""
 </body>
 </html>
 """
@@ -0,0 +1,333 @@
+"""
+Relatório HTML em várias páginas
+Um índice leve (resumo e contagem por arquivo, ordenável) e uma página por
+unidade. Só as páginas cujos resultados mudaram desde a última geração são
+reescritas
+"""
+
+import collections
+import hashlib
+import html
+import json
+import os
+import re
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from run_history import render_trend_section
+from source_snippets import DEFAULT_CONTEXT_LINES, SNIPPET_STYLE, SnippetCache, render_snippet
+from utils import atomic_write
+
+# Versão do layout das páginas; mudar força a regeneração de todas
+PAGES_VERSION = 2
+
+# Arquivo com o hash do conteúdo de cada página gerada
+MANIFEST_NAME = 'report_manifest.json'
+
+# Pasta das páginas de cada unidade
+UNITS_DIR = 'units'
+
+# Nomes que page_name pode gerar; só esses são removidos do disco
+PAGE_NAME_RE = re.compile(rf'{UNITS_DIR}/[^/\\]+-[0-9a-f]{{10}}\.html')
+
+# Abaixo desta quantidade de páginas alteradas, a geração é feita no próprio processo
+PARALLEL_MIN_PAGES = 200
+
+STYLE = """body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    color: #333;
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 20px;
+    background-color: #f5f5f5;
+}
+h1, h2, h3, h4 { color: #2c3e50; }
+h1 { border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+a { color: #2176ae; }
+.box {
+    background-color: #fff;
+    border-radius: 5px;
+    padding: 15px;
+    margin-bottom: 20px;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+}
+.method-box {
+    background-color: #f9f9f9;
+    border-left: 3px solid #3498db;
+    padding: 10px;
+    margin: 10px 0;
+}
+table { width: 100%; border-collapse: collapse; }
+th, td { padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }
+th { background-color: #f0f7ff; }
+th.sortable { cursor: pointer; user-select: none; }
+th.sortable:after { content: ' \\2195'; color: #999; }
+code {
+    font-family: Consolas, monospace;
+    font-size: 12px;
+    background-color: #f8f8f8;
+    padding: 2px 4px;
+    border: 1px solid #eee;
+}
+.datetime { text-align: right; color: #7f8c8d; font-size: 0.9em; }
+""" + SNIPPET_STYLE
+
+SORT_SCRIPT = """<script>
+document.querySelectorAll('th.sortable').forEach(function(th) {
+    th.addEventListener('click', function() {
+        var table = th.closest('table');
+        var body = table.tBodies[0];
+        var index = Array.prototype.indexOf.call(th.parentNode.children, th);
+        var numeric = th.dataset.type === 'number';
+        var ascending = th.dataset.order !== 'asc';
+        th.dataset.order = ascending ? 'asc' : 'desc';
+        var rows = Array.prototype.slice.call(body.rows);
+        rows.sort(function(a, b) {
+            var x = a.cells[index].dataset.value || a.cells[index].textContent;
+            var y = b.cells[index].dataset.value || b.cells[index].textContent;
+            var result = numeric ? Number(x) - Number(y) : x.localeCompare(y);
+            return ascending ? result : -result;
+        });
+        rows.forEach(function(row) { body.appendChild(row); });
+    });
+});
+</script>"""
+
+def page_name(file_path):
+    """Nome estável da página de uma unidade (nome do arquivo + hash do caminho)"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    digest = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:10]
+    return f"{UNITS_DIR}/{stem}-{digest}.html"
+
+def _page_hash(page):
+    data = json.dumps([PAGES_VERSION, page['title'], page['file'], page['items'], page['copies'], page['stamp']],
+                      sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def source_stamp(file_path, source=None):
+    """Data e tamanho do fonte: os trechos da página mudam com o arquivo"""
+    try:
+        if source is not None:
+            return list(source.stat_key(file_path))
+        st = os.stat(file_path)
+        return [st.st_mtime_ns, st.st_size]
+    except (OSError, KeyError):
+        return None
+
+def render_unit_page(page, snippets=None):
+    """
+    HTML da página de uma unidade
+
+    Args:
+        page (dict): {'title', 'file', 'items', 'copies', 'stamp'}
+        snippets (SnippetCache, optional): Trechos do código em volta das declarações
+
+    Returns:
+        str: Página completa (sem data de geração, para só mudar com os resultados)
+    """
+    file_path = page['file']
+    esc = html.escape
+    parts = [f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <title>{esc(os.path.basename(file_path))} - {esc(page['title'])}</title>
+    <link rel="stylesheet" href="../style.css">
+</head>
+<body>
+    <p><a href="../index.html">&larr; Índice</a></p>
+    <h1>{esc(os.path.basename(file_path))}</h1>
+    <div class="box">
+        <p>Caminho: {esc(file_path)}</p>
+        <p>Objetos não liberados: <strong>{len(page['items'])}</strong></p>
+"""]
+    if page['copies']:
+        parts.append(f"        <p>Cópias idênticas: {esc(', '.join(page['copies']))}</p>\n")
+
+    methods = collections.defaultdict(list)
+    for item in page['items']:
+        methods[(item['method_name'], item['method_line'])].append(item)
+    for (method_name, method_line), method_items in methods.items():
+        header = render_snippet(snippets.method_header(method_items[0])) if snippets else ''
+        parts.append(f"""        <div class="method-box">
+            <h4>{esc(method_name)} ({esc(method_items[0]['method_type'])}) - Linha {method_line}</h4>
+            {header}
+            <table>
+                <tr><th>Nome do Objeto</th><th>Tipo</th><th>Linha no Arquivo</th><th>Declaração</th></tr>
+""")
+        for item in method_items:
+            # Objetos vindos de arquivos {$I} mostram o arquivo de origem
+            line_label = item['line']
+            if item.get('source_file'):
+                line_label = f"{os.path.basename(item['source_file'])}:{item['line']}"
+            parts.append(
+                f"                <tr><td><strong>{esc(item['object_name'])}</strong></td>"
+                f"<td>{esc(item['object_type'])}</td><td>{esc(str(line_label))}</td>"
+                f"<td><code>{esc(item['initialization'])}</code>"
+                f"{render_snippet(snippets.declaration(item)) if snippets else ''}</td></tr>\n"
+            )
+        parts.append("            </table>\n        </div>\n")
+    parts.append("    </div>\n</body>\n</html>\n")
+    return ''.join(parts)
+
+def render_index(title, results, pages, copies_omitted=0, history=None):
+    """
+    HTML do índice: resumo, tipos mais frequentes e contagem por arquivo (ordenável)
+
+    Args:
+        title (str): Título do relatório
+        results (list): Resultados exibidos
+        pages (dict): {caminho do arquivo: nome da página}
+        copies_omitted (int): Cópias idênticas omitidas (collapse_duplicates)
+        history (list, optional): Resumos das execuções anteriores, exibidos nos gráficos de tendência
+    """
+    esc = html.escape
+    by_file = collections.Counter(item['file'] for item in results)
+    types = collections.Counter(item['object_type'] for item in results).most_common(10)
+    type_rows = ''.join(f"<tr><td>{esc(t)}</td><td>{count}</td></tr>" for t, count in types)
+    file_rows = ''.join(
+        f"<tr><td data-value=\"{esc(os.path.basename(path).lower())}\">"
+        f"<a href=\"{esc(urllib.parse.quote(pages[path]))}\">{esc(os.path.basename(path))}</a></td>"
+        f"<td>{esc(os.path.dirname(path))}</td><td>{count}</td></tr>\n"
+        for path, count in sorted(by_file.items(), key=lambda x: (-x[1], x[0].lower()))
+    )
+    trend = render_trend_section(history or [], css_class='box')
+    copies = f"<p>Cópias idênticas omitidas: <strong>{copies_omitted}</strong></p>" if copies_omitted else ""
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <title>{esc(title)}</title>
+    <link rel="stylesheet" href="style.css">
+</head>
+<body>
+    <h1>{esc(title)}</h1>
+    <div class="datetime">Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</div>
+    <div class="box">
+        <h2>Resumo da Análise</h2>
+        <p>Total de objetos não liberados: <strong>{len(results)}</strong></p>
+        <p>Total de arquivos com problemas: <strong>{len(by_file)}</strong></p>
+        {copies}
+    </div>
+    {trend}
+    <div class="box">
+        <h3>Objetos ordenados por quantidade de possíveis vazamentos</h3>
+        <table><tr><th>Tipo</th><th>Contagem</th></tr>{type_rows}</table>
+    </div>
+    <div class="box">
+        <h3>Arquivos</h3>
+        <table>
+            <thead><tr>
+                <th class="sortable">Arquivo</th>
+                <th class="sortable">Pasta</th>
+                <th class="sortable" data-type="number">Objetos</th>
+            </tr></thead>
+            <tbody>
+{file_rows}            </tbody>
+        </table>
+    </div>
+    {SORT_SCRIPT}
+</body>
+</html>
+"""
+
+def _write_pages(output_dir, batch, snippet_lines=DEFAULT_CONTEXT_LINES, source=None):
+    """Gera e grava um lote de páginas (executado também nos processos auxiliares)"""
+    snippets = SnippetCache(snippet_lines, source)
+    for name, page in batch:
+        atomic_write(os.path.join(output_dir, name), render_unit_page(page, snippets))
+    return len(batch)
+
+def generate_report_pages(results, output_dir, title="Relatório de Vazamento de Memória",
+                          collapse_duplicates=False, workers=None, log_callback=None, history=None,
+                          snippet_lines=DEFAULT_CONTEXT_LINES, source=None):
+    """
+    Gera o relatório em várias páginas: index.html e uma página por unidade
+
+    As páginas já existentes cujo conteúdo não mudou (mesmo hash gravado em
+    report_manifest.json) não são reescritas; páginas de unidades que não têm
+    mais resultados são removidas. O índice é sempre regenerado.
+
+    Args:
+        results (list): Lista de resultados da análise
+        output_dir (str): Pasta do relatório
+        title (str): Título do relatório
+        collapse_duplicates (bool): Mostra uma única vez os arquivos de conteúdo idêntico
+        workers (int, optional): Processos para gerar as páginas alteradas (padrão:
+            número de CPUs; usados só com muitas páginas alteradas)
+        log_callback (callable, optional): Função para log
+        history (list, optional): Resumos das execuções anteriores (RunHistory.load),
+            exibidos no índice
+        snippet_lines (int, optional): Linhas de código exibidas antes e depois de cada
+            declaração e cabeçalho de método (None = sem trechos)
+        source (SourceArchive, optional): Arquivo compactado de onde os trechos são lidos
+
+    Returns:
+        dict: {'pages', 'written', 'removed'} - páginas de unidades no relatório,
+            reescritas nesta geração e removidas
+    """
+    os.makedirs(os.path.join(output_dir, UNITS_DIR), exist_ok=True)
+
+    # Cópias idênticas: manter só o original, com a lista de cópias
+    copies_by_file = collections.defaultdict(set)
+    if collapse_duplicates:
+        for item in results:
+            if item.get('duplicate_of'):
+                copies_by_file[item['duplicate_of']].add(item['file'])
+        results = [item for item in results if not item.get('duplicate_of')]
+
+    items_by_file = collections.defaultdict(list)
+    for item in results:
+        items_by_file[item['file']].append(item)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    pages = {}
+    new_manifest = {}
+    changed = []
+    for file_path, items in items_by_file.items():
+        name = page_name(file_path)
+        page = {
+            'title': title, 'file': file_path, 'items': items, 'copies': sorted(copies_by_file.get(file_path, ())),
+            'stamp': [snippet_lines, source_stamp(file_path, source) if snippet_lines is not None else None]
+        }
+        page_hash = _page_hash(page)
+        pages[file_path] = name
+        new_manifest[name] = page_hash
+        if manifest.get(name) != page_hash or not os.path.isfile(os.path.join(output_dir, name)):
+            changed.append((name, page))
+
+    # Páginas alteradas: em lotes nos processos auxiliares quando são muitas
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(changed) >= PARALLEL_MIN_PAGES:
+        size = -(-len(changed) // (workers * 4))
+        batches = [changed[i:i + size] for i in range(0, len(changed), size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_pages, [output_dir] * len(batches), batches,
+                              [snippet_lines] * len(batches), [source] * len(batches)))
+    else:
+        _write_pages(output_dir, changed, snippet_lines, source)
+
+    # O manifesto é lido do disco: nomes que não são de páginas geradas são ignorados
+    removed = [name for name in manifest if name not in new_manifest and PAGE_NAME_RE.fullmatch(name)]
+    for name in removed:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except OSError:
+            pass
+
+    atomic_write(os.path.join(output_dir, 'style.css'), STYLE)
+    copies_omitted = sum(len(c) for c in copies_by_file.values())
+    atomic_write(os.path.join(output_dir, 'index.html'), render_index(title, results, pages, copies_omitted, history))
+    atomic_write(manifest_path, json.dumps(new_manifest, indent=1))
+
+    if log_callback:
+        log_callback(f"Relatório: {len(pages)} páginas, {len(changed)} reescritas, {len(removed)} removidas")
+    return {'pages': len(pages), 'written': len(changed), 'removed': len(removed)}
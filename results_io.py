@@ -0,0 +1,131 @@
+"""
+Gravação e leitura de resultados da análise (JSON ou formato colunar)
+Arquivos terminados em .gz são gravados e lidos compactados com gzip
+"""
+
+import gzip
+import json
+
+# Colunas de cada objeto não liberado, na ordem do formato colunar
+RESULT_COLUMNS = [
+    'file', 'file_name', 'method_type', 'method_name', 'method_line', 'object_name',
+    'object_type', 'line', 'relative_line', 'initialization', 'scope', 'source_file', 'duplicate_of'
+]
+
+# Colunas opcionais (omitidas do objeto quando vazias)
+OPTIONAL_COLUMNS = ('source_file', 'duplicate_of')
+
+def sort_results(results):
+    """
+    Ordena os resultados de forma canônica (independe da ordem de análise)
+
+    Args:
+        results (list): Objetos não liberados
+
+    Returns:
+        list: Resultados ordenados por arquivo, linha e nome
+    """
+    return sorted(results, key=lambda r: (
+        r['file'], r['line'] or 0, r['method_line'] or 0, r['object_name'], r.get('scope') or ''
+    ))
+
+def build_payload(results, fmt='json', files=None, stats=None, title=None):
+    """
+    Monta o conteúdo gravado por save_results (também embutido no relatório compacto)
+
+    Args:
+        results (list): Objetos não liberados
+        fmt (str): 'json' (lista de objetos) ou 'columnar' (uma lista por coluna)
+        files (list, optional): Arquivos analisados nesta execução
+        stats (dict, optional): Estatísticas da execução
+        title (str, optional): Título do relatório
+
+    Returns:
+        dict: Conteúdo serializável em JSON
+    """
+    payload = {'format': fmt, 'title': title, 'files': sorted(files or []), 'stats': stats or {}}
+    if fmt == 'columnar':
+        payload['columns'] = {column: [r.get(column) for r in results] for column in RESULT_COLUMNS}
+    elif fmt == 'json':
+        payload['results'] = results
+    else:
+        raise ValueError(f"Formato de resultados desconhecido: {fmt}")
+    return payload
+
+def compress_payload(payload):
+    """
+    JSON compactado com gzip (sem data no cabeçalho, para saída reproduzível)
+
+    Returns:
+        bytes: Conteúdo gzip
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def save_results(results, output_path, fmt='json', files=None, stats=None, title=None):
+    """
+    Grava os resultados de uma execução (ou de uma fatia)
+
+    Args:
+        results (list): Objetos não liberados
+        output_path (str): Arquivo de saída (.json.gz grava compactado)
+        fmt (str): 'json' (lista de objetos) ou 'columnar' (uma lista por coluna)
+        files (list, optional): Arquivos analisados nesta execução
+        stats (dict, optional): Estatísticas da execução
+        title (str, optional): Título do relatório, reaproveitado pelo merge
+    """
+    payload = build_payload(results, fmt, files, stats, title)
+    if output_path.lower().endswith('.gz'):
+        with open(output_path, 'wb') as f:
+            f.write(compress_payload(payload))
+        return
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+def load_results(input_path):
+    """
+    Lê um arquivo gravado por save_results
+
+    Returns:
+        tuple: (resultados, arquivos analisados, estatísticas, título)
+    """
+    opener = gzip.open if input_path.lower().endswith('.gz') else open
+    with opener(input_path, 'rt', encoding='utf-8') as f:
+        payload = json.load(f)
+
+    if payload.get('format') == 'columnar':
+        columns = payload['columns']
+        count = len(columns['file'])
+        results = []
+        for i in range(count):
+            item = {column: columns[column][i] for column in RESULT_COLUMNS if column in columns}
+            for column in OPTIONAL_COLUMNS:
+                if item.get(column) is None:
+                    item.pop(column, None)
+            results.append(item)
+    else:
+        results = payload['results']
+
+    return results, payload.get('files', []), payload.get('stats', {}), payload.get('title')
+
+def merge_results(input_paths):
+    """
+    Combina os resultados de várias fatias em um único conjunto
+
+    Returns:
+        tuple: (resultados ordenados, arquivos analisados, estatísticas somadas, título)
+    """
+    all_results = []
+    all_files = set()
+    all_stats = {}
+    title = None
+    for input_path in input_paths:
+        results, files, stats, shard_title = load_results(input_path)
+        title = title or shard_title
+        all_results.extend(results)
+        all_files.update(files)
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                all_stats[key] = all_stats.get(key, 0) + value
+    return sort_results(all_results), sorted(all_files), all_stats, title
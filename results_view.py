@@ -0,0 +1,340 @@
+"""
+Tabela de resultados da interface gráfica
+Treeview agrupada por arquivo e método, preenchida sob demanda: só os nós
+abertos recebem filhos, em páginas, e os resultados chegam durante a análise
+"""
+
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import sys
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+# Filhos inseridos por vez em um nó aberto
+PAGE_SIZE = 500
+# Intervalo entre as atualizações da tabela com os resultados recebidos
+FLUSH_INTERVAL_MS = 200
+# Espera após a digitação antes de aplicar o filtro
+FILTER_DELAY_MS = 300
+
+# Comando do editor, por exemplo: code -g {file}:{line}
+EDITOR_ENV = 'MEMORY_ANALYZER_EDITOR'
+
+# Colunas: (chave, título, largura)
+COLUMNS = [
+    ('count', "Qtde", 60),
+    ('object_type', "Tipo", 160),
+    ('line', "Linha", 70),
+    ('scope', "Escopo", 70)
+]
+
+def open_source(path, line):
+    """
+    Abre o arquivo no editor, na linha indicada
+
+    Usa o comando da variável MEMORY_ANALYZER_EDITOR ({file} e {line} são
+    substituídos); sem ela, o VS Code se estiver no PATH, ou o programa
+    associado ao arquivo (sem posicionar na linha).
+    """
+    template = os.environ.get(EDITOR_ENV)
+    if template:
+        args = [arg.format(file=path, line=line) for arg in shlex.split(template, posix=os.name != 'nt')]
+        subprocess.Popen(args)
+        return
+    code = shutil.which('code')
+    if code:
+        subprocess.Popen([code, '-g', f"{path}:{line}"])
+    elif sys.platform.startswith('win'):
+        os.startfile(path)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', path])
+    else:
+        subprocess.Popen(['xdg-open', path])
+
+class ResultsView(tk.Frame):
+    """
+    Resultados agrupados por arquivo e método
+
+    Os resultados são recebidos de qualquer thread por add_results e aplicados
+    em lote no laço da interface. Atualizações só inserem ou alteram os nós
+    afetados; a árvore inteira só é refeita quando o filtro muda.
+    """
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.groups = OrderedDict()   # arquivo -> lista de resultados
+        self.file_nodes = {}          # arquivo -> nó de nível superior
+        self.node_data = {}           # nó -> ('file', arquivo) | ('method', arquivo, chave) | ('item', resultado)
+        self.loaded = {}              # nó -> quantidade de filhos já inseridos
+        self.pending = queue.Queue()
+        self.filter_text = ''
+        self.sort_key = None
+        self.sort_reverse = False
+        self.total = 0
+        self._filter_job = None
+        self._node_counter = 0
+
+        self.create_widgets()
+        self.after(FLUSH_INTERVAL_MS, self._flush)
+
+    def create_widgets(self):
+        # Filtro e resumo
+        top_frame = tk.Frame(self)
+        top_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(top_frame, text="Filtro:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *_: self._schedule_filter())
+        tk.Entry(top_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.summary_var = tk.StringVar(value="Nenhum resultado")
+        tk.Label(top_frame, textvariable=self.summary_var).pack(side=tk.RIGHT)
+
+        # Tabela
+        tree_frame = tk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=[key for key, _, _ in COLUMNS])
+        self.tree.heading('#0', text="Arquivo / Método / Objeto", command=lambda: self.sort_by('name'))
+        self.tree.column('#0', width=320)
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor=tk.W)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.bind('<<TreeviewOpen>>', self._on_open)
+        self.tree.bind('<Double-1>', self._on_double_click)
+        self.tree.bind('<Return>', self._on_double_click)
+
+    # Entrada de dados
+
+    def add_results(self, file_path, results):
+        """Recebe os resultados de um arquivo (pode ser chamado de outra thread)"""
+        if results:
+            self.pending.put((file_path, list(results)))
+
+    def clear(self):
+        """Remove todos os resultados (nova análise)"""
+        while not self.pending.empty():
+            self.pending.get_nowait()
+        self.groups.clear()
+        self.total = 0
+        self._reset_tree()
+        self._update_summary()
+
+    def _flush(self):
+        """Aplica os resultados recebidos desde a última atualização"""
+        changed_files = []
+        while True:
+            try:
+                file_path, results = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            self.groups.setdefault(file_path, []).extend(results)
+            self.total += len(results)
+            changed_files.append(file_path)
+
+        for file_path in dict.fromkeys(changed_files):
+            self._refresh_file(file_path)
+        if changed_files:
+            if self.sort_key in ('name', 'count'):
+                self._reorder_files()
+            self._update_summary()
+        self.after(FLUSH_INTERVAL_MS, self._flush)
+
+    # Filtro e ordenação
+
+    def _schedule_filter(self):
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DELAY_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.filter_text = self.filter_var.get().strip().lower()
+        self._reset_tree()
+        for file_path in self._sorted_files(self.groups):
+            self._refresh_file(file_path)
+        self._update_summary()
+
+    def _matches(self, item):
+        if not self.filter_text:
+            return True
+        text = ' '.join(str(item.get(key) or '') for key in ('file_name', 'method_name', 'object_name', 'object_type'))
+        return self.filter_text in text.lower()
+
+    def _visible_items(self, file_path):
+        return [item for item in self.groups.get(file_path, []) if self._matches(item)]
+
+    def sort_by(self, key):
+        """Ordena pela coluna clicada (um segundo clique inverte a ordem)"""
+        if self.sort_key == key:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_key = key
+            self.sort_reverse = key == 'count'
+        self._reorder_files()
+        # Nós abertos são preenchidos novamente na nova ordem
+        for file_path, node in self.file_nodes.items():
+            if node in self.loaded:
+                self._repopulate(node)
+
+    def _sorted_files(self, files):
+        if self.sort_key == 'count':
+            return sorted(files, key=lambda f: (len(self._visible_items(f)), os.path.basename(f).lower()),
+                          reverse=self.sort_reverse)
+        if self.sort_key == 'name':
+            return sorted(files, key=lambda f: os.path.basename(f).lower(), reverse=self.sort_reverse)
+        return list(files)
+
+    def _reorder_files(self):
+        for index, file_path in enumerate(self._sorted_files(self.file_nodes)):
+            self.tree.move(self.file_nodes[file_path], '', index)
+
+    def _sort_items(self, items):
+        if self.sort_key in ('object_type', 'line', 'scope'):
+            return sorted(items, key=lambda i: (i.get(self.sort_key) is None, i.get(self.sort_key) or 0
+                                                if self.sort_key == 'line' else str(i.get(self.sort_key) or '')),
+                          reverse=self.sort_reverse)
+        return items
+
+    # Árvore
+
+    def _new_node(self, parent, text, values, data, index=tk.END):
+        self._node_counter += 1
+        node = f"n{self._node_counter}"
+        self.tree.insert(parent, index, iid=node, text=text, values=values)
+        self.node_data[node] = data
+        return node
+
+    def _reset_tree(self):
+        self.tree.delete(*self.tree.get_children())
+        self.file_nodes.clear()
+        self.node_data.clear()
+        self.loaded.clear()
+
+    def _refresh_file(self, file_path):
+        """Cria ou atualiza o nó do arquivo, sem tocar nos demais"""
+        items = self._visible_items(file_path)
+        node = self.file_nodes.get(file_path)
+        if not items:
+            if node is not None:
+                self._forget_children(node)
+                self.tree.delete(node)
+                del self.file_nodes[file_path]
+                self.node_data.pop(node, None)
+            return
+        text = os.path.basename(file_path)
+        if node is None:
+            node = self._new_node('', text, (len(items), '', '', ''), ('file', file_path))
+            self.file_nodes[file_path] = node
+            self._add_placeholder(node)
+        else:
+            self.tree.item(node, values=(len(items), '', '', ''))
+            if node in self.loaded:
+                self._repopulate(node)
+
+    def _add_placeholder(self, node):
+        # Filho vazio para exibir o indicador de expansão antes do preenchimento
+        self.tree.insert(node, tk.END, iid=f"{node}.placeholder", text="")
+
+    def _forget_children(self, node):
+        for child in self.tree.get_children(node):
+            self._forget_children(child)
+            self.node_data.pop(child, None)
+            self.loaded.pop(child, None)
+        self.loaded.pop(node, None)
+
+    def _repopulate(self, node):
+        self._forget_children(node)
+        self.tree.delete(*self.tree.get_children(node))
+        self._load_page(node)
+
+    def _children_of(self, node):
+        """Filhos (ainda não inseridos) de um nó: métodos de um arquivo ou objetos de um método"""
+        data = self.node_data[node]
+        if data[0] == 'file':
+            methods = OrderedDict()
+            for item in self._visible_items(data[1]):
+                methods.setdefault((item['method_name'], item['method_line']), []).append(item)
+            return [('method', data[1], key, items) for key, items in methods.items()]
+        if data[0] == 'method':
+            file_path, key = data[1], data[2]
+            items = [
+                item for item in self._visible_items(file_path)
+                if (item['method_name'], item['method_line']) == key
+            ]
+            return [('item', item) for item in self._sort_items(items)]
+        return []
+
+    def _load_page(self, node):
+        """Insere a próxima página de filhos do nó, com um item 'mais...' se houver mais"""
+        placeholder = f"{node}.placeholder"
+        if self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
+        for child in self.tree.get_children(node):
+            if self.node_data.get(child, ('',))[0] == 'more':
+                self.tree.delete(child)
+                self.node_data.pop(child, None)
+
+        children = self._children_of(node)
+        start = self.loaded.get(node, 0)
+        page = children[start:start + PAGE_SIZE]
+        for child in page:
+            if child[0] == 'method':
+                _, file_path, (method_name, method_line), items = child
+                method_type = items[0]['method_type']
+                method_node = self._new_node(
+                    node, f"{method_name} ({method_type})", (len(items), '', method_line, ''),
+                    ('method', file_path, (method_name, method_line))
+                )
+                self._add_placeholder(method_node)
+            else:
+                item = child[1]
+                line_label = item['line']
+                if item.get('source_file'):
+                    line_label = f"{os.path.basename(item['source_file'])}:{item['line']}"
+                self._new_node(
+                    node, item['object_name'], ('', item['object_type'], line_label, item.get('scope') or ''),
+                    ('item', item)
+                )
+        self.loaded[node] = start + len(page)
+        remaining = len(children) - self.loaded[node]
+        if remaining > 0:
+            self._new_node(node, f"... mais {remaining} (duplo clique para carregar)", ('', '', '', ''), ('more', node))
+
+    def _on_open(self, event):
+        node = self.tree.focus()
+        data = self.node_data.get(node)
+        if data is None:
+            return
+        if data[0] == 'more':
+            self._load_page(data[1])
+        elif node not in self.loaded:
+            self._load_page(node)
+
+    def _on_double_click(self, event):
+        node = self.tree.focus()
+        data = self.node_data.get(node)
+        if data is None:
+            return
+        if data[0] == 'more':
+            self._load_page(data[1])
+        elif data[0] == 'item':
+            item = data[1]
+            open_source(item.get('source_file') or item['file'], item['line'])
+
+    def _update_summary(self):
+        if not self.total:
+            self.summary_var.set("Nenhum resultado")
+            return
+        shown = sum(len(self._visible_items(f)) for f in self.file_nodes) if self.filter_text else self.total
+        text = f"{self.total} objetos em {len(self.groups)} arquivos"
+        if self.filter_text:
+            text += f" (exibindo {shown})"
+        self.summary_var.set(text)
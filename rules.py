@@ -0,0 +1,202 @@
+"""
+Regras de liberação e posse de objetos
+As regras padrão podem ser estendidas por um arquivo JSON e são compiladas em
+um único padrão combinado
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from utils import LRUCache
+
+# Nome do arquivo de regras procurado ao lado do projeto
+RULES_FILE_NAME = 'memory_rules.json'
+
+# Lista de tipos primitivos/comuns do Delphi
+COMMON_TYPES = {
+    'integer', 'string', 'double', 'real', 'boolean', 'byte', 'word', 'char', 'currency',
+    'smallint', 'longint', 'int64', 'single', 'extended', 'pchar', 'ansistring', 'widestring',
+    'shortstring', 'cardinal', 'variant', 'pointer', 'dword', 'qword', 'tdate', 'tdatetime'
+}
+
+# Regras padrão (equivalentes aos padrões fixos usados antes do arquivo de regras)
+DEFAULT_RULES = {
+    # Funções que liberam o objeto passado: FreeAndNil(x)
+    'release_functions': ['FreeAndNil', 'Free'],
+    # Métodos que liberam o próprio objeto: x.Free
+    'release_methods': ['Free', 'DisposeOf', 'Release', 'Destroy'],
+    # Métodos que assumem a posse do objeto passado: Lista.Add(x); o objeto é o
+    # primeiro argumento, ou o indicado em {"name": "AddObject", "arg": 2}
+    'ownership_calls': [],
+    # Donos passados ao construtor: x := TFoo.Create(Self)
+    'owned_constructor_args': [],
+    # Tipos que nunca são tratados como objetos
+    'ignored_types': sorted(COMMON_TYPES)
+}
+
+# Um argumento de chamada ignorado antes do objeto (literais, chamadas simples)
+SKIPPED_ARG = r"(?:'[^']*'|\([^()]*\)|[^,()'])*,\s*"
+
+def normalize_ownership_call(entry):
+    """
+    Regra de posse no formato (nome, posição do argumento)
+
+    Args:
+        entry (str | dict): "Add" (primeiro argumento) ou {"name": "AddObject", "arg": 2}
+
+    Returns:
+        tuple: (nome do método, posição do objeto entre os argumentos, a partir de 1)
+    """
+    if isinstance(entry, str):
+        return entry, 1
+    if isinstance(entry, (list, tuple)) and len(entry) == 2:
+        name, arg = entry
+    elif isinstance(entry, dict) and 'name' in entry:
+        name, arg = entry['name'], entry.get('arg', 1)
+    else:
+        raise ValueError(f"Regra de posse inválida: {entry!r}")
+    if not isinstance(arg, int) or arg < 1:
+        raise ValueError(f"Posição de argumento inválida na regra de posse {name}: {arg!r}")
+    return name, arg
+
+class MemoryRules:
+    """Regras de liberação compiladas em um único padrão"""
+
+    def __init__(self, release_functions=(), release_methods=(), ownership_calls=(),
+                 owned_constructor_args=(), ignored_types=()):
+        self.release_functions = list(release_functions)
+        self.release_methods = list(release_methods)
+        self.ownership_calls = [normalize_ownership_call(entry) for entry in ownership_calls]
+        self.owned_constructor_args = list(owned_constructor_args)
+        self.ignored_types = {t.lower() for t in ignored_types}
+        self.matcher = self._compile()
+
+    def _compile(self):
+        """Monta o padrão combinado; cada alternativa captura o nome do objeto liberado"""
+        def names(values):
+            return '|'.join(re.escape(v) for v in sorted(set(values), key=len, reverse=True))
+
+        alternatives = []
+        if self.release_functions:
+            alternatives.append(rf'(?:{names(self.release_functions)})\s*\(\s*(\w+)\s*\)')
+        if self.owned_constructor_args:
+            alternatives.append(
+                rf'\b(\w+)\s*:=\s*[\w.]+(?:<[^>;]*>)?\s*\.\s*Create\s*\(\s*(?:{names(self.owned_constructor_args)})\s*[,)]'
+            )
+        if self.release_methods:
+            alternatives.append(rf'\b(\w+)\s*\.\s*(?:{names(self.release_methods)})\b')
+        # Posse: uma alternativa por posição do argumento que recebe o objeto
+        by_position = {}
+        for name, arg in self.ownership_calls:
+            by_position.setdefault(arg, []).append(name)
+        for arg, calls in sorted(by_position.items()):
+            skipped = f'(?:{SKIPPED_ARG}){{{arg - 1}}}' if arg > 1 else ''
+            alternatives.append(rf'\.\s*(?:{names(calls)})\s*\(\s*{skipped}([A-Za-z_]\w*)\s*[,)]')
+        if not alternatives:
+            return re.compile(r'(?!)')
+        return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+    def released_names(self, code, pos=0, endpos=None):
+        """
+        Percorre as liberações (e transferências de posse) no código
+
+        Args:
+            code (str): Código a analisar
+            pos (int): Posição inicial
+            endpos (int, optional): Posição final
+
+        Yields:
+            tuple: (posição da ocorrência, nome do objeto)
+        """
+        if endpos is None:
+            endpos = len(code)
+        for match in self.matcher.finditer(code, pos, endpos):
+            yield match.start(), match.group(match.lastindex)
+
+    def signature(self):
+        """Identificador das regras, usado para invalidar resultados gravados com outras regras"""
+        data = json.dumps([
+            sorted(self.release_functions), sorted(self.release_methods), sorted(map(list, self.ownership_calls)),
+            sorted(self.owned_constructor_args), sorted(self.ignored_types)
+        ])
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def is_ignored_type(self, type_name):
+        """Verifica se o tipo está na lista de tipos ignorados"""
+        return type_name.lower() in self.ignored_types
+
+def load_rules(path=None):
+    """
+    Carrega as regras padrão estendidas pelo arquivo JSON informado
+
+    As listas do arquivo são acrescentadas às padrão, por exemplo:
+    {"release_functions": ["SafeFree"], "ownership_calls": ["Add", {"name": "AddObject", "arg": 2}],
+     "owned_constructor_args": ["Self"]}
+
+    Args:
+        path (str, optional): Arquivo de regras
+
+    Returns:
+        MemoryRules: Regras compiladas
+    """
+    rules = {key: list(values) for key, values in DEFAULT_RULES.items()}
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            user_rules = json.load(f)
+        for key, values in user_rules.items():
+            if key not in rules:
+                raise ValueError(f"Regra desconhecida em {path}: {key}")
+            if not isinstance(values, list):
+                raise ValueError(f"A regra {key} em {path} deve ser uma lista")
+            rules[key].extend(values)
+    return MemoryRules(**rules)
+
+def find_rules_file(input_path):
+    """Procura memory_rules.json na pasta do projeto, do arquivo ou na pasta analisada"""
+    directory = input_path if os.path.isdir(input_path) else os.path.dirname(os.path.abspath(input_path))
+    candidate = os.path.join(directory, RULES_FILE_NAME)
+    return candidate if os.path.isfile(candidate) else None
+
+class RulesCache:
+    """
+    Regras por pasta para processos de longa duração (daemon, servidor LSP)
+
+    Cada memory_rules.json é compilado uma vez e recarregado quando a data ou o
+    tamanho do arquivo mudam.
+    """
+
+    def __init__(self, max_entries=100):
+        """
+        Args:
+            max_entries (int): Arquivos de regras mantidos em memória
+        """
+        self._entries = LRUCache(max_entries)
+
+    def rules_for(self, input_path):
+        """
+        Regras do projeto, do arquivo ou da pasta informada (padrão sem memory_rules.json)
+
+        Returns:
+            MemoryRules: Regras compiladas
+        """
+        rules_path = find_rules_file(input_path)
+        if rules_path is None:
+            return get_default_rules()
+        st = os.stat(rules_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._entries.get(rules_path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, load_rules(rules_path))
+            self._entries.put(rules_path, cached)
+        return cached[1]
+
+_default_rules = None
+
+def get_default_rules():
+    """Regras padrão, compiladas uma única vez"""
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = load_rules()
+    return _default_rules
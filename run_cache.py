@@ -0,0 +1,291 @@
+"""
+Cache de resultados entre execuções, com o grafo de dependências das unidades
+Apenas as unidades alteradas (e, se a interface mudou, as que dependem delas)
+são reanalisadas
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from prescan import prescan_unit
+from utils import atomic_write
+
+# Versão do formato gravado; versões diferentes descartam o cache
+CACHE_VERSION = 1
+
+# Nome do arquivo de cache gravado ao lado do projeto pela interface gráfica
+CACHE_FILE_NAME = 'memory_leak_cache.json'
+
+def make_settings_key(defines=None, rules=None):
+    """
+    Identifica a configuração da execução (símbolos e regras)
+
+    Args:
+        defines (iterable, optional): Símbolos definidos
+        rules (MemoryRules, optional): Regras de liberação
+
+    Returns:
+        str: Hash da configuração
+    """
+    data = json.dumps([
+        sorted(d.upper() for d in defines) if defines is not None else None,
+        rules.signature() if rules is not None else None
+    ])
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+class RunCache:
+    """
+    Resultados e metadados de cada unidade da última execução
+
+    Cada entrada guarda o hash do arquivo, o hash da seção interface, as
+    cláusulas uses (o grafo de dependências) e os objetos não liberados.
+    """
+
+    def __init__(self, path, settings_key=None):
+        """
+        Args:
+            path (str): Arquivo JSON do cache
+            settings_key (str, optional): Identifica símbolos e regras da execução;
+                entradas gravadas com outra configuração são descartadas
+        """
+        self.path = path
+        self.settings_key = settings_key
+        self.units = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if payload.get('version') == CACHE_VERSION and payload.get('settings') == settings_key:
+                    self.units = payload.get('units', {})
+            except (OSError, ValueError):
+                self.units = {}
+
+    def save(self):
+        """Grava o cache de forma atômica"""
+        payload = {'version': CACHE_VERSION, 'settings': self.settings_key, 'units': self.units}
+        atomic_write(self.path, json.dumps(payload, ensure_ascii=False))
+
+    def update(self, file_path, unit, results, seconds=None):
+        """
+        Registra a análise de uma unidade
+
+        Args:
+            file_path (str): Caminho da unidade
+            unit (dict): Metadados de prescan_unit
+            results (list): Objetos não liberados encontrados
+            seconds (float, optional): Tempo gasto na análise (usado pelo agendamento)
+        """
+        # Mesma data e tamanho usados pelo diário (os da pré-varredura)
+        mtime_ns, size = unit.get('mtime_ns'), unit.get('size')
+        if mtime_ns is None:
+            st = os.stat(file_path)
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+        self.units[file_path] = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'hash': unit['hash'],
+            'interface_hash': unit['interface_hash'],
+            'unit_name': unit['unit_name'],
+            'uses_interface': unit['uses_interface'],
+            'uses_implementation': unit['uses_implementation'],
+            'uses_includes': unit.get('uses_includes', False),
+            'seconds': seconds,
+            'results': results
+        }
+
+    def timings(self):
+        """
+        Tempos de análise registrados
+
+        Returns:
+            dict: {caminho: {'seconds', 'size'}}
+        """
+        return {
+            path: {'seconds': entry['seconds'], 'size': entry['size']}
+            for path, entry in self.units.items() if entry.get('seconds') is not None
+        }
+
+    def prune(self, file_paths):
+        """Remove as unidades que não fazem mais parte da execução"""
+        keep = set(file_paths)
+        for path in [p for p in self.units if p not in keep]:
+            del self.units[path]
+
+    def dependency_graph(self):
+        """
+        Grafo de dependências entre as unidades conhecidas
+
+        Returns:
+            dict: {caminho: {'interface': set(caminhos), 'implementation': set(caminhos)}}
+                com as unidades do projeto usadas em cada seção
+        """
+        by_name = {entry['unit_name'].lower(): path for path, entry in self.units.items() if entry.get('unit_name')}
+        graph = {}
+        for path, entry in self.units.items():
+            graph[path] = {
+                section: {by_name[name.lower()] for name in entry[f'uses_{section}'] if name.lower() in by_name}
+                for section in ('interface', 'implementation')
+            }
+        return graph
+
+    def _unit_key(self, path):
+        """Nome (em minúsculas) pelo qual as outras unidades usam esta"""
+        entry = self.units.get(path)
+        name = entry['unit_name'] if entry and entry.get('unit_name') else os.path.splitext(os.path.basename(path))[0]
+        return name.lower()
+
+    def _dependents(self):
+        """
+        Índices do grafo gravado
+
+        Returns:
+            tuple: ({seção: {nome: unidades que o usam}}, {caminho: nome da unidade})
+        """
+        dependents = {'interface': defaultdict(set), 'implementation': defaultdict(set)}
+        for path, entry in self.units.items():
+            for section in dependents:
+                for name in entry[f'uses_{section}']:
+                    dependents[section][name.lower()].add(path)
+        return dependents, {path: self._unit_key(path) for path in self.units}
+
+    def _classify(self, path, scan):
+        """
+        Compara uma unidade com a entrada gravada
+
+        Returns:
+            tuple: (conteúdo mudou, interface ou nome mudou)
+        """
+        entry = self.units.get(path)
+        if entry is None:
+            # Unidade nova: pode mudar a resolução de nomes de quem a usa
+            return True, True
+        if entry.get('uses_includes'):
+            return True, False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True, False
+        if (st.st_mtime_ns, st.st_size) == (entry['mtime_ns'], entry['size']):
+            return False, False
+        try:
+            unit = scan(path)
+        except Exception:
+            return True, True
+        changed = unit['hash'] != entry['hash']
+        interface_changed = unit['interface_hash'] != entry['interface_hash'] or unit['unit_name'] != entry['unit_name']
+        if not changed:
+            # Só a data mudou: atualizar para não reler na próxima execução
+            entry['mtime_ns'], entry['size'] = st.st_mtime_ns, st.st_size
+        return changed, interface_changed
+
+    @staticmethod
+    def _propagate(changed_keys, dependents, keys, current):
+        """
+        Unidades atuais afetadas pelas interfaces alteradas
+
+        Args:
+            changed_keys (iterable): Nomes das unidades com interface alterada
+            dependents (dict): Unidades que usam cada nome (_dependents)
+            keys (dict): Nome de cada unidade gravada (_dependents)
+            current (set): Arquivos da execução atual
+
+        Returns:
+            set: Arquivos a reanalisar
+        """
+        dirty = set()
+        pending = list(changed_keys)
+        visited = set(pending)
+        while pending:
+            key = pending.pop()
+            dirty.update(p for p in dependents['implementation'][key] if p in current)
+            for dependent in dependents['interface'][key]:
+                if dependent in current:
+                    dirty.add(dependent)
+                if keys[dependent] not in visited:
+                    visited.add(keys[dependent])
+                    pending.append(keys[dependent])
+        return dirty
+
+    def plan(self, file_paths, scan=None, log_callback=None):
+        """
+        Separa as unidades que precisam ser reanalisadas das que podem ser reaproveitadas
+
+        Uma unidade é reanalisada quando seu conteúdo mudou, quando usa {$I}, ou
+        quando a interface de uma unidade da qual depende mudou. Mudanças de
+        interface se propagam pelas cláusulas uses da interface (como na
+        recompilação do Delphi); pelas da implementation, só um nível.
+
+        Args:
+            file_paths (list): Arquivos da execução atual
+            scan (callable, optional): Pré-varredura usada nos arquivos cuja data ou
+                tamanho mudou (padrão: prescan_unit)
+            log_callback (callable, optional): Função para log
+
+        Returns:
+            tuple: (arquivos a analisar, {caminho: resultados reaproveitados})
+        """
+        reused = {}
+
+        def on_reused(path, results):
+            reused[path] = results
+
+        order = {path: index for index, path in enumerate(file_paths)}
+        to_analyze = sorted(self.plan_stream(file_paths, on_reused, scan), key=order.get)
+        reused = {path: reused[path] for path in file_paths if path in reused}
+        if log_callback:
+            log_callback(f"Cache: {len(reused)} arquivos reaproveitados, {len(to_analyze)} a analisar")
+        return to_analyze, reused
+
+    def plan_stream(self, file_paths, on_reused, scan=None, log_callback=None):
+        """
+        Versão em fluxo de plan: os arquivos alterados são entregues assim que chegam
+
+        As unidades sem alteração só são decididas no fim da lista (uma unidade
+        encontrada depois pode mudar uma interface da qual elas dependem): as
+        afetadas são entregues para análise e as demais passam por on_reused.
+
+        Args:
+            file_paths (iterable): Arquivos da execução atual (ex.: DirectoryScan)
+            on_reused (callable): Recebe (caminho, resultados) de cada unidade reaproveitada
+            scan (callable, optional): Pré-varredura (padrão: prescan_unit)
+            log_callback (callable, optional): Função para log
+
+        Yields:
+            str: Arquivos a analisar
+        """
+        if scan is None:
+            scan = prescan_unit
+        # Índices calculados antes de qualquer análise atualizar as entradas
+        dependents, keys = self._dependents()
+        changed_keys = set()
+        current = set()
+        dirty = set()
+        held = []
+        for path in file_paths:
+            if path in current:
+                continue
+            current.add(path)
+            changed, interface_changed = self._classify(path, scan)
+            if interface_changed:
+                changed_keys.add(self._unit_key(path))
+            if changed:
+                dirty.add(path)
+                yield path
+            else:
+                held.append(path)
+
+        # Unidades removidas também alteram quem as usava
+        changed_keys.update(key for path, key in keys.items() if path not in current)
+
+        affected = self._propagate(changed_keys, dependents, keys, current)
+        reused = 0
+        for path in held:
+            if path in affected:
+                yield path
+            else:
+                reused += 1
+                on_reused(path, self.units[path]['results'])
+        if log_callback:
+            log_callback(f"Cache: {reused} arquivos reaproveitados, {len(current) - reused} a analisar")
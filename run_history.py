@@ -0,0 +1,207 @@
+"""
+Histórico das execuções e gráficos de tendência
+Cada execução acrescenta uma linha de resumo (totais, contagens por tipo e por
+arquivo, tempo de cada fase) a um arquivo local; os gráficos do relatório leem
+só esses resumos
+"""
+
+import collections
+import html
+import json
+import os
+from datetime import datetime
+
+# Histórico gravado ao lado do projeto
+HISTORY_FILE_NAME = 'memory_leak_history.jsonl'
+
+# Execuções exibidas nos gráficos de tendência
+DEFAULT_TREND_RUNS = 50
+
+# Estatísticas da execução copiadas para o resumo
+SUMMARY_STATS = ('methods_analyzed', 'files_cached', 'files_resumed', 'duplicates_skipped')
+
+# Cores das séries dos gráficos
+CHART_COLORS = ('#e74c3c', '#3498db', '#27ae60', '#f39c12', '#8e44ad', '#7f8c8d')
+
+def summarize_run(results, files, stats=None, phases=None, title=None):
+    """
+    Resumo de uma execução, gravado no histórico
+
+    Args:
+        results (list): Objetos não liberados
+        files (list): Arquivos analisados
+        stats (dict, optional): Estatísticas da execução
+        phases (dict, optional): {fase: segundos} (ex.: resolve, analysis, report)
+        title (str, optional): Título do relatório
+
+    Returns:
+        dict: Resumo serializável em JSON
+    """
+    stats = stats or {}
+    by_file = collections.Counter(item['file'] for item in results)
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'title': title,
+        'files': len(files),
+        'leaks': len(results),
+        'files_with_leaks': len(by_file),
+        'by_type': dict(collections.Counter(item['object_type'] for item in results).most_common()),
+        'by_file': dict(by_file.most_common()),
+        'phases': {name: round(seconds, 3) for name, seconds in (phases or {}).items()},
+        'stats': {key: stats[key] for key in SUMMARY_STATS if key in stats}
+    }
+
+class RunHistory:
+    """
+    Arquivo de histórico só de acréscimo (uma linha JSON por execução)
+
+    Gravar uma execução não lê nem reescreve o arquivo; a leitura das últimas
+    execuções começa pelo fim do arquivo, sem percorrer o histórico inteiro.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Arquivo do histórico
+        """
+        self.path = path
+
+    def append(self, summary):
+        """Acrescenta o resumo de uma execução"""
+        line = (json.dumps(summary, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with open(self.path, 'a+b') as f:
+            # Uma gravação interrompida pode ter deixado a última linha sem '\n'
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = b'\n' + line
+            f.write(line)
+
+    def load(self, limit=DEFAULT_TREND_RUNS):
+        """
+        Últimas execuções gravadas, da mais antiga para a mais recente
+
+        Args:
+            limit (int, optional): Quantidade máxima de execuções (None = todas)
+
+        Returns:
+            list: Resumos das execuções
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                position = f.tell()
+                data = b''
+                # Blocos a partir do fim até ter as linhas pedidas
+                while position > 0 and (limit is None or data.count(b'\n') <= limit):
+                    size = min(65536, position)
+                    position -= size
+                    f.seek(position)
+                    data = f.read(size) + data
+        except OSError:
+            return []
+
+        lines = data.split(b'\n')
+        if position > 0:
+            # A primeira linha do bloco pode estar incompleta
+            lines = lines[1:]
+        summaries = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                summaries.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                # Linha truncada por uma interrupção durante a escrita
+                continue
+        return summaries[-limit:] if limit else summaries
+
+def render_chart(title, labels, series, unit=''):
+    """
+    Gráfico de linhas em SVG (sem dependências externas)
+
+    Args:
+        title (str): Título do gráfico
+        labels (list): Rótulo de cada execução (eixo x)
+        series (list): [(nome, [valores])] - uma linha por série
+        unit (str): Unidade exibida nos valores
+
+    Returns:
+        str: HTML com o gráfico e a legenda
+    """
+    width, height, margin = 760, 220, 40
+    maximum = max([v for _, values in series for v in values] + [0]) or 1
+    step = (width - 2 * margin) / max(len(labels) - 1, 1)
+
+    def x(i):
+        return margin + i * step
+
+    def y(value):
+        return height - margin - value / maximum * (height - 2 * margin)
+
+    parts = [f'<h4>{html.escape(title)}</h4>',
+             f'<svg viewBox="0 0 {width} {height}" width="100%" role="img">',
+             f'<line x1="{margin}" y1="{height - margin}" x2="{width - margin}" y2="{height - margin}" stroke="#ccc"/>',
+             f'<text x="{margin - 5}" y="{margin}" text-anchor="end" font-size="11">{maximum:g}{unit}</text>',
+             f'<text x="{margin - 5}" y="{height - margin}" text-anchor="end" font-size="11">0</text>']
+    for index in (0, len(labels) - 1):
+        parts.append(f'<text x="{x(index):.1f}" y="{height - margin + 15}" text-anchor="middle" '
+                     f'font-size="11">{html.escape(labels[index])}</text>')
+    for (name, values), color in zip(series, CHART_COLORS):
+        points = ' '.join(f"{x(i):.1f},{y(v):.1f}" for i, v in enumerate(values))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="2"/>')
+        for i, v in enumerate(values):
+            parts.append(f'<circle cx="{x(i):.1f}" cy="{y(v):.1f}" r="3" fill="{color}">'
+                         f'<title>{html.escape(labels[i])}: {v:g}{unit}</title></circle>')
+    parts.append('</svg>')
+    legend = ' '.join(f'<span style="color:{color}">&#9632; {html.escape(name)}</span>'
+                      for (name, _), color in zip(series, CHART_COLORS))
+    parts.append(f'<p>{legend}</p>')
+    return '\n'.join(parts)
+
+def render_trend_section(summaries, css_class='summary'):
+    """
+    Seção de tendência do relatório: vazamentos e tempo de análise por execução
+
+    Args:
+        summaries (list): Resumos do histórico (RunHistory.load)
+        css_class (str): Classe do quadro da seção no relatório
+
+    Returns:
+        str: HTML da seção (vazio com menos de duas execuções)
+    """
+    if len(summaries) < 2:
+        return ''
+    labels = [s['time'].replace('T', ' ')[:16] for s in summaries]
+    leaks = render_chart("Objetos não liberados", labels, [
+        ("Objetos", [s['leaks'] for s in summaries]),
+        ("Arquivos com problemas", [s['files_with_leaks'] for s in summaries])
+    ])
+    phase_names = []
+    for s in summaries:
+        for name in s.get('phases', {}):
+            if name not in phase_names:
+                phase_names.append(name)
+    times = render_chart("Tempo por fase", labels, [
+        (name, [s.get('phases', {}).get(name, 0) for s in summaries]) for name in phase_names
+    ], unit='s')
+
+    # Tipos que mais variaram entre a primeira e a última execução exibidas
+    first, last = summaries[0]['by_type'], summaries[-1]['by_type']
+    changes = sorted(
+        ((name, last.get(name, 0) - first.get(name, 0)) for name in set(first) | set(last)),
+        key=lambda x: (-abs(x[1]), x[0])
+    )
+    rows = ''.join(f"<tr><td>{html.escape(name)}</td><td>{first.get(name, 0)}</td><td>{last.get(name, 0)}</td>"
+                   f"<td>{delta:+d}</td></tr>" for name, delta in changes[:10] if delta)
+    table = (f"<h4>Variação por tipo desde {html.escape(labels[0])}</h4>"
+             f"<table><tr><th>Tipo</th><th>Antes</th><th>Agora</th><th>Variação</th></tr>{rows}</table>"
+             if rows else '')
+    return f"""
+    <div class="{css_class}">
+        <h2>Tendência ({len(summaries)} execuções)</h2>
+        {leaks}
+        {times}
+        {table}
+    </div>
+"""
@@ -0,0 +1,92 @@
+"""
+Agendamento da análise em vários processos
+Estima o custo de cada arquivo e distribui o trabalho do maior para o menor
+"""
+
+import heapq
+import math
+import os
+
+# Custo estimado (segundos por byte) quando não há tempos de execuções anteriores
+DEFAULT_SECONDS_PER_BYTE = 2e-6
+
+def estimate_costs(file_paths, timings=None, size_of=os.path.getsize):
+    """
+    Estima o tempo de análise de cada arquivo
+
+    Arquivos com tempo registrado em execuções anteriores usam esse tempo; os
+    demais usam o tamanho multiplicado pela taxa média (segundos por byte)
+    observada nos arquivos já medidos.
+
+    Args:
+        file_paths (list): Arquivos a analisar
+        timings (dict, optional): {caminho: {'seconds', 'size'}} de execuções anteriores
+        size_of (callable): Função que retorna o tamanho de um arquivo
+
+    Returns:
+        dict: {caminho: custo estimado em segundos}
+    """
+    timings = timings or {}
+    measured_seconds = sum(t['seconds'] for t in timings.values())
+    measured_bytes = sum(t['size'] for t in timings.values())
+    rate = measured_seconds / measured_bytes if measured_bytes and measured_seconds else DEFAULT_SECONDS_PER_BYTE
+
+    costs = {}
+    for path in file_paths:
+        try:
+            size = size_of(path)
+        except OSError:
+            size = 0
+        timing = timings.get(path)
+        if timing and timing['size'] == size:
+            costs[path] = timing['seconds']
+        else:
+            costs[path] = size * rate
+    return costs
+
+def plan_tasks(file_paths, workers, timings=None, split_large=False, size_of=os.path.getsize):
+    """
+    Monta a lista de tarefas, da mais cara para a mais barata (LPT)
+
+    Com split_large, um arquivo cujo custo passa da carga ideal de um processo
+    (custo total / processos) é dividido em partes nas fronteiras dos métodos,
+    para que um único arquivo grande não segure a execução no final.
+
+    Args:
+        file_paths (list): Arquivos a analisar
+        workers (int): Número de processos
+        timings (dict, optional): Tempos de execuções anteriores
+        split_large (bool): Divide arquivos muito grandes em partes
+        size_of (callable): Função que retorna o tamanho de um arquivo
+
+    Returns:
+        list: Tarefas {'path', 'part', 'parts', 'cost'}
+    """
+    costs = estimate_costs(file_paths, timings, size_of)
+    ideal = sum(costs.values()) / max(1, workers)
+
+    tasks = []
+    for path in dict.fromkeys(file_paths):
+        cost = costs[path]
+        parts = 1
+        if split_large and workers > 1 and ideal > 0 and cost > ideal:
+            parts = min(workers, math.ceil(2 * cost / ideal))
+        for part in range(parts):
+            tasks.append({'path': path, 'part': part, 'parts': parts, 'cost': cost / parts})
+
+    tasks.sort(key=lambda t: (-t['cost'], t['path'], t['part']))
+    return tasks
+
+def estimate_makespan(tasks, workers):
+    """
+    Simula a execução das tarefas na ordem dada, sempre no processo mais livre
+
+    Returns:
+        tuple: (tempo estimado da execução, tempo ideal = custo total / processos)
+    """
+    workers = max(1, workers)
+    loads = [0.0] * workers
+    for task in tasks:
+        heapq.heapreplace(loads, loads[0] + task['cost'])
+    total = sum(task['cost'] for task in tasks)
+    return max(loads), total / workers
@@ -0,0 +1,112 @@
+"""
+Divisão da lista de arquivos em fatias (shards) para execução em várias máquinas
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+
+def parse_shard_spec(spec):
+    """
+    Interpreta a especificação de fatia no formato 'i/N' (i começa em 1)
+
+    Args:
+        spec (str): Especificação, por exemplo '2/4'
+
+    Returns:
+        tuple: (índice base 0, total de fatias)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Fatia inválida: {spec} (use o formato i/N, por exemplo 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Fatia inválida: {spec} (i deve estar entre 1 e N)")
+    return index - 1, count
+
+def read_file(path):
+    """Conteúdo (bytes) de um arquivo no disco"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def group_identical(sizes, read=read_file):
+    """
+    Agrupa os arquivos com conteúdo idêntico
+
+    Só os arquivos com o mesmo tamanho de outro são lidos e comparados pelo
+    hash do conteúdo (o mesmo da pré-varredura).
+
+    Args:
+        sizes (dict): {caminho: tamanho}
+        read (callable): Função que retorna o conteúdo (bytes) de um arquivo
+
+    Returns:
+        list: Grupos (listas ordenadas de caminhos); arquivos únicos formam grupos de um
+    """
+    by_size = defaultdict(list)
+    for path in sizes:
+        by_size[sizes[path]].append(path)
+
+    groups = []
+    for paths in by_size.values():
+        if len(paths) == 1:
+            groups.append(paths)
+            continue
+        by_hash = defaultdict(list)
+        for path in paths:
+            try:
+                key = hashlib.sha1(read(path)).hexdigest()
+            except (OSError, KeyError):
+                key = path  # Ilegível: fica sozinho no grupo
+            by_hash[key].append(path)
+        groups.extend(by_hash.values())
+    return [sorted(group) for group in groups]
+
+def partition_files(file_paths, count, size_of=os.path.getsize, read=read_file):
+    """
+    Divide os arquivos em fatias com tamanho total parecido
+
+    Os arquivos são distribuídos do maior para o menor, sempre para a fatia mais
+    leve. Cópias idênticas ficam na mesma fatia (são analisadas uma vez só e
+    contam uma vez na carga). O resultado só depende dos caminhos e do
+    conteúdo, então todas as máquinas calculam a mesma divisão.
+
+    Args:
+        file_paths (list): Caminhos resolvidos
+        count (int): Número de fatias
+        size_of (callable): Função que retorna o tamanho de um arquivo
+        read (callable): Função que retorna o conteúdo (bytes) de um arquivo
+
+    Returns:
+        list: Uma lista de caminhos (ordenada) por fatia
+    """
+    sizes = {}
+    for path in file_paths:
+        try:
+            sizes[path] = size_of(path)
+        except OSError:
+            sizes[path] = 0
+
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for group in sorted(group_identical(sizes, read), key=lambda g: (-sizes[g[0]], g[0])):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        shards[target].extend(group)
+        loads[target] += sizes[group[0]]
+    return [sorted(shard) for shard in shards]
+
+def select_shard(file_paths, spec, size_of=os.path.getsize, read=read_file):
+    """
+    Retorna apenas os arquivos da fatia indicada
+
+    Args:
+        file_paths (list): Caminhos resolvidos
+        spec (str): Fatia no formato 'i/N'
+        size_of (callable): Função que retorna o tamanho de um arquivo
+        read (callable): Função que retorna o conteúdo (bytes) de um arquivo
+
+    Returns:
+        list: Caminhos desta fatia
+    """
+    index, count = parse_shard_spec(spec)
+    return partition_files(file_paths, count, size_of, read)[index]
@@ -0,0 +1,101 @@
+"""
+Leitura de arquivos fonte por mapeamento em memória (mmap)
+Detecta a codificação pelos primeiros bytes e decodifica apenas o necessário
+"""
+
+import contextlib
+import mmap
+import os
+import re
+
+# Primeiro byte fora da faixa ASCII
+NON_ASCII_RE = re.compile(rb'[\x80-\xff]')
+# Bytes de continuação UTF-8 (não iniciam um caractere)
+UTF8_CONTINUATION_RE = re.compile(rb'[\x80-\xbf]')
+
+# Janela decodificada a partir do primeiro byte não ASCII para decidir entre UTF-8 e ANSI
+PROBE_SIZE = 4096
+
+def detect_encoding(raw):
+    """
+    Detecta a codificação de um arquivo fonte pelo BOM ou pelo primeiro trecho não ASCII
+
+    Args:
+        raw (bytes | mmap.mmap): Conteúdo bruto do arquivo
+
+    Returns:
+        str: Nome da codificação ('utf-8-sig', 'utf-16', 'utf-8' ou 'cp1252')
+    """
+    if raw[:3] == b'\xef\xbb\xbf':
+        return 'utf-8-sig'
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return 'utf-16'
+
+    non_ascii = NON_ASCII_RE.search(raw)
+    if not non_ascii:
+        # Somente ASCII: qualquer codificação compatível serve
+        return 'utf-8'
+
+    probe = raw[non_ascii.start():non_ascii.start() + PROBE_SIZE]
+    try:
+        probe.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # Sequência cortada no fim da janela não conta como erro
+        if e.start >= len(probe) - 3 and e.reason == 'unexpected end of data':
+            return 'utf-8'
+        # Unidades salvas pela IDE sem BOM costumam estar em Windows-1252
+        return 'cp1252'
+
+def bom_length(encoding):
+    """Tamanho em bytes do BOM da codificação detectada"""
+    return 3 if encoding == 'utf-8-sig' else 0
+
+def char_offset(raw, byte_offset, encoding):
+    """
+    Converte uma posição em bytes na posição equivalente no texto decodificado
+
+    Em cp1252 e ASCII cada byte é um caractere; em UTF-8 descontam-se os bytes
+    de continuação, sem decodificar o trecho.
+
+    Args:
+        raw (bytes | mmap.mmap): Conteúdo bruto
+        byte_offset (int): Posição em bytes
+        encoding (str): Codificação detectada
+
+    Returns:
+        int: Posição no texto decodificado
+    """
+    if byte_offset is None:
+        return None
+    start = bom_length(encoding)
+    if encoding in ('utf-8', 'utf-8-sig'):
+        continuation = sum(1 for _ in UTF8_CONTINUATION_RE.finditer(raw, start, byte_offset))
+        return byte_offset - start - continuation
+    return byte_offset - start
+
+@contextlib.contextmanager
+def map_source(file_path):
+    """
+    Mapeia o arquivo em memória somente para leitura
+
+    Yields:
+        tuple: (buffer, stat) - buffer mmap.mmap | bytes (vazio para arquivos vazios)
+            e o os.stat_result do arquivo aberto, obtido antes da leitura
+    """
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivos vazios não podem ser mapeados
+            yield b'', st
+            return
+        try:
+            yield mapped, st
+        finally:
+            mapped.close()
+
+def decode_source(raw, encoding):
+    """Decodifica o conteúdo bruto com a codificação detectada, sem descartar caracteres"""
+    return raw[:].decode(encoding, errors='replace')
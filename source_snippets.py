@@ -0,0 +1,148 @@
+"""
+Trechos do código-fonte exibidos nos relatórios
+Cada arquivo é lido e indexado (início de cada linha) uma única vez; os trechos
+em volta das declarações e dos cabeçalhos de métodos são fatias desse texto
+"""
+
+import html
+import re
+
+from source_reader import decode_source, detect_encoding
+from utils import LRUCache
+
+# Linhas exibidas antes e depois da linha apontada
+DEFAULT_CONTEXT_LINES = 2
+
+# Arquivos indexados mantidos em memória durante a geração do relatório
+DEFAULT_MAX_FILES = 256
+
+NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+
+class LineIndex:
+    """Texto de um arquivo com a posição de início de cada linha"""
+
+    def __init__(self, text):
+        self.text = text
+        self.offsets = [0]
+        self.offsets.extend(m.end() for m in NEWLINE_RE.finditer(text))
+        if self.offsets[-1] < len(text):
+            self.offsets.append(len(text))
+
+    @property
+    def line_count(self):
+        return len(self.offsets) - 1
+
+    def lines(self, first, last):
+        """Linhas first..last (1 = primeira linha), sem as quebras de linha"""
+        first = max(first, 1)
+        last = min(last, self.line_count)
+        if first > last:
+            return []
+        lines = NEWLINE_RE.split(self.text[self.offsets[first - 1]:self.offsets[last]])
+        # A fatia termina na quebra da última linha (exceto no fim do arquivo)
+        return lines[:last - first + 1]
+
+class SnippetCache:
+    """
+    Índices de linhas compartilhados por todos os trechos de um relatório
+
+    Cada arquivo é lido no máximo uma vez enquanto estiver no cache; cópias
+    idênticas (duplicate_of) usam o arquivo original.
+    """
+
+    def __init__(self, context=DEFAULT_CONTEXT_LINES, source=None, max_files=DEFAULT_MAX_FILES):
+        """
+        Args:
+            context (int): Linhas exibidas antes e depois da linha apontada (None = sem trechos)
+            source (SourceArchive, optional): Arquivo compactado de onde os fontes são lidos
+            max_files (int): Arquivos indexados mantidos em memória
+        """
+        self.context = context
+        self.source = source
+        self._indexes = LRUCache(max_files)
+
+    def index(self, path):
+        """
+        Índice de linhas de um arquivo
+
+        Returns:
+            LineIndex: Índice, ou None se o arquivo não pôde ser lido
+        """
+        index = self._indexes.get(path)
+        if index is None:
+            try:
+                if self.source is not None:
+                    raw = self.source.read(path)
+                else:
+                    with open(path, 'rb') as f:
+                        raw = f.read()
+                index = LineIndex(decode_source(raw, detect_encoding(raw)))
+            except (OSError, ValueError):
+                # Arquivo indisponível (ex.: resultados de outra máquina): sem trechos
+                index = False
+            self._indexes.put(path, index)
+        return index or None
+
+    def snippet(self, path, line):
+        """
+        Trecho em volta de uma linha
+
+        Args:
+            path (str): Arquivo
+            line (int): Linha apontada (1 = primeira linha)
+
+        Returns:
+            dict: {'first', 'line', 'lines'}, ou None se não houver o arquivo ou a linha
+        """
+        if not line:
+            return None
+        index = self.index(path)
+        if index is None or line > index.line_count:
+            return None
+        first = max(line - self.context, 1)
+        return {'first': first, 'line': line, 'lines': index.lines(first, line + self.context)}
+
+    def declaration(self, item):
+        """Trecho em volta da declaração de um objeto não liberado"""
+        if self.context is None:
+            return None
+        # Objetos de arquivos {$I} apontam para a linha no arquivo incluído
+        path = item.get('source_file') or item.get('duplicate_of') or item['file']
+        return self.snippet(path, item['line'])
+
+    def method_header(self, item):
+        """Trecho em volta do cabeçalho do método de um objeto não liberado"""
+        if self.context is None or item.get('source_file'):
+            # Com {$I}, o cabeçalho do método pode estar em outro arquivo
+            return None
+        return self.snippet(item.get('duplicate_of') or item['file'], item['method_line'])
+
+def render_snippet(snippet):
+    """
+    HTML de um trecho, com números de linha e a linha apontada destacada
+
+    Returns:
+        str: Bloco <pre class="snippet"> (vazio sem trecho)
+    """
+    if not snippet:
+        return ''
+    width = len(str(snippet['first'] + len(snippet['lines']) - 1))
+    rows = []
+    for number, text in enumerate(snippet['lines'], snippet['first']):
+        row = f'<span class="ln">{number:>{width}}</span> {html.escape(text)}'
+        rows.append(f'<mark>{row}</mark>' if number == snippet['line'] else row)
+    return '<pre class="snippet">' + '\n'.join(rows) + '</pre>'
+
+# Estilo dos trechos, incluído nos relatórios
+SNIPPET_STYLE = """.snippet {
+    font-family: Consolas, monospace;
+    font-size: 12px;
+    background-color: #fbfbfb;
+    border: 1px solid #eee;
+    padding: 6px;
+    margin: 4px 0;
+    overflow-x: auto;
+}
+.snippet .ln { color: #aaa; user-select: none; }
+.snippet mark { background-color: #fff3c4; }
+"""
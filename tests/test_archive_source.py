@@ -0,0 +1,55 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from archive_source import SourceArchive
+from scheduler import plan_tasks
+
+def unit(name, size):
+    return f"unit {name};\n\ninterface\n\nimplementation\n\n{'// ' * size}\nend.\n".encode('utf-8')
+
+# Ordem no arquivo compactado: do menor para o maior
+MEMBERS = [('src/A.pas', unit('A', 10)), ('src/B.pas', unit('B', 400)), ('src/C.pas', unit('C', 2000))]
+
+def write_archive(path):
+    if path.suffix == '.zip':
+        with zipfile.ZipFile(path, 'w') as z:
+            for name, data in MEMBERS:
+                z.writestr(name, data)
+    else:
+        with tarfile.open(path, 'w:gz') as t:
+            for name, data in MEMBERS:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                t.addfile(info, io.BytesIO(data))
+
+@pytest.mark.parametrize('archive_name', ['fontes.zip', 'fontes.tar.gz'])
+def test_members_are_prescanned_in_schedule_order(tmp_path, archive_name):
+    path = tmp_path / archive_name
+    write_archive(path)
+    source = SourceArchive(str(path))
+    try:
+        names = [name for name, _ in MEMBERS]
+        ordered = list(dict.fromkeys(task['path'] for task in plan_tasks(names, 2, size_of=source.size)))
+        scanned = list(source.prescan_members(ordered + ['src/X.pas']))
+    finally:
+        source.close()
+
+    assert ordered == ['src/C.pas', 'src/B.pas', 'src/A.pas']
+    assert [(name, u and u['unit_name']) for name, u in scanned] == \
+        [('src/C.pas', 'C'), ('src/B.pas', 'B'), ('src/A.pas', 'A'), ('src/X.pas', None)]
+
+def test_tar_members_read_early_respect_the_memory_limit(tmp_path):
+    path = tmp_path / 'fontes.tar.gz'
+    write_archive(path)
+    source = SourceArchive(str(path))
+    try:
+        scanned = [name for name, _ in source.prescan_members(['src/C.pas', 'src/B.pas', 'src/A.pas'], max_buffer_bytes=100)]
+    finally:
+        source.close()
+
+    # Acima do limite, os membros guardados seguem na ordem do arquivo
+    assert sorted(scanned) == ['src/A.pas', 'src/B.pas', 'src/C.pas']
+    assert scanned[-1] == 'src/C.pas'
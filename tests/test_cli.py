@@ -0,0 +1,40 @@
+import json
+import zipfile
+
+from cli import main
+
+UNIT = """unit Unidade{i};
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  // trecho-da-unidade-{i}
+  Lista := TStringList.Create;
+end;
+
+end.
+"""
+
+def test_merge_reads_snippets_from_the_source_and_records_history(tmp_path):
+    archive = tmp_path / 'versao.zip'
+    with zipfile.ZipFile(archive, 'w') as z:
+        for i in range(2):
+            z.writestr(f'src/Unidade{i}.pas', UNIT.format(i=i))
+    shards = []
+    for shard in ('1/2', '2/2'):
+        output = tmp_path / f"fatia{shard[0]}.json"
+        assert main(['analyze', str(archive), '--shard', shard, '--output', str(output), '--quiet']) == 0
+        shards.append(str(output))
+
+    report = tmp_path / 'relatorio.html'
+    assert main(['merge', *shards, '--source', str(archive), '--report', str(report)]) == 0
+
+    html = report.read_text(encoding='utf-8')
+    assert 'trecho-da-unidade-0' in html and 'trecho-da-unidade-1' in html
+    runs = [json.loads(line) for line in (tmp_path / 'memory_leak_history.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert [(run['files'], run['leaks']) for run in runs] == [(2, 2)]
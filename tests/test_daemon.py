@@ -0,0 +1,86 @@
+import os
+
+from daemon import AnalysisDaemon
+
+UNIT = """unit ComInclude;
+
+interface
+
+implementation
+
+{$I metodos.inc}
+
+end.
+"""
+
+LEAKING_METHOD = """procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+  Lista.Add('x');
+end;
+"""
+
+RELEASING_METHOD = LEAKING_METHOD.replace("  Lista.Add('x');\n", "  Lista.Add('x');\n  Lista.Free;\n")
+
+def write(path, text, mtime_ns=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_include_edit_invalidates_cached_findings(tmp_path):
+    unit_path = tmp_path / 'ComInclude.pas'
+    include_path = tmp_path / 'metodos.inc'
+    write(unit_path, UNIT)
+    write(include_path, LEAKING_METHOD, mtime_ns=1_000_000_000)
+
+    daemon = AnalysisDaemon()
+    first = daemon.analyze_file(str(unit_path))
+    assert [f['object_name'] for f in first['findings']] == ['Lista']
+    assert daemon.analyze_file(str(unit_path))['cached']
+
+    write(include_path, RELEASING_METHOD, mtime_ns=2_000_000_000)
+    second = daemon.analyze_file(str(unit_path))
+    assert not second['cached']
+    assert second['findings'] == []
+
+def test_long_lived_caches_are_bounded():
+    daemon = AnalysisDaemon(max_entries=200)
+    for i in range(10):
+        daemon._include_cache([f'dir{i}'])
+    assert len(daemon.include_caches) == 2
+
+RELEASE_RULE_UNIT = """unit Seguro;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+  Descartar(Lista);
+end;
+
+end.
+"""
+
+def test_project_rules_apply_and_rule_edits_invalidate_results(tmp_path):
+    path = str(tmp_path / 'Seguro.pas')
+    write(path, RELEASE_RULE_UNIT)
+    daemon = AnalysisDaemon()
+
+    assert [f['object_name'] for f in daemon.analyze_file(path)['findings']] == ['Lista']
+
+    rules_path = str(tmp_path / 'memory_rules.json')
+    write(rules_path, '{"release_functions": ["Descartar"]}')
+    result = daemon.analyze_file(path)
+    assert result == {'findings': [], 'cached': False}
+    assert daemon.analyze_file(path)['cached']
+
+    write(rules_path, '{"release_functions": []}', mtime_ns=os.stat(rules_path).st_mtime_ns + 1_000_000_000)
+    assert [f['object_name'] for f in daemon.analyze_file(path)['findings']] == ['Lista']
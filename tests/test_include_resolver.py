@@ -0,0 +1,85 @@
+import os
+
+from include_resolver import IncludeCache, expand_includes, include_dependencies
+from pas_analyzer import analyze_pas_files
+
+def test_cache_dir_shares_scanned_includes_between_caches(tmp_path):
+    path = tmp_path / 'comum.inc'
+    path.write_text('{$I outro.inc}\n', encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+
+    first = IncludeCache(cache_dir=cache_dir).get(str(path))
+
+    # Mesmo tamanho e data: outro processo deve usar a varredura gravada em disco
+    st = os.stat(path)
+    path.write_text('{$I xxxxx.inc}\n', encoding='utf-8')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    second = IncludeCache(cache_dir=cache_dir).get(str(path))
+
+    assert second == first
+    assert [d[2] for d in second['directives']] == ['outro.inc']
+    assert IncludeCache().get(str(path))['text'] == '{$I xxxxx.inc}\n'
+
+UNIT = """unit {name};
+
+interface
+
+implementation
+
+{{$I metodos.inc}}
+
+end.
+"""
+
+METHODS = """procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+end;
+"""
+
+def test_processes_expand_shared_include(tmp_path):
+    (tmp_path / 'metodos.inc').write_text(METHODS, encoding='utf-8')
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'Unidade{i}.pas'
+        path.write_text(UNIT.format(name=f'Unidade{i}') + '\n' * i, encoding='utf-8')
+        paths.append(str(path))
+
+    sequential = analyze_pas_files(paths, io_workers=0)
+    parallel = analyze_pas_files(paths, io_workers=0, workers=2)
+
+    assert len(sequential) == 3
+    assert sorted((r['file'], r['object_name'], r['line']) for r in parallel) == \
+        sorted((r['file'], r['object_name'], r['line']) for r in sequential)
+
+COMMENTED_UNIT = """unit Comentada;
+
+interface
+
+implementation
+
+// {$I ausente.inc}
+(* {$INCLUDE ausente.inc} *)
+{ antigo: {$I ausente.inc} }
+const Texto = '{$I ausente.inc}';
+
+{$I metodos.inc}
+
+end.
+"""
+
+def test_commented_out_includes_are_ignored(tmp_path):
+    (tmp_path / 'metodos.inc').write_text(METHODS, encoding='utf-8')
+    path = tmp_path / 'Comentada.pas'
+    path.write_text(COMMENTED_UNIT, encoding='utf-8')
+    cache = IncludeCache()
+    messages = []
+
+    assert include_dependencies(COMMENTED_UNIT, str(path), cache) == [str(tmp_path / 'metodos.inc')]
+    expanded, _ = expand_includes(COMMENTED_UNIT, str(path), cache, messages.append)
+
+    assert messages == []
+    assert "const Texto = '{$I ausente.inc}';" in expanded
+    assert [r['object_name'] for r in analyze_pas_files([str(path)], io_workers=0)] == ['Lista']
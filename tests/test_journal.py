@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from journal import RunJournal
+from pas_analyzer import analyze_pas_files
+
+LEAKING_UNIT = """unit {name};
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+end;
+
+end.
+"""
+
+RELEASING_UNIT = LEAKING_UNIT.replace("TStringList.Create;\n", "TStringList.Create;\n  Lista.Free;\n")
+
+class Interrupted(Exception):
+    pass
+
+def write_units(folder, count=5):
+    paths = []
+    for i in range(count):
+        path = folder / f'Unidade{i}.pas'
+        path.write_text(LEAKING_UNIT.format(name=f'Unidade{i}'), encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+def interrupt_after(count):
+    seen = []
+    def callback(file_path, results):
+        seen.append(file_path)
+        if len(seen) > count:
+            raise Interrupted()
+    return callback
+
+def test_torn_last_line_is_dropped_and_journal_stays_appendable(tmp_path):
+    journal_path = str(tmp_path / 'diario.jsonl')
+    paths = write_units(tmp_path, 3)
+    journal = RunJournal(journal_path, 'config')
+    analyze_pas_files(paths[:2], io_workers=0, journal=journal)
+    journal.close()
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "' + paths[2].replace('\\', '\\\\') + '", "mtime_ns": 1')
+
+    journal = RunJournal(journal_path, 'config', resume=True)
+    assert sorted(journal.entries) == sorted(paths[:2])
+    analyze_pas_files(paths[2:], io_workers=0, journal=journal)
+    journal.close()
+
+    assert sorted(RunJournal(journal_path, 'config', resume=True).entries) == sorted(paths)
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    paths = write_units(tmp_path)
+    expected = analyze_pas_files(paths, io_workers=0)
+
+    journal_path = str(tmp_path / 'diario.jsonl')
+    journal = RunJournal(journal_path, 'config')
+    with pytest.raises(Interrupted):
+        analyze_pas_files(paths, io_workers=0, journal=journal, results_callback=interrupt_after(2))
+    journal.close()
+
+    stats = {}
+    journal = RunJournal(journal_path, 'config', resume=True)
+    resumed = analyze_pas_files(paths, io_workers=0, journal=journal, stats=stats)
+    journal.close()
+
+    assert stats['files_resumed'] == 2
+    assert stats['methods_analyzed'] == 3
+    assert resumed == expected
+
+def test_edit_during_analysis_is_not_resumed(tmp_path):
+    paths = write_units(tmp_path, 2)
+    journal_path = str(tmp_path / 'diario.jsonl')
+
+    def edit_while_analyzing(file_path, results):
+        # O arquivo muda depois de lido e antes de ser gravado no diário
+        if file_path == paths[0]:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(RELEASING_UNIT.format(name='Unidade0'))
+            st = os.stat(file_path)
+            os.utime(file_path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    journal = RunJournal(journal_path, 'config')
+    analyze_pas_files(paths, io_workers=0, journal=journal, results_callback=edit_while_analyzing)
+    journal.close()
+
+    journal = RunJournal(journal_path, 'config', resume=True)
+    results = analyze_pas_files(paths, io_workers=0, journal=journal)
+    journal.close()
+
+    assert [item['file'] for item in results] == [paths[1]]
@@ -0,0 +1,62 @@
+import io
+import json
+import pathlib
+
+from lsp_server import LanguageServer, analyze_document
+
+UNIT = """unit Seguro;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+  Descartar(Lista);
+end;
+
+end.
+"""
+
+def test_document_rules_come_from_its_folder(tmp_path):
+    (tmp_path / 'memory_rules.json').write_text('{"release_functions": ["Descartar"]}', encoding='utf-8')
+    server = LanguageServer(reader=object(), writer=object())
+    rules = server.rules_for((tmp_path / 'Seguro.pas').as_uri())
+    method_results = {}
+
+    assert analyze_document(UNIT, method_results, rules) == []
+    # Resultados por método não são reaproveitados com outras regras
+    assert [d['message'].split("'")[1] for d in analyze_document(UNIT, method_results)] == ['Lista']
+
+def test_untitled_documents_use_default_rules():
+    server = LanguageServer(reader=object(), writer=object())
+    assert server.rules_for('untitled:Untitled-1').signature() == server.rules_for(
+        pathlib.Path('/nao/existe/Unit1.pas').as_uri()).signature()
+
+def frame(body):
+    return f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body
+
+def read_responses(data):
+    responses = []
+    while data:
+        header, _, rest = data.partition(b'\r\n\r\n')
+        length = int(header.split(b':')[1])
+        responses.append(json.loads(rest[:length]))
+        data = rest[length:]
+    return responses
+
+def test_bad_frame_is_reported_and_the_server_keeps_reading():
+    valid = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'shutdown'}).encode('utf-8')
+    exit_message = json.dumps({'jsonrpc': '2.0', 'method': 'exit'}).encode('utf-8')
+    reader = io.BytesIO(frame(b'{"jsonrpc": "2.0", "id": 0, "meth') + frame(b'[1, 2]') + frame(valid) + frame(exit_message))
+    writer = io.BytesIO()
+
+    assert LanguageServer(reader=reader, writer=writer).serve() == 0
+
+    errors, invalid, shutdown = read_responses(writer.getvalue())
+    assert errors['error']['code'] == -32700 and errors['id'] is None
+    assert invalid['error']['code'] == -32600
+    assert shutdown == {'jsonrpc': '2.0', 'id': 1, 'result': None}
@@ -0,0 +1,159 @@
+from object_tracker import USAGE_RE, DelphiMemoryAnalyzer, FileMemoryAnalyzer
+from pas_analyzer import iter_methods
+
+MANY_ARGUMENTS_UNIT = """unit ManyArgs;
+
+interface
+
+implementation
+
+procedure Chamar;
+var
+  A, B, C, D, E: TStringList;
+begin
+  Processar(A, B, C, D, E);
+end;
+
+procedure Liberar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+  try
+    Lista.Add('x');
+  finally
+    Lista.Free;
+  end;
+end;
+
+end.
+"""
+
+def per_method_findings(content):
+    analyzer = DelphiMemoryAnalyzer()
+    findings = []
+    for method in iter_methods(content):
+        code = content[method['start']:method['end']]
+        for obj in analyzer.find_unreleased_objects(code, method['name']):
+            findings.append((method['name'], obj['name'], obj['line']))
+    return sorted(findings)
+
+def file_findings(content):
+    methods = list(iter_methods(content))
+    return sorted(
+        (method['name'], obj['name'], obj['line'])
+        for method, obj in FileMemoryAnalyzer().find_unreleased_objects_in_file(content, methods)
+    )
+
+def test_usage_pattern_matches_every_call_argument():
+    names = [m.group(1) or m.group(2) or m.group(3) for m in USAGE_RE.finditer("Foo(a, b, c, d, e);")]
+    assert names == ['a', 'b', 'c', 'd', 'e']
+
+def test_file_analyzer_matches_per_method_analyzer_with_many_arguments():
+    expected = per_method_findings(MANY_ARGUMENTS_UNIT)
+    assert {name for _, name, _ in expected} == {'A', 'B', 'C', 'D', 'E'}
+    assert file_findings(MANY_ARGUMENTS_UNIT) == expected
+
+PRIMITIVE_LOCALS_UNIT = """unit Primitivos;
+
+interface
+
+implementation
+
+procedure Contar;
+var
+  Total: Integer;
+  Grande: Int64;
+  Quando: TDateTime;
+begin
+  Total := 0;
+end;
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+end;
+
+procedure Referenciar;
+var
+  Item: IInterface;
+begin
+  Item := nil;
+end;
+
+end.
+"""
+
+def test_prefilter_skips_methods_with_only_primitive_locals():
+    methods = list(iter_methods(PRIMITIVE_LOCALS_UNIT))
+    analyzer = FileMemoryAnalyzer()
+    analyzer.find_unreleased_objects_in_file(PRIMITIVE_LOCALS_UNIT, methods)
+    assert analyzer.stats == {'methods_analyzed': 2, 'methods_skipped': 1}
+
+    analyzer = DelphiMemoryAnalyzer()
+    for method in methods:
+        analyzer.find_unreleased_objects(PRIMITIVE_LOCALS_UNIT[method['start']:method['end']], method['name'])
+    assert analyzer.stats == {'methods_analyzed': 2, 'methods_skipped': 1}
+
+MIXED_UNIT = """unit Misturada;
+
+interface
+
+implementation
+
+uses
+  Classes, SysUtils;
+
+procedure LiberaNoFinally;
+var
+  Lista: TStringList;
+  Fluxo: TMemoryStream;
+begin
+  Lista := TStringList.Create;
+  Fluxo := TMemoryStream.Create;
+  try
+    Lista.SaveToStream(Fluxo);
+  finally
+    FreeAndNil(Fluxo);
+    Lista.Free;
+  end;
+end;
+
+procedure EsqueceUm;
+var
+  Usado, Esquecido: TStringList;
+  Contador: Integer;
+begin
+  Usado := TStringList.Create;
+  Esquecido := TStringList.Create;
+  for Contador := 0 to 10 do
+  begin
+    Esquecido.Add(IntToStr(Contador));
+  end;
+  Usado.DisposeOf;
+end;
+
+function CriaLista: TStringList;
+var
+  Temporaria: TStringList;
+begin
+  Temporaria := TStringList.Create;
+  Result := TStringList.Create;
+end;
+
+procedure SoDeclara;
+var
+  Nunca: TStringList;
+begin
+end;
+
+end.
+"""
+
+def test_file_analyzer_matches_per_method_analyzer_on_mixed_unit():
+    expected = per_method_findings(MIXED_UNIT)
+    assert {name for _, name, _ in expected} >= {'Esquecido', 'Temporaria'}
+    assert not {name for _, name, _ in expected} & {'Lista', 'Fluxo', 'Usado'}
+    assert file_findings(MIXED_UNIT) == expected
@@ -0,0 +1,89 @@
+import pytest
+
+from pas_analyzer import analyze_pas_file, analyze_pas_file_part, analyze_pas_files, merge_file_parts
+from prescan import prescan_unit
+
+def build_unit(methods=12):
+    """Unidade com campos criados e liberados em métodos distantes e vários vazamentos locais"""
+    parts = ["""unit Grande;
+
+interface
+
+type
+  TServico = class
+  private
+    FLista: TStringList;
+    FCache: TStringList;
+    FLog: TStringList;
+  public
+    constructor Create;
+    destructor Destroy; override;
+  end;
+
+implementation
+
+constructor TServico.Create;
+begin
+  FLista := TStringList.Create;
+  FCache := TStringList.Create;
+  FLog := TStringList.Create;
+end;
+"""]
+    for i in range(methods):
+        parts.append(f"""
+procedure Metodo{i};
+var
+  Local{i}: TStringList;
+  Liberado{i}: TStringList;
+begin
+  Local{i} := TStringList.Create;
+  Liberado{i} := TStringList.Create;
+  try
+    Local{i}.Add('{i}');
+  finally
+    Liberado{i}.Free;
+  end;
+end;
+""")
+    parts.append("""
+destructor TServico.Destroy;
+begin
+  FLista.Free;
+  FreeAndNil(FCache);
+  inherited;
+end;
+
+end.
+""")
+    return ''.join(parts)
+
+def finding_keys(results):
+    return sorted((r['method_name'], r['object_name'], r['line']) for r in results)
+
+@pytest.mark.parametrize('count', [2, 3, 5])
+def test_split_parts_match_single_pass(tmp_path, count):
+    path = tmp_path / 'Grande.pas'
+    path.write_text(build_unit(), encoding='utf-8')
+
+    single = analyze_pas_file(str(path), unit=prescan_unit(str(path)))
+    parts = [analyze_pas_file_part(str(path), prescan_unit(str(path)), (i, count)) for i in range(count)]
+    merged = merge_file_parts(str(path), parts)
+
+    assert finding_keys(merged) == finding_keys(single)
+    names = {r['object_name'] for r in single}
+    assert {'Local0', 'Local11', 'FLog'} <= names
+    assert not names & {'FLista', 'FCache', 'Liberado0'}
+
+def test_split_large_in_processes_matches_sequential_run(tmp_path):
+    large = tmp_path / 'Grande.pas'
+    large.write_text(build_unit(40), encoding='utf-8')
+    small = tmp_path / 'Pequena.pas'
+    small.write_text(build_unit(1).replace('unit Grande;', 'unit Pequena;'), encoding='utf-8')
+    files = [str(large), str(small)]
+
+    sequential = analyze_pas_files(files, io_workers=0)
+    stats = {}
+    parallel = analyze_pas_files(files, io_workers=0, workers=2, split_large=True, stats=stats)
+
+    assert finding_keys(parallel) == finding_keys(sequential)
+    assert stats['methods_analyzed'] > 40
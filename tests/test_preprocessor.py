@@ -0,0 +1,114 @@
+import pytest
+
+from dproj_parser import resolve_project
+from pas_analyzer import analyze_pas_files
+from preprocessor import PreprocessorCache, evaluate_expression
+
+DEFINES = {'DEBUG', 'MSWINDOWS'}
+
+@pytest.mark.parametrize('expression, expected', [
+    ('Defined(DEBUG)', True),
+    ('not Defined(DEBUG)', False),
+    ('defined(RELEASE) or Defined(MSWINDOWS)', True),
+    ('Defined(DEBUG) and not (Defined(RELEASE) or Defined(LINUX))', True),
+    ('Defined(DEBUG) and Defined(LINUX)', False),
+    ('CompilerVersion >= 36', True),
+    ('CompilerVersion < 20', False),
+    ('RTLVersion <> 36.0', False),
+    ('Declared(TFormatSettings)', True),
+])
+def test_evaluate_expression(expression, expected):
+    assert evaluate_expression(expression, DEFINES) is expected
+
+@pytest.mark.parametrize('expression', [
+    "__import__('os').system('echo x')",
+    'Defined(DEBUG) and',
+    '(Defined(RELEASE)',
+    'SizeOf(Pointer) = 8',
+])
+def test_unrecognized_expression_is_true_and_not_executed(expression):
+    assert evaluate_expression(expression, set()) is True
+
+UNIT = """unit Config;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+{$IF Defined(RELEASE) and not Defined(DEBUG)}
+  Lista.Free;
+{$IFEND}
+end;
+
+end.
+"""
+
+def test_preprocessor_cache_is_shared_between_calls(tmp_path):
+    path = tmp_path / 'Config.pas'
+    path.write_text(UNIT, encoding='utf-8')
+    cache = PreprocessorCache(max_entries=10)
+
+    debug = analyze_pas_files([str(path)], defines=['DEBUG'], io_workers=0, preprocessor_cache=cache)
+    release = analyze_pas_files([str(path)], defines=['RELEASE'], io_workers=0, preprocessor_cache=cache)
+    again = analyze_pas_files([str(path)], defines=['DEBUG'], io_workers=0, preprocessor_cache=cache)
+
+    assert [item['object_name'] for item in debug] == ['Lista']
+    assert release == []
+    assert again == debug
+    # As diretivas do arquivo foram varridas uma única vez para as duas configurações
+    assert cache._directives.misses == 1
+    assert cache._results.hits == 1
+
+PLATFORM_UNIT = """unit Plataforma;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+{$IFDEF WIN32}
+  Lista.Free;
+{$ENDIF}
+end;
+
+end.
+"""
+
+DPROJ = """<Project xmlns="http://schemas.microsoft.com/developer/msbuild/2003">
+  <PropertyGroup>
+    <Config Condition="'$(Config)'==''">Debug</Config>
+    <Platform Condition="'$(Platform)'==''">{platform}</Platform>
+  </PropertyGroup>
+  <ItemGroup>
+    <DCCReference Include="Plataforma.pas"/>
+  </ItemGroup>
+</Project>
+"""
+
+@pytest.mark.parametrize('platform, leaks', [('Win32', False), ('Win64', True)])
+def test_platform_symbols_follow_the_project_platform(tmp_path, platform, leaks):
+    (tmp_path / 'Plataforma.pas').write_text(PLATFORM_UNIT, encoding='utf-8')
+    dproj = tmp_path / 'App.dproj'
+    dproj.write_text(DPROJ.replace('{platform}', platform), encoding='utf-8')
+
+    project = resolve_project(str(dproj))
+    findings = analyze_pas_files(project['files'], defines=project['defines'], io_workers=0)
+
+    assert bool(findings) is leaks
+    assert ('WIN64' in project['defines']) is (platform == 'Win64')
+
+def test_symbols_without_a_platform_default_to_win32(tmp_path):
+    path = tmp_path / 'Plataforma.pas'
+    path.write_text(PLATFORM_UNIT, encoding='utf-8')
+
+    assert analyze_pas_files([str(path)], defines=['DEBUG'], io_workers=0) == []
+    assert [item['object_name'] for item in analyze_pas_files([str(path)], defines=['WIN64'], io_workers=0)] == ['Lista']
@@ -0,0 +1,34 @@
+from project import Project
+
+UNIT = """unit Incluida;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+  {$I liberar.inc}
+end;
+
+end.
+"""
+
+def test_invalidating_an_include_reanalyzes_the_units_that_include_it(tmp_path):
+    include = tmp_path / 'liberar.inc'
+    include.write_text('Lista.Free;\n', encoding='utf-8')
+    path = tmp_path / 'Incluida.pas'
+    path.write_text(UNIT, encoding='utf-8')
+    project = Project(str(path))
+
+    assert project.findings == []
+    assert [m['name'] for m in project.methods(str(path))] == ['Criar']
+
+    include.write_text('// nada a liberar\n', encoding='utf-8')
+    project.invalidate(str(include))
+
+    assert [item['object_name'] for item in project.findings] == ['Lista']
+    assert project.stats['findings'] == 1
@@ -0,0 +1,59 @@
+import json
+import os
+
+from pas_analyzer import analyze_pas_files
+from report_pages import MANIFEST_NAME, generate_report_pages, page_name
+
+UNIT = """unit Tela;
+
+interface
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+end;
+
+end.
+"""
+
+def analyze(folder, name):
+    path = folder / name
+    path.write_text(UNIT, encoding='utf-8')
+    return analyze_pas_files([str(path)], io_workers=0)
+
+def test_index_links_are_url_quoted_and_escaped(tmp_path):
+    results = analyze(tmp_path, 'Tela "Nova" #1 & 2.pas')
+    output = tmp_path / 'relatorio'
+    generate_report_pages(results, str(output), workers=1)
+
+    name = page_name(results[0]['file'])
+    index = (output / 'index.html').read_text(encoding='utf-8')
+    assert os.path.isfile(output / name)
+    assert 'href="units/Tela%20%22Nova%22%20%231%20%26%202-' in index
+    assert f'href="{name}"' not in index
+
+def test_only_generated_unit_pages_are_removed(tmp_path):
+    output = tmp_path / 'relatorio'
+    generate_report_pages(analyze(tmp_path, 'Antiga.pas'), str(output), workers=1)
+    old_page = output / page_name(str(tmp_path / 'Antiga.pas'))
+    assert old_page.is_file()
+
+    # Manifesto alterado à mão (ou de outra ferramenta) apontando para outros arquivos
+    keep = tmp_path / 'importante.txt'
+    keep.write_text('x', encoding='utf-8')
+    (output / 'units' / 'notas.html').write_text('x', encoding='utf-8')
+    manifest = json.loads((output / MANIFEST_NAME).read_text(encoding='utf-8'))
+    manifest.update({'../importante.txt': 'x', 'units/notas.html': 'x', 'style.css': 'x'})
+    (output / MANIFEST_NAME).write_text(json.dumps(manifest), encoding='utf-8')
+
+    stats = generate_report_pages(analyze(tmp_path, 'Nova.pas'), str(output), workers=1)
+
+    assert stats['removed'] == 1
+    assert not old_page.exists()
+    assert keep.is_file()
+    assert (output / 'units' / 'notas.html').is_file()
+    assert (output / 'style.css').is_file()
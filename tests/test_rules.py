@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from object_tracker import DelphiMemoryAnalyzer
+from rules import MemoryRules, load_rules
+
+EXAMPLE_RULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'memory_rules.example.json')
+
+def test_ownership_call_uses_the_configured_argument():
+    rules = load_rules(EXAMPLE_RULES)
+    code = "List.AddObject('x', Obj); List.Insert(0, Obj2); List.Add(Obj3);"
+    assert [name for _, name in rules.released_names(code)] == ['Obj', 'Obj2', 'Obj3']
+
+def test_ownership_call_skips_literals_and_nested_calls():
+    rules = MemoryRules(ownership_calls=[{'name': 'AddObject', 'arg': 2}, {'name': 'Insert', 'arg': 2}])
+    code = "L.AddObject(Format('%d, %d', [1, 2]), Obj); L.Insert(0, 1);"
+    assert [name for _, name in rules.released_names(code)] == ['Obj']
+
+def test_owned_object_is_not_reported():
+    rules = load_rules(EXAMPLE_RULES)
+    code = """procedure Preencher(Lista: TStringList);
+var
+  Item: TObject;
+begin
+  Item := TObject.Create;
+  Lista.AddObject('item', Item);
+end;
+"""
+    assert DelphiMemoryAnalyzer(rules=rules).find_unreleased_objects(code, 'Preencher') == []
+    assert [obj['name'] for obj in DelphiMemoryAnalyzer().find_unreleased_objects(code, 'Preencher')] == ['Item']
+
+def test_invalid_argument_position_is_rejected():
+    with pytest.raises(ValueError):
+        MemoryRules(ownership_calls=[{'name': 'Add', 'arg': 0}])
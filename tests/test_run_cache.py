@@ -0,0 +1,90 @@
+import os
+import shutil
+
+from pas_analyzer import analyze_pas_files
+from run_cache import RunCache
+
+BASE = """unit Base;
+
+interface
+
+type
+  TBase = class
+  end;
+
+implementation
+
+end.
+"""
+
+def user_unit(name):
+    return f"""unit {name};
+
+interface
+
+uses
+  Base;
+
+implementation
+
+procedure Criar;
+var
+  Lista: TStringList;
+begin
+  Lista := TStringList.Create;
+end;
+
+end.
+"""
+
+def write(path, text, bump=0):
+    path.write_text(text, encoding='utf-8')
+    if bump:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+def make_tree(folder):
+    write(folder / 'Base.pas', BASE)
+    for name in ('Cliente', 'Pedido', 'Produto'):
+        write(folder / f'{name}.pas', user_unit(name))
+    return sorted(str(p) for p in folder.glob('*.pas'))
+
+def test_streamed_plan_matches_list_plan(tmp_path):
+    paths = make_tree(tmp_path)
+    list_cache = str(tmp_path / 'lista.json')
+    expected = analyze_pas_files(paths, io_workers=0, run_cache=RunCache(list_cache))
+    stream_cache = str(tmp_path / 'fluxo.json')
+    shutil.copy(list_cache, stream_cache)
+
+    # Interface de Base alterada: todas as unidades que a usam são reanalisadas
+    write(tmp_path / 'Base.pas', BASE.replace('end;\n\nimplementation', '  TOutra = class\n  end;\n\nimplementation'),
+          bump=1_000_000_000)
+    listed, streamed = {}, {}
+    list_results = analyze_pas_files(paths, io_workers=0, run_cache=RunCache(list_cache), stats=listed)
+    stream_results = analyze_pas_files(iter(paths), io_workers=0, run_cache=RunCache(stream_cache), stats=streamed)
+
+    assert list_results == stream_results == expected
+    assert listed['files_cached'] == streamed['files_cached'] == 0
+    assert listed['methods_analyzed'] == streamed['methods_analyzed'] == 3
+
+def test_changed_files_are_analyzed_while_the_scan_continues(tmp_path):
+    paths = make_tree(tmp_path)
+    cache_path = str(tmp_path / 'cache.json')
+    analyze_pas_files(paths, io_workers=0, run_cache=RunCache(cache_path))
+    changed = str(tmp_path / 'Cliente.pas')
+    write(tmp_path / 'Cliente.pas', user_unit('Cliente') + '\n', bump=1_000_000_000)
+
+    events = []
+
+    def scan():
+        for path in paths:
+            events.append(('scan', path))
+            yield path
+
+    stats = {}
+    results = analyze_pas_files(scan(), io_workers=0, run_cache=RunCache(cache_path), stats=stats,
+                                results_callback=lambda path, _: events.append(('done', path)))
+
+    assert events.index(('done', changed)) < events.index(('scan', paths[-1]))
+    assert stats['files_cached'] == 3
+    assert sorted({r['file'] for r in results}) == sorted(p for p in paths if not p.endswith('Base.pas'))
@@ -0,0 +1,22 @@
+from sharding import partition_files, select_shard
+
+def test_identical_files_land_in_the_same_shard(tmp_path):
+    paths = []
+    for folder in ('a', 'b', 'c'):
+        (tmp_path / folder).mkdir()
+        for name, text in (('Comum.pas', 'unit Comum; end.'), ('Outro.pas', f'unit Outro; {{{folder}}} end.')):
+            path = tmp_path / folder / name
+            path.write_text(text, encoding='utf-8')
+            paths.append(str(path))
+    copies = sorted(p for p in paths if p.endswith('Comum.pas'))
+
+    shards = partition_files(paths, 3)
+    assert sorted(p for shard in shards for p in shard) == sorted(paths)
+    assert [copies] == [[p for p in shard if p in copies] for shard in shards if set(copies) & set(shard)]
+    assert all(select_shard(paths, f'{i + 1}/3') == shards[i] for i in range(3))
+
+def test_partition_without_copies_balances_by_size():
+    sizes = {'a.pas': 50, 'b.pas': 40, 'c.pas': 30, 'd.pas': 20}
+    contents = {path: path.encode() for path in sizes}
+    shards = partition_files(list(sizes), 2, size_of=sizes.get, read=contents.get)
+    assert shards == [['a.pas', 'd.pas'], ['b.pas', 'c.pas']]
@@ -0,0 +1,28 @@
+from prescan import prescan_unit
+from utils import extract_unit_name, is_delphi_unit
+
+LICENSE = '{' + ' Licenciado sob a licença MIT; veja LICENSE.' * 100 + ' }\n// Gerado por ferramenta\n(* ---- *)\n'
+UNIT = LICENSE + 'unit Longa.Cabecalho;\n\ninterface\n\nimplementation\n\nend.\n'
+
+def test_unit_after_long_license_header_is_recognized(tmp_path):
+    path = tmp_path / 'Longa.pas'
+    path.write_text(UNIT, encoding='utf-8')
+    assert len(LICENSE) > 4000
+    assert is_delphi_unit(str(path))
+    assert is_delphi_unit(str(path), UNIT)
+    assert prescan_unit(str(path))['is_unit']
+    assert extract_unit_name(str(tmp_path / 'Outra.pas'), LICENSE + 'unit Outra;\n') == 'Outra'
+
+def test_unterminated_comment_is_not_a_unit(tmp_path):
+    path = tmp_path / 'Quebrado.pas'
+    path.write_text(LICENSE[:-20], encoding='utf-8')
+    assert not is_delphi_unit(str(path))
+    assert not is_delphi_unit(str(tmp_path / 'Programa.pas'), LICENSE + 'program Programa;\n')
+
+def test_dotted_unit_names_are_extracted(tmp_path):
+    path = tmp_path / 'Vendor.Utils.pas'
+    path.write_text('unit Vendor.Utils ;\n\ninterface\n\nimplementation\n\nend.\n', encoding='utf-8')
+    other = str(tmp_path / 'Outro.pas')
+    assert is_delphi_unit(str(path))
+    assert prescan_unit(str(path))['unit_name'] == 'Vendor.Utils'
+    assert extract_unit_name(other, 'unit Vendor.Utils;\n') == 'Vendor.Utils'
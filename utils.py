@@ -1,28 +1,68 @@
 import os
 import re
+import threading
+from collections import OrderedDict
 
-def is_delphi_unit(file_path):
+def atomic_write(path, data):
+    """Grava o arquivo de forma atômica (outros processos nunca veem escrita parcial)"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# Espaços e comentários antes da declaração 'unit' (ex.: cabeçalhos de licença)
+LEADING_COMMENTS_RE = re.compile(r"(?:\s+|//[^\n]*|\{[^}]*\}|\(\*.*?\*\))*", re.DOTALL)
+
+# Declaração da unidade; nomes com pontos (Vendor.Utils) são válidos
+UNIT_HEADER_RE = re.compile(r'^\s*unit\s+([\w.]+)\s*;', re.IGNORECASE | re.MULTILINE)
+
+# Caracteres examinados depois dos comentários iniciais
+HEADER_WINDOW = 1000
+
+def unit_header(content):
+    """Início do conteúdo: os comentários iniciais e mais HEADER_WINDOW caracteres"""
+    return content[:LEADING_COMMENTS_RE.match(content).end() + HEADER_WINDOW]
+
+def read_unit_header(file_path):
+    """Lê apenas o início do arquivo, estendido até depois dos comentários iniciais"""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read(HEADER_WINDOW)
+        # Comentários longos: continua lendo até passar deles (ou até o fim do arquivo)
+        while True:
+            end = LEADING_COMMENTS_RE.match(content).end()
+            if end + HEADER_WINDOW <= len(content) and not content.startswith(('{', '(*'), end):
+                break
+            chunk = f.read(max(len(content), HEADER_WINDOW))
+            if not chunk:
+                break
+            content += chunk
+    return unit_header(content)
+
+def is_delphi_unit(file_path, content=None):
     """
     Verifica se um arquivo é uma unidade Delphi
     
     Args:
         file_path (str): Caminho do arquivo
+        content (str, optional): Conteúdo já lido do arquivo (evita nova abertura)
         
     Returns:
         bool: True se for uma unidade Delphi, False caso contrário
     """
-    if not os.path.isfile(file_path):
+    if not file_path.lower().endswith('.pas'):
         return False
         
-    if not file_path.lower().endswith('.pas'):
+    if content is None and not os.path.isfile(file_path):
         return False
         
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read(1000)  # Ler apenas o início do arquivo
+        if content is None:
+            content = read_unit_header(file_path)  # Ler apenas o início do arquivo
+        else:
+            content = unit_header(content)
             
         # Verificar se começa com a palavra-chave 'unit'
-        return bool(re.search(r'^\s*unit\s+\w+;', content, re.IGNORECASE | re.MULTILINE))
+        return UNIT_HEADER_RE.search(content) is not None
     except:
         return False
 
@@ -77,22 +117,25 @@ def is_system_unit(unit_name):
     
     return unit_name in system_units
 
-def extract_unit_name(file_path):
+def extract_unit_name(file_path, content=None):
     """
     Extrai o nome da unidade de um arquivo .pas
     
     Args:
         file_path (str): Caminho do arquivo
+        content (str, optional): Conteúdo já lido do arquivo (evita nova abertura)
         
     Returns:
         str: Nome da unidade ou None
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read(1000)  # Ler apenas o início do arquivo
+        if content is None:
+            content = read_unit_header(file_path)  # Ler apenas o início do arquivo
+        else:
+            content = unit_header(content)
             
         # Extrair o nome da unidade
-        unit_match = re.search(r'^\s*unit\s+(\w+);', content, re.IGNORECASE | re.MULTILINE)
+        unit_match = UNIT_HEADER_RE.search(content)
         if unit_match:
             return unit_match.group(1)
     except:
@@ -158,4 +201,58 @@ def extract_method_info(content, line_num):
                 end_line = i + 1  # Converter de volta para índice base-1
                 break
     
-    return method_name, start_line, end_line 
\ No newline at end of file
+    return method_name, start_line, end_line
+
+class LRUCache:
+    """
+    Cache com limite de entradas e descarte da entrada usada há mais tempo (LRU)
+    
+    Seguro para uso por várias threads.
+    """
+    
+    def __init__(self, max_entries=1000):
+        """
+        Args:
+            max_entries (int): Número máximo de entradas mantidas
+        """
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default=None):
+        """Retorna o valor e marca a entrada como usada recentemente"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value):
+        """Insere ou atualiza uma entrada, descartando as mais antigas se necessário"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def pop(self, key, default=None):
+        """Remove uma entrada"""
+        with self._lock:
+            return self._data.pop(key, default)
+    
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._data)